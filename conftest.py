@@ -0,0 +1,56 @@
+# Fixtures shared by the tests: a small base IDF and EPW for the CondFD sweep, estimator and result store,
+# and the stand-in simulator to run them with.
+
+import os
+import sys
+
+import pytest
+
+from ep_condFDSweep import CommandSimulator
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+baseIdf = """Version,8.5;
+
+Timestep,1;
+
+HeatBalanceAlgorithm,ConductionTransferFunction;
+
+Material,
+CONCRETE,                !- Name
+MediumRough,             !- Roughness
+0.1,                     !- Thickness {m}
+1.4,                     !- Conductivity {W/m-K}
+2300,                    !- Density {kg/m3}
+880;                     !- Specific Heat {J/kg-K}
+
+Material,
+INSULATION,              !- Name
+MediumRough,             !- Roughness
+0.05,                    !- Thickness {m}
+0.04,                    !- Conductivity {W/m-K}
+30,                      !- Density {kg/m3}
+1400;                    !- Specific Heat {J/kg-K}
+
+Construction,WALL,CONCRETE,INSULATION;
+"""
+
+
+@pytest.fixture
+def sweepInputs(tmp_path):
+    # (base IDF path, EPW path): two days of hourly weather, only the dry bulb is read by the stand-in
+    idfPath = str(tmp_path / "base.idf")
+    with open(idfPath, "w") as file:
+        file.write(baseIdf)
+    epwPath = str(tmp_path / "weather.epw")
+    with open(epwPath, "w") as file:
+        file.write("LOCATION,Manila,MetroManila,PH,Custom,,14.5,121.0,8.0,21\n" + "HEADER\n" * 7)
+        for hour in range(48):
+            file.write("2013,1,{},{},60,?,{:.1f}\n".format(hour // 24 + 1, hour % 24 + 1, 25 + hour % 24 / 4.0))
+    return idfPath, epwPath
+
+
+@pytest.fixture
+def standin():
+    # the stand-in energyplus without its simulated run time
+    return CommandSimulator([sys.executable, os.path.join(here, "ep_standinSimulator.py"), "--time-scale", "0"])
@@ -0,0 +1,202 @@
+# Estimates the size and cost of a ConductionFiniteDifference run before it is simulated, from the construction
+# layers, the PCM curves and the settings of ep_heatBalanceSettings.py.
+#
+# Every layer is cut into nodes spaced dx = sqrt(C * alpha * dt) apart (C the space discretization constant,
+# alpha = k / (rho * cp) of the base material, dt the zone time step), as EnergyPlus does. A run updates every
+# node of every surface at every time step, as many times as the iterations it needs to converge: more for a
+# tighter inside face convergence criterion and a smaller relaxation factor, more for Crank-Nicolson, and more
+# for layers with a PCM, whose apparent heat capacity in the melting range is many times the base one.
+#
+# The cost model turns that into run time and memory:
+#   seconds   = startup + perNodeStep * nodeSteps + perNodeIteration * nodeUpdates
+#   megabytes = baseMemory + perNode * nodes
+# Its defaults are rough; calibrate fits the time coefficients by least squares to the runs of a sweep
+# (ep_condFDSweep.py results.jsonl).
+# usage: python ep_condFDEstimate.py <in.idf> [--hours 8760] [--model model.json]
+#        python ep_condFDEstimate.py --calibrate sweep/results.jsonl [--hours 8760] [--save model.json]
+
+import argparse
+import collections
+import json
+import math
+import sys
+
+import numpy as np
+
+from ep_condFDSettings import defaultSettings
+from ep_idfWriter import idfObjects
+
+# pcmCurve: (temperatures, enthalpies) of its MaterialProperty:PhaseChange, conductivityCurve: (temperatures,
+# conductivities) of its MaterialProperty:VariableThermalConductivity
+Layer = collections.namedtuple("Layer", ["name", "thickness", "conductivity", "density", "specificHeat", "pcmCurve",
+                                         "conductivityCurve"])
+Layer.__new__.__defaults__ = (None, None)
+
+defaultModel = {"startup": 1.0, "perNodeStep": 2e-8, "perNodeIteration": 4e-8, "baseMemory": 60.0,
+                "perNode": 2.5e-4}
+
+Estimate = collections.namedtuple("Estimate", ["nodes", "totalNodes", "iterations", "nodeSteps", "nodeUpdates",
+                                               "seconds", "megabytes"])
+
+
+def layerNodes(layer, timestepsPerHour, constant):
+    # the nodes of one layer, at least one
+    alpha = layer.conductivity / (layer.density * layer.specificHeat)
+    dx = math.sqrt(constant * alpha * 3600.0 / timestepsPerHour)
+    return max(1, int(math.ceil(layer.thickness / dx)))
+
+
+def apparentHeatCapacity(temperatures, enthalpies):
+    # the steepest slope of a temperature - enthalpy curve (J/kg-K), the heat capacity in the melting range
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    enthalpies = np.asarray(enthalpies, dtype=np.float64)
+    if len(temperatures) < 2:
+        return 0.0
+    return float(np.max(np.diff(enthalpies) / np.diff(temperatures)))
+
+
+def iterationsPerStep(settings, layers):
+    criterion = float(settings["insideFaceSurfTempConv_"])
+    relaxation = float(settings["relaxationFactor_"])
+    iterations = (1 + max(0.0, math.log10(0.01 / criterion))) / relaxation
+    if str(settings["differenceScheme_"]).startswith("Crank"):
+        iterations *= 1.3
+    # a PCM layer converges slower the sharper its melting range
+    ratios = [apparentHeatCapacity(*layer.pcmCurve) / layer.specificHeat for layer in layers if layer.pcmCurve]
+    if ratios:
+        iterations *= 1 + math.log10(max(1.0, max(ratios)))
+    return iterations
+
+
+def features(layerLists, settings, timestepsPerHour=6, hours=8760, surfaces=None):
+    # (nodes per layer of every construction, total nodes, iterations, node steps, node updates).
+    # layerLists: the layers of every construction, surfaces: how many surfaces use each construction
+    settings = dict(defaultSettings, **dict((key, value) for key, value in settings.items() if value is not None))
+    constant = float(settings["discretizationConst_"])
+    surfaces = surfaces or [1] * len(layerLists)
+    nodes = [[layerNodes(layer, timestepsPerHour, constant) for layer in layers] for layers in layerLists]
+    totalNodes = sum(sum(construction) * count for construction, count in zip(nodes, surfaces))
+    iterations = iterationsPerStep(settings, [layer for layers in layerLists for layer in layers])
+    nodeSteps = totalNodes * timestepsPerHour * hours
+    return nodes, totalNodes, iterations, nodeSteps, nodeSteps * iterations
+
+
+def estimate(layerLists, settings, timestepsPerHour=6, hours=8760, surfaces=None, model=defaultModel):
+    nodes, totalNodes, iterations, nodeSteps, nodeUpdates = features(layerLists, settings, timestepsPerHour, hours,
+                                                                     surfaces)
+    seconds = model["startup"] + model["perNodeStep"] * nodeSteps + model["perNodeIteration"] * nodeUpdates
+    megabytes = model["baseMemory"] + model["perNode"] * totalNodes
+    return Estimate(nodes, totalNodes, iterations, nodeSteps, nodeUpdates, seconds, megabytes)
+
+
+def fromIdf(text):
+    # (layer lists, settings, time steps per hour, surfaces per construction) of an IDF
+    objects = idfObjects(text)
+    curves, conductivityCurves = {}, {}
+    for fields in objects:
+        if fields[0].lower() == "materialproperty:phasechange" and len(fields) > 4:
+            values = [float(value) for value in fields[3:] if value]
+            curves[fields[1].upper()] = (values[0::2], values[1::2])
+        elif fields[0].lower() == "materialproperty:variablethermalconductivity" and len(fields) > 3:
+            values = [float(value) for value in fields[2:] if value]
+            conductivityCurves[fields[1].upper()] = (values[0::2], values[1::2])
+    materials = {}
+    for fields in objects:
+        if fields[0].lower() == "material" and len(fields) >= 7:
+            name = fields[1].upper()
+            materials[name] = Layer(name, *[float(value) for value in fields[3:7]], pcmCurve=curves.get(name),
+                                    conductivityCurve=conductivityCurves.get(name))
+    constructions = [(fields[1].upper(), [materials[layer.upper()] for layer in fields[2:] if layer.upper() in materials])
+                     for fields in objects if fields[0].lower() == "construction"]
+    if not constructions:
+        constructions = [(name, [layer]) for name, layer in materials.items()]
+    counts = collections.Counter(fields[3].upper() for fields in objects
+                                 if fields[0].lower() == "buildingsurface:detailed" and len(fields) > 3)
+    surfaces = [counts.get(name, 0) or 1 for name, layers in constructions] if counts else None
+
+    settings = dict(defaultSettings)
+    timestepsPerHour = 6
+    for fields in objects:
+        if fields[0].lower() == "heatbalancesettings:conductionfinitedifference":
+            for name, value in zip(["differenceScheme_", "discretizationConst_", "relaxationFactor_",
+                                    "insideFaceSurfTempConv_"], fields[1:]):
+                if value:
+                    settings[name] = value
+        elif fields[0].lower() == "timestep" and len(fields) > 1:
+            timestepsPerHour = int(float(fields[1]))
+    return [layers for name, layers in constructions], settings, timestepsPerHour, surfaces
+
+
+def calibrate(samples, model=defaultModel):
+    # samples: (node steps, node updates, seconds) of measured runs. Returns the model with the time
+    # coefficients fitted by least squares (kept non-negative)
+    if len(samples) < 3:
+        raise ValueError("{} successful runs, at least 3 are needed to fit the 3 time coefficients".format(
+            len(samples)))
+    table = np.array(samples, dtype=np.float64)
+    design = np.column_stack([np.ones(len(table)), table[:, 0], table[:, 1]])
+    coefficients = np.linalg.lstsq(design, table[:, 2], rcond=None)[0]
+    if np.any(coefficients < 0):
+        # drop what came out negative and fit the rest again
+        keep = coefficients >= 0
+        coefficients = np.zeros(3)
+        coefficients[keep] = np.linalg.lstsq(design[:, keep], table[:, 2], rcond=None)[0]
+    fitted = dict(model)
+    fitted.update(zip(["startup", "perNodeStep", "perNodeIteration"], np.maximum(coefficients, 0.0).tolist()))
+    return fitted
+
+
+def sweepSamples(resultsPath, hours=8760):
+    # (node steps, node updates, seconds) of the successful runs of an ep_condFDSweep.py results.jsonl.
+    # Runs served by the result store count too, their seconds are the wall time of the stored run
+    samples = []
+    with open(resultsPath) as file:
+        for line in file:
+            result = json.loads(line)
+            if result.get("status") != "ok" or "runDir" not in result or result.get("seconds") is None:
+                continue
+            with open(result["runDir"] + "/in.idf") as idf:
+                layerLists, settings, timestepsPerHour, surfaces = fromIdf(idf.read())
+            values = features(layerLists, settings, timestepsPerHour, hours, surfaces)
+            samples.append((values[3], values[4], result["seconds"]))
+    return samples
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Estimate the nodes, run time and memory of a CondFD run")
+    argParser.add_argument("idf", nargs="?")
+    argParser.add_argument("--hours", type=int, default=8760, help="simulated hours")
+    argParser.add_argument("--model", help="cost model JSON, see --save")
+    argParser.add_argument("--calibrate", help="results.jsonl of a sweep to fit the cost model to")
+    argParser.add_argument("--save", help="write the calibrated model here")
+    args = argParser.parse_args()
+
+    model = defaultModel
+    if args.model:
+        with open(args.model) as file:
+            model = dict(defaultModel, **json.load(file))
+    if args.calibrate:
+        samples = sweepSamples(args.calibrate, args.hours)
+        try:
+            model = calibrate(samples, model)
+        except ValueError as e:
+            sys.exit("cannot calibrate from {}: {}".format(args.calibrate, e))
+        predicted = np.array([model["startup"] + model["perNodeStep"] * steps + model["perNodeIteration"] * updates
+                              for steps, updates, seconds in samples])
+        measured = np.array([seconds for steps, updates, seconds in samples])
+        print("{} runs, mean absolute error {:.3f} s ({:.1%})".format(
+            len(samples), np.mean(np.abs(predicted - measured)), np.mean(np.abs(predicted - measured) / measured)))
+        print(json.dumps(model))
+        if args.save:
+            with open(args.save, "w") as file:
+                json.dump(model, file, indent=1)
+    if args.idf:
+        with open(args.idf) as file:
+            layerLists, settings, timestepsPerHour, surfaces = fromIdf(file.read())
+        result = estimate(layerLists, settings, timestepsPerHour, args.hours, surfaces, model)
+        for layers, nodes in zip(layerLists, result.nodes):
+            print("  " + ", ".join("{} {}".format(layer.name, count) for layer, count in zip(layers, nodes)))
+        print("{} nodes, {:.1f} iterations per step, {:.3g} node updates -> {:.1f} s, {:.0f} MB".format(
+            result.totalNodes, result.iterations, result.nodeUpdates, result.seconds, result.megabytes))
+    if not args.idf and not args.calibrate:
+        sys.exit(argParser.format_usage())
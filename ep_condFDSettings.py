@@ -0,0 +1,9 @@
+# The ConductionFiniteDifference settings of ep_heatBalanceSettings.py, shared by the sweep, the estimator,
+# the screening solver and the surrogate fit without them importing each other.
+
+# the component's inputs, in the order of the HeatBalanceSettings:ConductionFiniteDifference fields
+settingNames = ["differenceScheme_", "discretizationConst_", "relaxationFactor_", "insideFaceSurfTempConv_"]
+
+# the component's defaults
+defaultSettings = {"differenceScheme_": "FullyImplicitFirstOrder", "discretizationConst_": 3.0,
+                   "relaxationFactor_": 1.0, "insideFaceSurfTempConv_": 0.002}
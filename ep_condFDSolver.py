@@ -0,0 +1,374 @@
+# A 1-D conduction finite difference solver for screening phase change materials before they go to a full
+# EnergyPlus run: many walls are simulated at once, one column of a (nodes, walls) array each, through a year
+# of hourly EPW weather.
+#
+# Like EnergyPlus' CondFD, every layer is cut into nodes dx = sqrt(C * alpha * dt) apart (see
+# ep_condFDEstimate.layerNodes) and the heat capacity of a node with a MaterialProperty:PhaseChange curve is
+# the enthalpy method's chord, (H(T) - H(Told)) / (T - Told), with the curve's enthalpies and the material's
+# specific heat outside the curve's temperatures. A MaterialProperty:VariableThermalConductivity curve gives
+# the conductivity, held at its end values outside the curve. Each time step is FullyImplicitFirstOrder or
+# CrankNicholsonSecondOrder: a tridiagonal system (Thomas algorithm, vectorised over the walls) is solved,
+# relaxed by the relaxation factor and solved again with the new capacities until a solve moves the inside
+# face temperatures it started from by less than the convergence criterion. The relaxation changes how
+# fast the iteration gets there, not the answer.
+#
+# Outside: the EPW dry bulb through a combined film coefficient plus absorbed global horizontal radiation,
+# inside: a constant zone temperature. The first day is repeated warmupDays times before the year.
+# The temperature coefficient of a PhaseChange object is not modelled.
+# usage: python ep_condFDSolver.py <construction.idf> <weather.epw> <candidates.csv> --layer NAME
+#                                  [--scheme FullyImplicitFirstOrder] [--discretization 3] [--relaxation 1]
+#                                  [--criterion 0.002] [--timesteps 1] [--zone 21] [--out screen.tsv] [--top 10]
+# candidates.csv is a materialProp_batch.py table; every name in it is one candidate for the layer NAME of
+# the construction, with its phase change and/or conductivity curve. The construction without them is the
+# reference the peak reductions are relative to. The candidates are written to screen.tsv, those that cut the
+# zone's peak heat gain through the wall most first.
+
+import argparse
+import collections
+import csv
+import sys
+import time
+
+import numpy as np
+
+import ep_condFDEstimate as estimate
+import materialProp_core as core
+from ep_condFDSettings import settingNames
+from ep_epwCache import epwFields, loadEpw
+from materialProp_batch import checkCurves, padded, readTable
+
+outsideFilm = 25.0      # W/m2K, convection and radiation
+insideFilm = 8.0
+
+Result = collections.namedtuple("Result", ["insideFlux", "insideSurface", "iterations", "unconverged", "nodes"])
+
+metricNames = ["peakGain", "peakLoss", "meanAbsFlux", "gainReduction", "lossReduction"]
+
+
+class CurveTable(object):
+    # the piecewise linear curves of all cells (cells, walls) as flat padded tables. A cell without a curve
+    # gets a two point curve through (0, 0) and (1, default), which with the slope continuation of value()
+    # is the line default * T
+
+    def __init__(self, curves, defaults, shape, width):
+        temperatures = padded([curve[0] if curve else [0.0, 1.0] for curve in curves], width)
+        values = padded([curve[1] if curve else [0.0, default] for curve, default in zip(curves, defaults)], width)
+        counts = np.array([len(curve[0]) if curve else 2 for curve in curves])
+        rows = np.arange(len(curves))
+        self.shape = shape
+        self.first = temperatures[:, 0].reshape(shape)
+        self.last = temperatures[rows, counts - 1].reshape(shape)
+        self.lastSegment = (counts - 2).reshape(shape)
+        self.offsets = (rows * width).reshape(shape)
+        # padding above every temperature, so counting the temperatures below T finds the segment
+        self.temperatures = np.where(np.isnan(temperatures), np.inf, temperatures).reshape(shape + (width,))
+        with np.errstate(invalid="ignore"):
+            slopes = np.diff(values, axis=1) / np.diff(temperatures, axis=1)
+        self.flatTemperatures = temperatures.ravel()
+        self.flatValues = values.ravel()
+        self.flatSlopes = np.concatenate([slopes, np.zeros((len(curves), 1))], axis=1).ravel()
+
+    def value(self, T, slopeOutside):
+        # the curves at T (cells, walls), continued with slopeOutside (cells, walls) beyond their ends
+        clipped = np.minimum(np.maximum(T, self.first), self.last)
+        segment = np.minimum((clipped[..., None] >= self.temperatures).sum(-1) - 1, self.lastSegment)
+        index = self.offsets + np.maximum(segment, 0)
+        return (self.flatValues[index] + self.flatSlopes[index] * (clipped - self.flatTemperatures[index]) +
+                slopeOutside * (T - clipped))
+
+
+def thomas(lower, diagonal, upper, rhs):
+    # solves tridiagonal systems along axis 0, one per column: lower[i] T[i-1] + diagonal[i] T[i] +
+    # upper[i] T[i+1] = rhs[i]
+    n = len(diagonal)
+    c = np.empty_like(diagonal)
+    d = np.empty_like(diagonal)
+    c[0] = upper[0] / diagonal[0]
+    d[0] = rhs[0] / diagonal[0]
+    for i in range(1, n):
+        denominator = diagonal[i] - lower[i] * c[i - 1]
+        c[i] = upper[i] / denominator
+        d[i] = (rhs[i] - lower[i] * d[i - 1]) / denominator
+    for i in range(n - 2, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+    return d
+
+
+class WallGrid(object):
+    # the cells of a batch of walls (lists of ep_condFDEstimate.Layer, outside first) as (cells, walls) arrays,
+    # shorter walls padded with cells that are not connected to anything
+
+    def __init__(self, walls, timestepsPerHour, constant):
+        cells = []
+        for layers in walls:
+            wallCells = []
+            for layer in layers:
+                count = estimate.layerNodes(layer, timestepsPerHour, constant)
+                wallCells.extend([(layer, layer.thickness / count)] * count)
+            cells.append(wallCells)
+        self.numWalls = len(walls)
+        self.numCells = max(len(wallCells) for wallCells in cells)
+        self.nodes = np.array([len(wallCells) for wallCells in cells])
+        shape = (self.numCells, self.numWalls)
+        # padding cells: 1 m of something with unit capacity
+        self.real = np.arange(self.numCells)[:, None] < self.nodes[None, :]
+        self.dx = np.ones(shape)
+        self.density = np.ones(shape)
+        self.specificHeat = np.ones(shape)
+        self.conductivity = np.ones(shape)
+        pcmCurves, conductivityCurves = [None] * (shape[0] * shape[1]), [None] * (shape[0] * shape[1])
+        for wall, wallCells in enumerate(cells):
+            for cell, (layer, dx) in enumerate(wallCells):
+                self.dx[cell, wall] = dx
+                self.density[cell, wall] = layer.density
+                self.specificHeat[cell, wall] = layer.specificHeat
+                self.conductivity[cell, wall] = layer.conductivity
+                pcmCurves[cell * self.numWalls + wall] = layer.pcmCurve
+                conductivityCurves[cell * self.numWalls + wall] = layer.conductivityCurve
+        self.hasPcm = any(pcmCurves)
+        self.hasVariableConductivity = any(conductivityCurves)
+        width = max([len(curve[0]) for curve in pcmCurves + conductivityCurves if curve] + [2])
+        self.enthalpyTable = CurveTable(pcmCurves, self.specificHeat.ravel(), shape, width)
+        self.conductivityTable = CurveTable(conductivityCurves, self.conductivity.ravel(), shape, width)
+        self.last = self.nodes - 1
+        self.columns = np.arange(self.numWalls)
+
+    def enthalpy(self, T):
+        return self.enthalpyTable.value(T, self.specificHeat)
+
+    def conductivities(self, T):
+        if not self.hasVariableConductivity:
+            return self.conductivity
+        return self.conductivityTable.value(T, 0.0)
+
+    def conductances(self, T):
+        # (interface conductances between cells (cells - 1, walls), outside and inside film conductances of the
+        # first and last cell of each wall (walls,)), W/m2K
+        halfResistance = self.dx / (2 * self.conductivities(T))
+        interfaces = np.where(self.real[1:], 1 / (halfResistance[:-1] + halfResistance[1:]), 0.0)
+        outside = 1 / (1 / outsideFilm + halfResistance[0])
+        inside = 1 / (1 / insideFilm + halfResistance[self.last, self.columns])
+        return interfaces, outside, inside
+
+
+def flows(grid, T, interfaces, outside, inside, outdoor, solar, zone):
+    # net heat flow into every cell (cells, walls), W/m2
+    between = interfaces * (T[1:] - T[:-1])
+    net = np.zeros_like(T)
+    net[:-1] += between
+    net[1:] -= between
+    net[0] += outside * (outdoor - T[0]) + solar
+    net[grid.last, grid.columns] += inside * (zone - T[grid.last, grid.columns])
+    return net
+
+
+def simulate(walls, outdoor, solar, zone=21.0, scheme="FullyImplicitFirstOrder", constant=3.0, relaxation=1.0,
+             criterion=0.002, timestepsPerHour=1, warmupDays=7, maxIterations=100):
+    # walls: lists of layers, outdoor: hourly dry bulb (C), solar: hourly absorbed radiation (W/m2).
+    # Returns the hourly mean heat flow into the zone (W/m2) and inside face temperature of every wall,
+    # (walls, hours) arrays, and the iterations of every time step
+    grid = WallGrid(walls, timestepsPerHour, constant)
+    theta = 0.5 if scheme.lower().startswith("crank") else 1.0
+    dt = 3600.0 / timestepsPerHour
+    mass = np.where(grid.real, grid.density * grid.dx, 1.0)
+    outdoor = np.concatenate([np.tile(outdoor[:24], warmupDays), outdoor]).astype(np.float64)
+    solar = np.concatenate([np.tile(solar[:24], warmupDays), solar]).astype(np.float64)
+    numHours = len(outdoor) - 24 * warmupDays
+
+    T = np.full((grid.numCells, grid.numWalls), float(zone))
+    H = grid.enthalpy(T)
+    interfaces, outside, inside = grid.conductances(T)
+    insideFlux = np.zeros((grid.numWalls, numHours))
+    insideSurface = np.zeros((grid.numWalls, numHours))
+    iterations = np.zeros(len(outdoor) * timestepsPerHour, dtype=np.int32)
+    unconverged = 0
+    lower, upper = np.zeros_like(T), np.zeros_like(T)
+    # without curves a step is linear, its first solve is the solution whatever the relaxation
+    linear = not grid.hasPcm and not grid.hasVariableConductivity
+    previousOutdoor, previousSolar = outdoor[0], solar[0]
+    stepOutdoor, stepSolar = outdoor[0], solar[0]
+    for hour in range(len(outdoor)):
+        for step in range(timestepsPerHour):
+            Told, Hold = T, H
+            explicit = (1 - theta) * flows(grid, Told, interfaces, outside, inside, stepOutdoor, stepSolar,
+                                           zone) if theta < 1 else 0.0
+            # boundary conditions linear within the hour
+            fraction = (step + 1.0) / timestepsPerHour
+            stepOutdoor = previousOutdoor + (outdoor[hour] - previousOutdoor) * fraction
+            stepSolar = previousSolar + (solar[hour] - previousSolar) * fraction
+            slope = (grid.enthalpy(Told + 0.01) - Hold) / 0.01 if grid.hasPcm else grid.specificHeat
+            # a wall whose inside face residual changes sign between iterations is oscillating around a kink
+            # of its enthalpy curve, its relaxation is halved
+            damping = np.full(grid.numWalls, float(relaxation))
+            lastResidual = np.zeros(grid.numWalls)
+            for iteration in range(1, maxIterations + 1):
+                if grid.hasPcm:
+                    H = grid.enthalpy(T)
+                    change = T - Told
+                    small = np.abs(change) < 1e-6
+                    capacity = np.where(small, slope, (H - Hold) / np.where(small, 1.0, change))
+                else:
+                    capacity = grid.specificHeat
+                if grid.hasVariableConductivity:
+                    interfaces, outside, inside = grid.conductances(T)
+                storage = np.where(grid.real, mass * capacity, 1.0) / dt
+                lower[1:] = -theta * interfaces
+                upper[:-1] = -theta * interfaces
+                diagonal = storage.copy()
+                diagonal[1:] += theta * interfaces
+                diagonal[:-1] += theta * interfaces
+                diagonal[0] += theta * outside
+                diagonal[grid.last, grid.columns] += theta * inside
+                rhs = storage * Told + explicit
+                rhs[0] += theta * (outside * stepOutdoor + stepSolar)
+                rhs[grid.last, grid.columns] += theta * inside * zone
+                solved = thomas(lower, diagonal, upper, rhs)
+                # the un-relaxed residual: converged when the solve reproduces the temperatures its capacities
+                # came from. The first solve only had the capacities at Told, its residual is the step's change
+                residual = solved - T
+                faceResidual = residual[grid.last, grid.columns]
+                if linear or (iteration > 1 and np.abs(faceResidual).max() < criterion):
+                    T = solved
+                    break
+                damping[faceResidual * lastResidual < 0] *= 0.5
+                lastResidual = faceResidual
+                T = T + damping * residual
+            else:
+                unconverged += 1
+            iterations[hour * timestepsPerHour + step] = iteration
+            H = grid.enthalpy(T) if grid.hasPcm else H
+            if hour >= 24 * warmupDays:
+                record = hour - 24 * warmupDays
+                face = T[grid.last, grid.columns]
+                insideFlux[:, record] += inside * (face - zone) / timestepsPerHour
+                insideSurface[:, record] = zone + inside * (face - zone) / insideFilm
+        previousOutdoor, previousSolar = outdoor[hour], solar[hour]
+    return Result(insideFlux, insideSurface, iterations, unconverged, grid.nodes)
+
+
+def curveParameters(temperatures, enthalpies, specificHeat):
+    # (peak temperature, latent heat J/kg, melting range K) of a temperature - enthalpy curve: where its
+    # slope is steepest, the enthalpy it gains above specificHeat * dT, and the temperatures over which it
+    # gains the middle 80 % of that
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    enthalpies = np.asarray(enthalpies, dtype=np.float64)
+    latentSteps = np.maximum(np.diff(enthalpies) - specificHeat * np.diff(temperatures), 0.0)
+    latent = latentSteps.sum()
+    steepest = np.argmax(np.diff(enthalpies) / np.diff(temperatures))
+    peak = (temperatures[steepest] + temperatures[steepest + 1]) / 2
+    if latent <= 0:
+        return peak, 0.0, 0.0
+    cumulative = np.concatenate([[0.0], np.cumsum(latentSteps)]) / latent
+    low, high = np.interp([0.1, 0.9], cumulative, temperatures)
+    return peak, latent, high - low
+
+
+def metrics(result, reference=0):
+    # per wall: peak heat gain and loss of the zone (W/m2), mean absolute flow, and the reductions of the
+    # peaks relative to the reference wall
+    flux = result.insideFlux
+    peakGain = np.maximum(flux.max(axis=1), 0.0)
+    peakLoss = np.maximum(-flux.min(axis=1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gainReduction = np.nan_to_num(1 - peakGain / peakGain[reference])
+        lossReduction = np.nan_to_num(1 - peakLoss / peakLoss[reference])
+    return {"peakGain": peakGain, "peakLoss": peakLoss, "meanAbsFlux": np.abs(flux).mean(axis=1),
+            "gainReduction": gainReduction, "lossReduction": lossReduction}
+
+
+def boundaryConditions(epw, absorptance):
+    # (dry bulb C, absorbed radiation W/m2) of every hour of an ep_epwCache.EpwData: missing dry bulbs are
+    # interpolated, missing radiation is none
+    missing = dict(epwFields)
+    dryBulb = np.array(epw["DryBulb"], dtype=np.float64)
+    known = dryBulb < missing["DryBulb"]
+    if not known.any():
+        raise ValueError("{} has no dry bulb temperatures".format(epw.path))
+    hours = np.arange(len(dryBulb))
+    dryBulb = np.interp(hours, hours[known], dryBulb[known])
+    radiation = np.array(epw["GloHorzRad"], dtype=np.float64)
+    radiation[radiation >= missing["GloHorzRad"]] = 0.0
+    return dryBulb, absorptance * radiation
+
+
+def candidateWalls(layers, layerName, curves):
+    # (names, walls): the construction with the curves of every candidate name on the layer layerName,
+    # the construction as it is first
+    byName = collections.OrderedDict()
+    for curve in curves:
+        entry = byName.setdefault(curve.name, {})
+        entry["pcmCurve" if curve.kind is core.phaseChange else "conductivityCurve"] = (
+            list(curve.temperatures), list(curve.values))
+    names, walls = ["(reference)"], [layers]
+    for name, replacements in byName.items():
+        names.append(name)
+        walls.append([layer._replace(**replacements) if layer.name == layerName else layer for layer in layers])
+    return names, walls
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Screen phase change materials with a 1-D CondFD solver")
+    argParser.add_argument("idf", help="materials and constructions, and the CondFD settings if it has them")
+    argParser.add_argument("epw")
+    argParser.add_argument("candidates", help="materialProp_batch.py table of the candidate curves")
+    argParser.add_argument("--layer", required=True, help="material the candidate curves are for")
+    argParser.add_argument("--scheme", help="FullyImplicitFirstOrder or CrankNicholsonSecondOrder")
+    argParser.add_argument("--discretization", type=float, help="space discretization constant")
+    argParser.add_argument("--relaxation", type=float)
+    argParser.add_argument("--criterion", type=float, help="inside face temperature convergence criterion")
+    argParser.add_argument("--timesteps", type=int, default=1, help="time steps per hour")
+    argParser.add_argument("--zone", type=float, default=21.0, help="zone temperature C")
+    argParser.add_argument("--absorptance", type=float, default=0.6, help="solar absorptance of the outside face")
+    argParser.add_argument("--out", default="screen.tsv")
+    argParser.add_argument("--top", type=int, default=10)
+    args = argParser.parse_args()
+
+    with open(args.idf) as file:
+        layerLists, settings, timestepsPerHour, surfaces = estimate.fromIdf(file.read())
+    layerName = args.layer.upper()
+    layers = next((layers for layers in layerLists if layerName in [layer.name for layer in layers]), None)
+    if layers is None:
+        sys.exit("no construction of {} has a layer {}".format(args.idf, args.layer))
+    for name, value in (("differenceScheme_", args.scheme), ("discretizationConst_", args.discretization),
+                        ("relaxationFactor_", args.relaxation), ("insideFaceSurfTempConv_", args.criterion)):
+        if value is not None:
+            settings[name] = value
+
+    curves = readTable(args.candidates)[0]
+    messages = checkCurves(curves)
+    for curve, curveMessages in zip(curves, messages):
+        for message in curveMessages:
+            print("{} ({}): {}, skipped".format(curve.name, curve.kind.className, message))
+    names, walls = candidateWalls(layers, layerName, [curve for curve, curveMessages in zip(curves, messages)
+                                                      if not curveMessages])
+
+    outdoor, solar = boundaryConditions(loadEpw(args.epw), args.absorptance)
+    start = time.perf_counter()
+    result = simulate(walls, outdoor, solar, args.zone,
+                      settings["differenceScheme_"], float(settings["discretizationConst_"]),
+                      float(settings["relaxationFactor_"]), float(settings["insideFaceSurfTempConv_"]),
+                      args.timesteps)
+    values = metrics(result)
+    print("{} walls x {} hours in {:.1f} s, {:.1f} iterations per step, {} steps not converged".format(
+        len(walls), result.insideFlux.shape[1], time.perf_counter() - start, result.iterations.mean(),
+        result.unconverged))
+
+    layer = next(layer for layer in layers if layer.name == layerName)
+    rows = []
+    for i, (name, wall) in enumerate(zip(names, walls)):
+        pcmCurve = next(wallLayer.pcmCurve for wallLayer in wall if wallLayer.name == layerName)
+        parameters = curveParameters(pcmCurve[0], pcmCurve[1], layer.specificHeat) if pcmCurve else ("", "", "")
+        rows.append([name] + list(parameters) + [values[key][i] for key in metricNames])
+    # the best reduction of the peak gain (the wall's share of the cooling peak) first
+    order = [0] + sorted(range(1, len(rows)), key=lambda i: -rows[i][-2])
+    with open(args.out, "w", newline="") as file:
+        fileOut = csv.writer(file, delimiter="\t")
+        # the settings too, so the tables of runs with different settings can be fitted together (ep_surrogateFit.py)
+        fileOut.writerow(["candidate", "peakTemperature", "latentHeat", "meltRange"] + metricNames + settingNames)
+        for i in order:
+            fileOut.writerow([value if isinstance(value, str) else round(float(value), 4) for value in rows[i]] +
+                             [settings[name] for name in settingNames])
+    for i in order[:args.top + 1]:
+        print("  {:<24} peak gain {:6.2f} W/m2 ({:+.1%}), peak loss {:6.2f} W/m2 ({:+.1%})".format(
+            rows[i][0], rows[i][4], 0.0 - rows[i][7], rows[i][5], 0.0 - rows[i][8]))
+    print("-> " + args.out)
@@ -0,0 +1,258 @@
+# Sweeps the ConductionFiniteDifference settings of ep_heatBalanceSettings.py: every point of a grid (or a
+# random sample) of differenceScheme_, discretizationConst_, relaxationFactor_ and insideFaceSurfTempConv_ is
+# validated and formatted by the component itself (run headless, see ep_headless.py), written into a copy of
+# a base IDF in place of its own heat balance objects, and simulated in a process pool.
+#
+# The simulator is pluggable: any picklable callable simulator(idfPath, epwPath, runDir) -> dict. The default
+# CommandSimulator runs an energyplus-like command (-w weather -d runDir idf), ep_standinSimulator.py is a
+# local stand-in for it. Every run's wall time, errors and warnings (eplusout.err) and the means of its
+# eplusout.csv columns go to <out-dir>/results.jsonl, a summary to <out-dir>/summary.tsv. With --store, runs
+# whose IDF and EPW were simulated before come from the result store (ep_resultStore.py) instead.
+# usage: python ep_condFDSweep.py <base.idf> <weather.epw> [--out-dir sweep] [--sample N] [--seed S]
+#                                 [--workers N] [--simulator "energyplus"] [--timeout seconds]
+#                                 [--store results] [--store-max-mb 1024]
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import re
+import shlex
+import subprocess
+import time
+
+import ep_headless
+from ep_condFDSettings import settingNames
+from ep_resultStore import ResultStore
+
+heatBalanceComponent = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ep_heatBalanceSettings.py")
+
+defaultGrid = {
+    "differenceScheme_": ["FullyImplicitFirstOrder", "CrankNicholsonSecondOrder"],
+    "discretizationConst_": [1.0, 2.0, 3.0],
+    "relaxationFactor_": [0.25, 0.5, 1.0],
+    "insideFaceSurfTempConv_": [0.0001, 0.002, 0.01],
+}
+
+# what samplePoints draws from: a list is a choice, (low, high) uniform, ("log", low, high) log-uniform
+sampleRanges = {
+    "differenceScheme_": ["FullyImplicitFirstOrder", "CrankNicholsonSecondOrder"],
+    "discretizationConst_": (0.5, 3.0),
+    "relaxationFactor_": (0.01, 1.0),
+    "insideFaceSurfTempConv_": ("log", 0.0000001, 0.01),
+}
+
+# the objects of the base IDF the component's output replaces
+replacedClasses = {"surfaceconvectionalgorithm:inside", "surfaceconvectionalgorithm:outside", "heatbalancealgorithm",
+                   "heatbalancesettings:conductionfinitedifference"}
+
+
+def gridPoints(grid=defaultGrid):
+    names = [name for name in settingNames if name in grid]
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def samplePoints(count, seed=None, ranges=sampleRanges):
+    rng = random.Random(seed)
+    points = []
+    for i in range(count):
+        point = {}
+        for name in settingNames:
+            spec = ranges[name]
+            if isinstance(spec, list):
+                point[name] = rng.choice(spec)
+            elif spec[0] == "log":
+                point[name] = 10 ** rng.uniform(math.log10(spec[1]), math.log10(spec[2]))
+            else:
+                point[name] = rng.uniform(spec[0], spec[1])
+        points.append(point)
+    return points
+
+
+def settingsSnippet(point):
+    # (IDF text, runtime messages) of the heat balance component for the point, the text is None when the
+    # component rejects the point
+    result = ep_headless.runComponent(heatBalanceComponent, point)
+    messages = [message for level, message in result["messages"]]
+    if result["error"]:
+        messages.append(result["error"])
+    return result["outputs"].get("SurfConv_HeatBal"), messages
+
+
+def variantIdf(baseText, snippet):
+    # the base IDF without its heat balance objects, followed by the snippet
+    kept, current = [], []
+    for line in baseText.splitlines(True):
+        current.append(line)
+        if ";" in line.split("!")[0]:
+            code = re.sub(r"!.*", "", "".join(current))
+            if code.split(",")[0].split(";")[0].strip().lower() not in replacedClasses:
+                kept.extend(current)
+            current = []
+    kept.extend(current)
+    text = "".join(kept).rstrip("\n")
+    return text + "\n\n" + snippet
+
+
+class CommandSimulator(object):
+    # runs <command> -w <epw> -d <runDir> <idf>, like the energyplus executable
+
+    def __init__(self, command="energyplus", timeout=None):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+
+    @property
+    def label(self):
+        return " ".join(self.command)
+
+    def __call__(self, idfPath, epwPath, runDir):
+        try:
+            completed = subprocess.run(self.command + ["-w", epwPath, "-d", runDir, idfPath], capture_output=True,
+                                       text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return {"returnCode": None, "message": "timed out after {} s".format(self.timeout)}
+        result = {"returnCode": completed.returncode}
+        if completed.returncode != 0:
+            result["message"] = (completed.stderr or completed.stdout).strip()[-500:]
+        result.update(readResults(runDir))
+        return result
+
+
+def readResults(runDir):
+    # the summary of eplusout.err and the mean of every numeric column of eplusout.csv
+    results = {}
+    errPath = os.path.join(runDir, "eplusout.err")
+    if os.path.exists(errPath):
+        with open(errPath, errors="replace") as file:
+            text = file.read()
+        summary = re.search(r"EnergyPlus (Completed Successfully|Terminated).*?(\d+) Warning; (\d+) Severe", text)
+        results["completed"] = bool(summary and summary.group(1) == "Completed Successfully")
+        results["warnings"] = int(summary.group(2)) if summary else text.count("** Warning **")
+        results["severe"] = int(summary.group(3)) if summary else text.count("** Severe  **")
+    csvPath = os.path.join(runDir, "eplusout.csv")
+    if os.path.exists(csvPath):
+        with open(csvPath, newline="") as file:
+            rows = csv.reader(file)
+            header = next(rows, [])
+            sums, counts = [0.0] * len(header), [0] * len(header)
+            for row in rows:
+                for i, value in enumerate(row[:len(header)]):
+                    try:
+                        sums[i] += float(value)
+                        counts[i] += 1
+                    except ValueError:
+                        pass
+        results["means"] = dict((name, sums[i] / counts[i]) for i, name in enumerate(header[1:], 1) if counts[i])
+    return results
+
+
+def runPoint(simulator, index, idfPath, epwPath, runDir):
+    start = time.perf_counter()
+    try:
+        result = simulator(idfPath, epwPath, runDir)
+    except Exception as exception:
+        result = {"returnCode": None, "message": "{}: {}".format(type(exception).__name__, exception)}
+    result["seconds"] = time.perf_counter() - start
+    return index, result
+
+
+def runStatus(result):
+    ok = result.get("returnCode") == 0 and result.get("completed", True) and not result.get("severe")
+    return "ok" if ok else "failed"
+
+
+def runSweep(baseIdf, epwPath, points, outDir, simulator=None, workers=None, store=None):
+    # one result per point, in order: the point, its status (invalid, failed or ok) and what the run gave.
+    # store: an ep_resultStore.ResultStore, points whose IDF and EPW were simulated before are not run again
+    simulator = simulator or CommandSimulator()
+    label = getattr(simulator, "label", getattr(simulator, "__name__", type(simulator).__name__))
+    with open(baseIdf) as file:
+        baseText = file.read()
+    os.makedirs(outDir, exist_ok=True)
+    epwPath = os.path.abspath(epwPath)
+
+    results, keys = [], {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        jobs = []
+        for index, point in enumerate(points):
+            snippet, messages = settingsSnippet(point)
+            results.append({"point": point, "status": "invalid" if snippet is None else "queued",
+                            "messages": messages})
+            if snippet is None:
+                continue
+            runDir = os.path.abspath(os.path.join(outDir, "point_{:04d}".format(index)))
+            os.makedirs(runDir, exist_ok=True)
+            idfText = variantIdf(baseText, snippet)
+            idfPath = os.path.join(runDir, "in.idf")
+            with open(idfPath, "w") as file:
+                file.write(idfText)
+            results[-1]["runDir"] = runDir
+            if store is not None:
+                keys[index] = store.key(idfText, epwPath, label)
+                stored = store.get(keys[index], runDir)
+                if stored is not None:
+                    results[-1].update(stored, cached=True)
+                    results[-1]["status"] = runStatus(stored)
+                    continue
+            jobs.append(pool.submit(runPoint, simulator, index, idfPath, epwPath, runDir))
+
+        # runs are collected as they finish
+        for job in concurrent.futures.as_completed(jobs):
+            index, result = job.result()
+            results[index].update(result)
+            results[index]["status"] = runStatus(result)
+            # timeouts and crashes of the simulator are not stored
+            if store is not None and result.get("returnCode") is not None:
+                store.put(keys[index], result, results[index]["runDir"])
+
+    if store is not None:
+        store.save()
+    writeSummary(outDir, results)
+    return results
+
+
+def writeSummary(outDir, results):
+    with open(os.path.join(outDir, "results.jsonl"), "w") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+    with open(os.path.join(outDir, "summary.tsv"), "w", newline="") as file:
+        fileOut = csv.writer(file, delimiter="\t")
+        fileOut.writerow(["point"] + [name.rstrip("_") for name in settingNames] +
+                         ["status", "seconds", "cached", "warnings", "severe", "message"])
+        for index, result in enumerate(results):
+            seconds = result.get("seconds")
+            fileOut.writerow([index] + [result["point"].get(name, "") for name in settingNames] + [
+                result["status"], "" if seconds is None else "{:.3f}".format(seconds), int(result.get("cached", False)),
+                result.get("warnings", ""),
+                result.get("severe", ""), " ".join(result["messages"]) or result.get("message", "")])
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Sweep the CondFD heat balance settings")
+    argParser.add_argument("idf", help="base IDF, its heat balance objects are replaced")
+    argParser.add_argument("epw")
+    argParser.add_argument("--out-dir", default="sweep")
+    argParser.add_argument("--sample", type=int, help="random points instead of the default grid")
+    argParser.add_argument("--seed", type=int)
+    argParser.add_argument("--workers", type=int, default=None, help="processes, all cores by default")
+    argParser.add_argument("--simulator", default="energyplus", help="command, e.g. \"python ep_standinSimulator.py\"")
+    argParser.add_argument("--timeout", type=float)
+    argParser.add_argument("--store", help="result store directory, runs simulated before are not run again")
+    argParser.add_argument("--store-max-mb", type=float, default=1024)
+    args = argParser.parse_args()
+
+    points = samplePoints(args.sample, args.seed) if args.sample else gridPoints()
+    store = ResultStore(args.store, int(args.store_max_mb * 2 ** 20)) if args.store else None
+    start = time.perf_counter()
+    results = runSweep(args.idf, args.epw, points, args.out_dir, CommandSimulator(args.simulator, args.timeout),
+                       args.workers, store)
+    counts = dict((status, sum(1 for result in results if result["status"] == status))
+                  for status in ("ok", "failed", "invalid"))
+    print("{} points in {:.1f} s: {ok} ok, {failed} failed, {invalid} invalid -> {}".format(
+        len(results), time.perf_counter() - start, os.path.join(args.out_dir, "summary.tsv"), **counts))
+    if store is not None:
+        print("result store: {hits} hits, {misses} misses ({hitRate:.1%}), {entries} entries".format(**store.stats()))
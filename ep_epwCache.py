@@ -0,0 +1,154 @@
+# Reads EPW weather files through a binary sidecar (<file>.epw.colcache): the EPW is parsed once into
+# the 8 header lines plus one fixed width typed column per field, later loads memory map the sidecar.
+# The sidecar records the size, modification time and SHA-1 of the EPW it was built from, and is
+# rebuilt when the EPW's content changes.
+# usage: python ep_epwCache.py <file.epw> [field] [firstHour] [lastHour]
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+
+import numpy as np
+
+from wunderground_archive import mapColumns, readHeader, writeColumnFile
+
+magic = b"EPWCOL1\n"
+numHeaderLines = 8
+
+# the 35 EPW data fields, with the value EnergyPlus reads as missing
+epwFields = [
+    ("Year", None), ("Month", None), ("Day", None), ("Hour", None), ("Minute", None), ("DataSource", None),
+    ("DryBulb", 99.9), ("DewPoint", 99.9), ("RelHum", 999), ("AtmosPressure", 999999),
+    ("ExtHorzRad", 9999), ("ExtDirNormRad", 9999), ("HorzIRSky", 9999), ("GloHorzRad", 9999),
+    ("DirNormRad", 9999), ("DifHorzRad", 9999), ("GloHorzIllum", 999999), ("DirNormIllum", 999999),
+    ("DifHorzIllum", 999999), ("ZenLum", 9999), ("WindDir", 999), ("WindSpd", 999), ("TotSkyCvr", 99),
+    ("OpaqSkyCvr", 99), ("Visibility", 9999), ("CeilingHgt", 99999), ("PresWeathObs", 9),
+    ("PresWeathCodes", 999999999), ("PrecipWtr", 999), ("AerosolOptDepth", 0.999), ("SnowDepth", 999),
+    ("DaysSinceLastSnow", 99), ("Albedo", 999), ("LiquidPrecipDepth", 999), ("LiquidPrecipQuantity", 99),
+]
+
+# EPW fields that are not stored as float32
+fieldTypes = {
+    "Year": "<i2", "Month": "u1", "Day": "u1", "Hour": "u1", "Minute": "u1",
+    "DataSource": "S64", "PresWeathCodes": "S9",
+}
+
+
+def sidecarPath(epwPath):
+    return epwPath + ".colcache"
+
+
+def fileHash(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def buildSidecar(epwPath, cachePath=None):
+    with open(epwPath, newline="") as file:
+        lines = file.read().splitlines()
+    headerLines, rows = lines[:numHeaderLines], [row for row in csv.reader(lines[numHeaderLines:]) if row]
+
+    arrays = []
+    for i, (name, missing) in enumerate(epwFields):
+        raw = [row[i] if i < len(row) else "" for row in rows]
+        dtype = fieldTypes.get(name, "<f4")
+        if dtype[0] == "S":
+            arrays.append((name, np.array(raw, dtype=dtype)))
+        else:
+            # an empty field is read as the field's missing value
+            filler = str(missing if missing is not None else 0)
+            arrays.append((name, np.array([value or filler for value in raw], dtype=np.float64).astype(dtype)))
+
+    stat = os.stat(epwPath)
+    header = {"epwLines": headerLines, "sourceSize": stat.st_size, "sourceMtime": stat.st_mtime_ns,
+              "sourceHash": fileHash(epwPath)}
+    cachePath = cachePath or sidecarPath(epwPath)
+    tmp = cachePath + ".tmp"
+    writeColumnFile(tmp, magic, header, arrays)
+    os.replace(tmp, cachePath)
+
+
+def rewriteHeader(cachePath, header, start):
+    # the same columns under a new header, e.g. a new sourceMtime; the header can change length, so the
+    # file is copied rather than patched in place
+    headerBytes = json.dumps(header).encode("utf-8")
+    headerBytes += b" " * (-(len(magic) + 4 + len(headerBytes)) % 8)
+    tmp = cachePath + ".tmp"
+    with open(cachePath, "rb") as fileIn, open(tmp, "wb") as fileOut:
+        fileOut.write(magic)
+        fileOut.write(struct.pack("<I", len(headerBytes)))
+        fileOut.write(headerBytes)
+        fileIn.seek(start)
+        shutil.copyfileobj(fileIn, fileOut)
+    os.replace(tmp, cachePath)
+
+
+def isCurrent(header, epwPath):
+    # size and mtime unchanged is trusted, otherwise the content decides (a touched but unchanged file is fine)
+    stat = os.stat(epwPath)
+    if header["sourceSize"] != stat.st_size:
+        return False
+    return header["sourceMtime"] == stat.st_mtime_ns or header["sourceHash"] == fileHash(epwPath)
+
+
+class EpwData:
+    # one EPW file: epwLines are its 8 header lines, columns its fields as memory mapped arrays
+
+    def __init__(self, epwPath, cachePath=None):
+        cachePath = cachePath or sidecarPath(epwPath)
+        header = start = None
+        if os.path.exists(cachePath):
+            header, start = readHeader(cachePath, magic)
+        if header is None or not isCurrent(header, epwPath):
+            buildSidecar(epwPath, cachePath)
+            header, start = readHeader(cachePath, magic)
+        elif header["sourceMtime"] != os.stat(epwPath).st_mtime_ns:
+            # touched but unchanged: record the new mtime so later loads don't hash the EPW again
+            header["sourceMtime"] = os.stat(epwPath).st_mtime_ns
+            try:
+                rewriteHeader(cachePath, header, start)
+                header, start = readHeader(cachePath, magic)
+            except OSError:
+                # e.g. the sidecar is mapped by another load on Windows, it is hashed again next time
+                pass
+
+        self.path = epwPath
+        self.epwLines = header["epwLines"]
+        self.rows = header["rows"]
+        self.columns = mapColumns(cachePath, header, start)
+
+        location = self.epwLines[0].split(",") if self.epwLines else []
+        self.location = dict(zip(["City", "StateProv", "Country", "Source", "WMO", "Latitude", "Longitude",
+                                  "TimeZone", "Elevation"], location[1:]))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def field(self, name, firstHour=1, lastHour=None):
+        # the values of one field for the hours of the year firstHour..lastHour (1-based, inclusive),
+        # e.g. field("DryBulb", 4000, 5000)
+        return self.columns[name][firstHour - 1:lastHour]
+
+
+def loadEpw(epwPath, cachePath=None):
+    return EpwData(epwPath, cachePath)
+
+
+if __name__ == "__main__":
+    epw = loadEpw(sys.argv[1])
+    name = sys.argv[2] if len(sys.argv) > 2 else "DryBulb"
+    firstHour = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    lastHour = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    values = epw.field(name, firstHour, lastHour)
+    print("{} hours of {} in {}: min {:.1f} mean {:.1f} max {:.1f}".format(
+        len(values), name, epw.location.get("City", epw.path), values.min(), values.mean(), values.max()))
@@ -0,0 +1,254 @@
+# Runs the Grasshopper components (materialProp_phaseChange.py, materialProp_variableThermalCond.py,
+# ep_heatBalanceSettings.py) outside Rhino, over many input sets, in a pool of processes.
+#
+# Each run executes the component script as Grasshopper would: its inputs are globals named after the input
+# nicknames, ghenv, scriptcontext and Grasshopper.Kernel are light stand-ins, and sc.sticky holds a stand-in
+# Honeybee (material library, addEPConstructionToLib, release checks). The stand-ins are only installed when
+# the real modules cannot be imported, and the component scripts are compiled once per process. A worker's
+# sticky lasts for all the runs it does, like a Grasshopper session.
+#
+# The input sets are JSON lines, one object of input nickname -> value per run, e.g.
+#   {"_name": "GYPSUM", "coeff_": 0, "_temp1": -20, "_enthalpy1": -20000, "_temp2": 22, "_enthalpy2": 33400}
+# Inputs left out are None. Each result is a JSON line with the component's outputs, runtime messages and
+# printed text.
+# usage: python ep_headless.py <component.py> <inputs.jsonl> [--out results.jsonl] [--workers N]
+#                              [--library materials.idf]
+
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import types
+
+from ep_materialIndex import parseDefinition
+
+
+class InputList(list):
+    # ghenv.Component.Params.Input, a .NET list
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class Param(object):
+
+    def __init__(self, nickName):
+        self.NickName = nickName
+        self.Name = nickName
+
+
+class Params(object):
+
+    def __init__(self, nickNames):
+        self.Input = InputList(Param(nickName) for nickName in nickNames)
+
+
+class IconDisplayMode(object):
+    application = "application"
+
+
+class Component(object):
+    # the attributes of a GH_Component the scripts use, runtime messages are collected in messages
+
+    def __init__(self, nickNames):
+        self.Name = self.NickName = self.Message = self.Category = self.SubCategory = ""
+        self.AdditionalHelpFromDocStrings = "0"
+        self.IconDisplayMode = IconDisplayMode
+        self.Params = Params(nickNames)
+        self.messages = []
+
+    def AddRuntimeMessage(self, level, message):
+        self.messages.append((level, message))
+
+
+class GhEnv(object):
+
+    def __init__(self, component):
+        self.Component = component
+
+
+class Sticky(dict):
+    # the scripts were written for IronPython 2, where dicts still have has_key
+
+    def has_key(self, key):
+        return key in self
+
+
+class Release(object):
+
+    def isCompatible(self, component):
+        return True
+
+    def isInputMissing(self, component):
+        return False
+
+
+class EPMaterialAUX(object):
+    # Honeybee's material helper, only what the material components call
+
+    def __init__(self, library):
+        self.library = library
+
+    def addEPConstructionToLib(self, definition, overwrite=False):
+        fields = parseDefinition(definition)
+        name = fields[1].upper()
+        if name in self.library and not overwrite:
+            return False, name
+        self.library[name] = dict(enumerate(fields))
+        return True, name
+
+
+def standinSticky(library=None):
+    # a sticky with a flying Ladybug and Honeybee, library: {material name: fields}
+    sticky = Sticky()
+    sticky["ladybug_release"] = Release()
+    sticky["honeybee_release"] = Release()
+    sticky["honeybee_materialLib"] = dict(library or {})
+    sticky["honeybee_EPMaterialAUX"] = lambda: EPMaterialAUX(sticky["honeybee_materialLib"])
+    return sticky
+
+
+def readLibrary(path):
+    # the Material objects of an IDF file, by name
+    with open(path) as file:
+        text = re.sub(r"!.*", "", file.read())
+    library = {}
+    for body in text.split(";"):
+        fields = [field.strip() for field in body.split(",")]
+        if len(fields) > 1 and fields[0].lower().startswith("material"):
+            library[fields[1].upper()] = dict(enumerate(fields))
+    return library
+
+
+standins = {}
+
+
+def installStandins(sticky):
+    # scriptcontext and Grasshopper.Kernel, imported only when a component runs and only replaced when missing.
+    # The stand-in scriptcontext gets the given sticky
+    if "scriptcontext" not in standins:
+        try:
+            import scriptcontext
+            import Grasshopper.Kernel
+            standins["scriptcontext"] = scriptcontext
+            standins["real"] = True
+        except ImportError:
+            scriptcontext = types.ModuleType("scriptcontext")
+            grasshopper = types.ModuleType("Grasshopper")
+            kernel = types.ModuleType("Grasshopper.Kernel")
+            kernel.GH_RuntimeMessageLevel = types.SimpleNamespace(Remark="Remark", Warning="Warning", Error="Error")
+            grasshopper.Kernel = kernel
+            sys.modules.update({"scriptcontext": scriptcontext, "Grasshopper": grasshopper,
+                                "Grasshopper.Kernel": kernel})
+            standins["scriptcontext"] = scriptcontext
+            standins["real"] = False
+    if not standins["real"]:
+        standins["scriptcontext"].sticky = sticky
+    return standins["scriptcontext"]
+
+
+def componentSignature(source):
+    # (input nicknames, output names) from the Args: and Returns: sections of the component's docstring
+    docstring = source.split('"""')[1]
+    args, returns = docstring.split("Args:")[1].split("Returns:")
+    names = lambda section: re.findall(r"^\s{8}(\S+):", section, re.M)
+    return names(args), names(returns)
+
+
+compiled = {}
+
+
+def loadComponent(path):
+    # (code, input nicknames, output names), compiled once per process
+    if path not in compiled:
+        with open(path) as file:
+            source = file.read()
+        inputs, outputs = componentSignature(source)
+        compiled[path] = compile(source, path, "exec"), inputs, outputs
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    return compiled[path]
+
+
+def inputNickNames(documented, inputSet):
+    # the inputs the component has for this run: the documented ones that are always there (not numbered,
+    # e.g. _name, coeff_), the numbered pair inputs that are given, and other given inputs after those
+    nickNames = [name for name in documented if not name[-1].isdigit() or name in inputSet]
+    return nickNames + [name for name in inputSet if name not in nickNames]
+
+
+def runComponent(path, inputSet, sticky=None):
+    # one solution of the component: {"outputs": {...}, "messages": [...], "printed": "...", "error": ...}
+    code, documented, outputs = loadComponent(path)
+    installStandins(sticky if sticky is not None else standinSticky())
+    nickNames = inputNickNames(documented, inputSet)
+    component = Component(nickNames)
+    scope = {"__name__": "__main__", "ghenv": GhEnv(component)}
+    scope.update((name, inputSet.get(name)) for name in nickNames)
+
+    printed = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(printed):
+        try:
+            exec(code, scope)
+        except Exception as exception:
+            error = "{}: {}".format(type(exception).__name__, exception)
+    return {"outputs": dict((name, scope.get(name)) for name in outputs), "messages": component.messages,
+            "printed": printed.getvalue(), "error": error}
+
+
+workerSticky = {}
+
+
+def initWorker(library):
+    workerSticky["sticky"] = standinSticky(library)
+
+
+def runInWorker(path, index, inputSet):
+    result = runComponent(path, inputSet, workerSticky["sticky"])
+    result["index"] = index
+    return result
+
+
+def runMany(path, inputSets, workers=None, library=None):
+    # the results in input order. workers=0 runs in this process
+    if workers == 0:
+        initWorker(library)
+        return [runInWorker(path, i, inputSet) for i, inputSet in enumerate(inputSets)]
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=initWorker, initargs=(library,)) as pool:
+        chunk = max(1, len(inputSets) // (4 * (workers or os.cpu_count() or 1)))
+        return list(pool.map(runInWorker, [path] * len(inputSets), range(len(inputSets)), inputSets,
+                             chunksize=chunk))
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Run a Grasshopper component over many input sets")
+    argParser.add_argument("component")
+    argParser.add_argument("inputs", help="JSON lines, one object of input nickname -> value per run")
+    argParser.add_argument("--out", help="results as JSON lines (default: <inputs>.results.jsonl)")
+    argParser.add_argument("--workers", type=int, default=None, help="processes, 0 runs in this process")
+    argParser.add_argument("--library", help="IDF file with the Material objects the inputs refer to")
+    args = argParser.parse_args()
+
+    with open(args.inputs) as file:
+        inputSets = [json.loads(line) for line in file if line.strip()]
+    library = readLibrary(args.library) if args.library else None
+
+    start = time.perf_counter()
+    results = runMany(os.path.abspath(args.component), inputSets, args.workers, library)
+    seconds = time.perf_counter() - start
+
+    outPath = args.out or os.path.splitext(args.inputs)[0] + ".results.jsonl"
+    with open(outPath, "w") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+    failed = sum(1 for result in results if result["error"] or any(result["messages"]))
+    print("{} runs in {:.2f}s ({:.0f}/s), {} with errors or warnings -> {}".format(
+        len(results), seconds, len(results) / seconds, failed, outPath))
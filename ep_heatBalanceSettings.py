@@ -61,8 +61,11 @@ except: pass
 
 import scriptcontext as sc
 import Grasshopper.Kernel as gh
+import ep_idfWriter as idfWriter
+import ep_snippetCache
 
 w = gh.GH_RuntimeMessageLevel.Warning
+cache = ep_snippetCache.stickyCache(sc.sticky)
 
 # set the correct names when adding input
 
@@ -212,7 +215,7 @@ def setDefaults(surfConvAlgoInside_, surfConvAlgoOutside_, heatBalanceAlgorithm_
 def checkHBLB():
     # check if LB and HB are flying {1}
     if not sc.sticky.has_key('ladybug_release')and sc.sticky.has_key('honeybee_release'):
-        print "You should first let both Ladybug and Honeybee to fly..."
+        print("You should first let both Ladybug and Honeybee to fly...")
         ghenv.Component.AddRuntimeMessage(w, "You should first let both Ladybug and Honeybee to fly...")
         return -1
     # end check {1}
@@ -247,29 +250,43 @@ def checkHBLB():
 def main(surfConvAlgoInside_, surfConvAlgoOutside_, heatBalanceAlgorithm_, \
                 differenceScheme_, discretizationConst_, relaxationFactor_, insideFaceSurfTempConv_):
     
+    # unchanged settings give the previous output
+    key = cache.key("HeatBalanceSettings", surfConvAlgoInside_, surfConvAlgoOutside_, heatBalanceAlgorithm_, \
+                    differenceScheme_, discretizationConst_, relaxationFactor_, insideFaceSurfTempConv_)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
     #print heatBalanceAlgorithm_
-    phasechangeStr = ""
-    phasechangeStr += "SurfaceConvectionAlgorithm:Inside," + str(surfConvAlgoInside_) + ";\n" + "\n"
-    phasechangeStr += "SurfaceConvectionAlgorithm:Outside," + str(surfConvAlgoOutside_) + ";\n" + "\n"
-    phasechangeStr += "HeatBalanceAlgorithm," + str(heatBalanceAlgorithm_) + ";\n" + "\n"
-    phasechangeStr += "HeatBalanceSettings:ConductionFiniteDifference,\n"
-    phasechangeStr += str(differenceScheme_) + ",                   !- Difference Scheme\n"                    
-    phasechangeStr += str(discretizationConst_) + ",                   !- Space Discretization Constant\n"
-    phasechangeStr += str(relaxationFactor_) + ",                   !- Relaxation Factor\n"
-    phasechangeStr += str(insideFaceSurfTempConv_) + ";                   !- Inside Face Surface Temperature Convergence Criteria\n"
+    objects = [
+        idfWriter.idfObject("SurfaceConvectionAlgorithm:Inside", [surfConvAlgoInside_]),
+        idfWriter.idfObject("SurfaceConvectionAlgorithm:Outside", [surfConvAlgoOutside_]),
+        idfWriter.idfObject("HeatBalanceAlgorithm", [heatBalanceAlgorithm_]),
+        idfWriter.idfObject("HeatBalanceSettings:ConductionFiniteDifference", [
+            (differenceScheme_, "Difference Scheme"),
+            (discretizationConst_, "Space Discretization Constant"),
+            (relaxationFactor_, "Relaxation Factor"),
+            (insideFaceSurfTempConv_, "Inside Face Surface Temperature Convergence Criteria")],
+            commentIndent = "                   ")]
+    phasechangeStr = "\n\n".join(objects) + "\n"
     
             
-    return phasechangeStr
+    return cache.put(key, phasechangeStr)
     
     
 ## set default values
-checkData, surfConvAlgoInside_, surfConvAlgoOutside_, \
-heatBalanceAlgorithm_, differenceScheme_, discretizationConst_, \
-relaxationFactor_, insideFaceSurfTempConv_ = setDefaults(surfConvAlgoInside_, \
+settings = setDefaults(surfConvAlgoInside_, \
                                         surfConvAlgoOutside_, \
                                         heatBalanceAlgorithm_, differenceScheme_, \
                                         discretizationConst_, relaxationFactor_, \
                                         insideFaceSurfTempConv_)
+# setDefaults returns -1 for an invalid input (its warning is already shown)
+if settings == -1:
+    checkData = -1
+else:
+    checkData, surfConvAlgoInside_, surfConvAlgoOutside_, \
+    heatBalanceAlgorithm_, differenceScheme_, discretizationConst_, \
+    relaxationFactor_, insideFaceSurfTempConv_ = settings
 #checkHBLB = checkHBLB()  # not yet needed
 
 #print checkData, checkHBLB, checkTemperature, setInputNames
@@ -280,3 +297,4 @@ if checkData == True and checkData != -1:
                                         heatBalanceAlgorithm_, differenceScheme_, \
                                         discretizationConst_, relaxationFactor_, \
                                         insideFaceSurfTempConv_)
+    print(cache.summary())
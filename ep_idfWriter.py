@@ -0,0 +1,93 @@
+# Formats EnergyPlus IDF objects, one at a time or streamed to a file
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+An object is its class name and a list of fields, each a value or a (value, comment) pair:
+
+    idfObject("MaterialProperty:VariableThermalConductivity", [("GYPSUM", "Name"), (20.0, "Temperature 1 {C} "), ...])
+
+gives one field per line with its "!- comment", the last field ending with ";". An object without comments is
+written on one line, e.g. "HeatBalanceAlgorithm,ConductionFiniteDifference;". Values are written with str(),
+None as an empty field. Each object is built with one join, IdfWriter streams any number of them to a file.
+idfObjects reads the objects of IDF text back as lists of fields.
+Runs in IronPython 2.7 and CPython.
+"""
+
+
+def fieldValue(value):
+    return "" if value is None else str(value)
+
+
+def idfObject(className, fields, commentIndent="    "):
+    # the object's text, without a trailing newline
+    fields = [field if isinstance(field, tuple) else (field, None) for field in fields]
+    last = len(fields) - 1
+    if all(comment is None for value, comment in fields):
+        return className + "," + ",".join(fieldValue(value) for value, comment in fields) + ";"
+
+    lines = [className + ","]
+    for i, (value, comment) in enumerate(fields):
+        line = fieldValue(value) + (";" if i == last else ",")
+        if comment is not None:
+            line += commentIndent + "!- " + comment
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class IdfWriter(object):
+    # writes objects to an open file as they come, separated by a blank line
+
+    def __init__(self, file, commentIndent="    "):
+        self.file = file
+        self.commentIndent = commentIndent
+        self.count = 0
+
+    def write(self, className, fields):
+        self.writeText(idfObject(className, fields, self.commentIndent))
+
+    def writeText(self, text):
+        # an object that is already formatted, e.g. by idfObject
+        if self.count:
+            self.file.write("\n\n")
+        self.file.write(text)
+        self.count += 1
+
+    def close(self):
+        # the file ends with a newline, the file itself is left open
+        if self.count:
+            self.file.write("\n")
+
+
+def writeObjects(file, objects, commentIndent="    "):
+    # objects: iterable of (className, fields), e.g. a generator, nothing but the current object is held
+    writer = IdfWriter(file, commentIndent)
+    for className, fields in objects:
+        writer.write(className, fields)
+    writer.close()
+    return writer.count
+
+
+def idfObjects(text):
+    # the reverse: the objects of IDF text as lists of field strings, the class name first
+    text = "\n".join(line.split("!")[0] for line in text.replace("\r\n", "\n").split("\n"))
+    return [[field.strip() for field in body.split(",")] for body in text.split(";") if body.strip()]
@@ -0,0 +1,105 @@
+# Index of the materials the components resolve, kept in sc.sticky next to Honeybee's material library
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+The _name input of the material components is either the name of a material in sc.sticky["honeybee_materialLib"]
+or a full material definition, which Honeybee parses and adds to the library. MaterialIndex remembers every
+definition it added, by the hash of its text, with the parsed fields by name. A definition seen before is
+resolved with dict lookups instead of being parsed and added again, and a changed definition of the same
+material replaces the old entry. The index follows one library object and starts over when Honeybee creates
+a new one. Runs in IronPython 2.7 and CPython.
+"""
+
+import hashlib
+import re
+
+stickyKey = "honeybee_materialIndex"
+
+
+def definitionHash(definition):
+    lines = [line.strip() for line in definition.replace("\r\n", "\n").strip().split("\n")]
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def parseDefinition(definition):
+    # IDF object text -> list of its fields, the first is the object type and the second the name
+    text = "\n".join(line.split("!")[0] for line in definition.split("\n"))
+    return [field.strip() for field in re.split(r"[,;]", text.strip().rstrip(";"))]
+
+
+class MaterialIndex(object):
+
+    def __init__(self):
+        self.library = None
+        self.byName = {}            # material name -> parsed fields of the definition added under it
+        self.byDefinition = {}      # definition hash -> material name
+        self.hashOf = {}            # material name -> hash of its current definition
+
+    def follow(self, library):
+        # a new library object (Honeybee flew again) invalidates everything added to the old one
+        if library is not self.library:
+            self.library = library
+            self.byName.clear()
+            self.byDefinition.clear()
+            self.hashOf.clear()
+
+    def add(self, definition, name):
+        # record a definition added to the library under name, replacing an older definition of name
+        name = name.upper()
+        previous = self.hashOf.pop(name, None)
+        if previous is not None:
+            del self.byDefinition[previous]
+        key = definitionHash(definition)
+        self.byName[name] = parseDefinition(definition)
+        self.byDefinition[key] = name
+        self.hashOf[name] = key
+        return name
+
+    def lookup(self, name):
+        # the parsed fields of a definition added through the index, None for other materials
+        return self.byName.get(name.upper())
+
+    def resolve(self, nameOrDefinition, library, addToLib):
+        # the library name of the material, or None if it is not in the library. addToLib(definition) adds a
+        # full definition to the library and returns its name, it only runs for definitions not seen before
+        self.follow(library)
+        if nameOrDefinition is None:
+            return None
+        if len(nameOrDefinition.split("\n")) == 1:
+            name = nameOrDefinition.upper()
+            return name if name in library else None
+
+        name = self.byDefinition.get(definitionHash(nameOrDefinition))
+        if name is None or name not in library:
+            name = self.add(nameOrDefinition, addToLib(nameOrDefinition))
+        return name if name in library else None
+
+    def __len__(self):
+        return len(self.byName)
+
+
+def stickyIndex(sticky):
+    # the index shared by the components, created on first use
+    if stickyKey not in sticky:
+        sticky[stickyKey] = MaterialIndex()
+    return sticky[stickyKey]
@@ -0,0 +1,195 @@
+# Stores simulation outputs by the content of their inputs, so a run of an IDF + EPW combination that was
+# simulated before (in this or an earlier session) returns the stored outputs instead of simulating again.
+#
+# The key is a SHA-1 of the canonical IDF (objects without comments or formatting, class names, object names and
+# choices in upper case since EnergyPlus ignores their case, file paths as written, numbers as floats, objects in
+# sorted order), the SHA-1 of the EPW file and a simulator label. An entry is a directory <root>/<key[:2]>/<key>/
+# with the output files and meta.json (the run's result and size). The least recently used entries are removed
+# once the store is larger than maxBytes, down to 90% of it. Hits and misses are counted in <root>/stats.json.
+# usage: python ep_resultStore.py <root> [--max-mb N]   (prints the statistics, trims the store to N MB)
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+from ep_epwCache import fileHash
+from ep_idfWriter import idfObjects
+
+
+# classes whose text fields after the name can be file names, kept as written
+fileClasses = {"SCHEDULE:FILE", "SCHEDULE:FILE:SHADING", "CONSTRUCTION:WINDOWDATAFILE",
+               "EXTERNALINTERFACE:FUNCTIONALMOCKUPUNITIMPORT", "OUTPUTCONTROL:FILES"}
+
+# a path separator or a file extension: case matters on most file systems
+pathPattern = re.compile(r"[/\\]|\.[A-Za-z][A-Za-z0-9]{0,4}$")
+
+
+def canonicalField(field, keepCase=False):
+    try:
+        return repr(float(field))
+    except ValueError:
+        if keepCase or pathPattern.search(field):
+            return field
+        return field.upper()
+
+
+def canonicalIdf(text):
+    objects = []
+    for fields in idfObjects(text):
+        className = fields[0].upper()
+        fields = [className] + [canonicalField(field, className in fileClasses and i > 0)
+                                for i, field in enumerate(fields[1:])]
+        while len(fields) > 1 and fields[-1] == "":
+            fields.pop()
+        objects.append(",".join(fields))
+    return "\n".join(sorted(objects))
+
+
+class ResultStore(object):
+    evictTo = 0.9
+
+    def __init__(self, root, maxBytes=2 ** 30):
+        self.root = root
+        self.maxBytes = maxBytes
+        self.epwHashes = {}
+        # bytes in the store as this process last saw it, None until the first scan
+        self.total = None
+        os.makedirs(root, exist_ok=True)
+        self.statsPath = os.path.join(root, "stats.json")
+        self.counts = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        if os.path.exists(self.statsPath):
+            with open(self.statsPath) as file:
+                self.counts.update(json.load(file))
+
+    def epwHash(self, epwPath):
+        # hashed once per file version
+        stat = os.stat(epwPath)
+        version = (os.path.abspath(epwPath), stat.st_size, stat.st_mtime_ns)
+        if version not in self.epwHashes:
+            self.epwHashes[version] = fileHash(epwPath)
+        return self.epwHashes[version]
+
+    def key(self, idfText, epwPath, simulator=""):
+        sha = hashlib.sha1(canonicalIdf(idfText).encode("utf-8"))
+        sha.update(b"\0" + self.epwHash(epwPath).encode("ascii") + b"\0" + simulator.encode("utf-8"))
+        return sha.hexdigest()
+
+    def entryPath(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key, runDir=None):
+        # the stored result, or None. runDir: copy the stored output files there
+        metaPath = os.path.join(self.entryPath(key), "meta.json")
+        try:
+            with open(metaPath) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            self.counts["misses"] += 1
+            return None
+        self.counts["hits"] += 1
+        os.utime(metaPath)
+        if runDir:
+            os.makedirs(runDir, exist_ok=True)
+            for name in meta["files"]:
+                shutil.copyfile(os.path.join(self.entryPath(key), name), os.path.join(runDir, name))
+        return meta["result"]
+
+    def put(self, key, result, runDir, skip=("in.idf",)):
+        # stores the result and the output files of runDir. The store is only scanned and evicted down to
+        # maxBytes when the running total goes over it, not on every put
+        entry = self.entryPath(key)
+        tmp = entry + ".tmp{}".format(os.getpid())
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        files, size = [], 0
+        for name in sorted(os.listdir(runDir)):
+            path = os.path.join(runDir, name)
+            if name in skip or not os.path.isfile(path):
+                continue
+            shutil.copyfile(path, os.path.join(tmp, name))
+            files.append(name)
+            size += os.path.getsize(path)
+        with open(os.path.join(tmp, "meta.json"), "w") as file:
+            json.dump({"result": result, "files": files, "size": size, "stored": time.time()}, file)
+        replaced = self.entrySize(key)
+        if self.total is None:
+            self.total = sum(found[1] for found in self.entries())
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self.counts["stores"] += 1
+        self.total += size - replaced
+        if self.total > self.maxBytes:
+            # down to evictTo of maxBytes, so the next scan waits for that much new output. Other processes
+            # sharing the store add entries this one does not see, the scan catches up with them
+            self.evict(int(self.maxBytes * self.evictTo))
+
+    def entrySize(self, key):
+        try:
+            with open(os.path.join(self.entryPath(key), "meta.json")) as file:
+                return json.load(file)["size"]
+        except (OSError, ValueError):
+            return 0
+
+    def entries(self):
+        # (last used, size, key) of every entry
+        found = []
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for key in os.listdir(directory):
+                metaPath = os.path.join(directory, key, "meta.json")
+                if os.path.exists(metaPath):
+                    with open(metaPath) as file:
+                        size = json.load(file)["size"]
+                    found.append((os.path.getmtime(metaPath), size, key))
+        return found
+
+    def evict(self, maxBytes=None):
+        maxBytes = self.maxBytes if maxBytes is None else maxBytes
+        found = sorted(self.entries())
+        total = sum(size for used, size, key in found)
+        for used, size, key in found:
+            if total <= maxBytes:
+                break
+            shutil.rmtree(self.entryPath(key), ignore_errors=True)
+            total -= size
+            self.counts["evictions"] += 1
+        self.total = total
+        return total
+
+    def save(self):
+        tmp = self.statsPath + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.counts, file)
+        os.replace(tmp, self.statsPath)
+
+    def stats(self):
+        found = self.entries()
+        lookups = self.counts["hits"] + self.counts["misses"]
+        stats = dict(self.counts)
+        stats.update(entries=len(found), bytes=sum(size for used, size, key in found),
+                     hitRate=self.counts["hits"] / lookups if lookups else 0.0)
+        return stats
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Show and trim a simulation result store")
+    argParser.add_argument("root")
+    argParser.add_argument("--max-mb", type=float, help="remove the least recently used entries above this size")
+    args = argParser.parse_args()
+
+    if not os.path.isdir(args.root):
+        sys.exit("no result store at " + args.root)
+    store = ResultStore(args.root)
+    if args.max_mb is not None:
+        store.evict(int(args.max_mb * 2 ** 20))
+        store.save()
+    stats = store.stats()
+    print("{entries} entries, {mb:.1f} MB, {hits} hits / {misses} misses ({hitRate:.1%}), {stores} stored, "
+          "{evictions} evicted".format(mb=stats["bytes"] / 2 ** 20, **stats))
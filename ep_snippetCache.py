@@ -0,0 +1,97 @@
+# Cache of the IDF text the components return, kept in sc.sticky across Grasshopper solutions
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Every canvas change solves the components again, and with unchanged inputs they would rebuild the same text
+(and re-add the same material definition to the library). SnippetCache maps a hash of a component's
+normalised inputs to its previous output, keeps the most recently used maxEntries results and counts hits
+and misses. One cache is shared by all components through sc.sticky, see stickyCache.
+Runs in IronPython 2.7 and CPython.
+"""
+
+import collections
+import hashlib
+
+stickyKey = "honeybee_snippetCache"
+
+
+def normalized(value):
+    # inputs that give the same IDF text give the same value: numbers as floats, strings without surrounding
+    # whitespace and with one kind of line ending, lists as tuples
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalized(item) for item in value)
+    return str(value).replace("\r\n", "\n").strip()
+
+
+class SnippetCache(object):
+
+    def __init__(self, maxEntries=256):
+        self.maxEntries = maxEntries
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *inputs):
+        return hashlib.sha1(repr(normalized(inputs)).encode("utf-8")).hexdigest()
+
+    def get(self, key, isValid=None):
+        # the cached output, or None. isValid(output) can reject an output whose context changed, e.g. a
+        # material that is no longer in the library; that counts as a miss
+        if key in self.entries:
+            output = self.entries.pop(key)
+            if isValid is None or isValid(output):
+                # most recently used last
+                self.entries[key] = output
+                self.hits += 1
+                return output
+        self.misses += 1
+        return None
+
+    def put(self, key, output):
+        self.entries.pop(key, None)
+        self.entries[key] = output
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+        return output
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self):
+        return "snippet cache: " + str(self.hits) + " hits, " + str(self.misses) + " misses, " + \
+               str(len(self.entries)) + "/" + str(self.maxEntries) + " entries"
+
+
+def stickyCache(sticky, maxEntries=256):
+    # the cache shared by the components, created on first use
+    if stickyKey not in sticky:
+        sticky[stickyKey] = SnippetCache(maxEntries)
+    return sticky[stickyKey]
@@ -0,0 +1,120 @@
+# A local stand-in for the energyplus executable, for testing ep_condFDSweep.py without EnergyPlus.
+#
+# It takes the same arguments as energyplus (-w weather, -d output directory, the IDF last), reads the CondFD
+# settings, materials, constructions and Timestep of the IDF and sleeps for a run time that grows like a
+# ConductionFiniteDifference run: with the number of nodes (layer thickness / sqrt(C * alpha * dt)), the
+# time steps and the iterations the convergence criterion and relaxation factor call for. It then writes
+# eplusout.err like EnergyPlus and an hourly eplusout.csv with the outdoor temperature of the weather file
+# and a zone temperature that follows it more slowly the more thermal mass the constructions have.
+# CrankNicholsonSecondOrder with a relaxation factor of 1 and a space discretization constant of 3 or more
+# "diverges": a severe error and exit code 1.
+# usage: python ep_standinSimulator.py [-w in.epw] [-d outDir] [--time-scale 1.0] in.idf
+
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+
+from ep_idfWriter import idfObjects
+
+# seconds of simulated work per node, time step and iteration
+secondsPerUnit = 5e-8
+startupSeconds = 0.05
+
+
+def settingsOf(objects):
+    # {class name (lower case): fields of its last object}
+    return dict((fields[0].lower(), fields[1:]) for fields in objects)
+
+
+def layerNodes(objects, timestepsPerHour, constant):
+    # (nodes of every construction layer, thermal mass J/m2K of every construction)
+    materials = {}
+    for fields in objects:
+        if fields[0].lower() == "material" and len(fields) >= 7:
+            thickness, conductivity, density, specificHeat = [float(value) for value in fields[3:7]]
+            materials[fields[1].upper()] = (thickness, conductivity, density, specificHeat)
+    constructions = [fields[2:] for fields in objects if fields[0].lower() == "construction"] or \
+                    [[name] for name in materials]
+    dt = 3600.0 / timestepsPerHour
+    nodes, masses = [], []
+    for layers in constructions:
+        mass = 0.0
+        for name in layers:
+            if name.upper() not in materials:
+                continue
+            thickness, conductivity, density, specificHeat = materials[name.upper()]
+            dx = math.sqrt(constant * conductivity / (density * specificHeat) * dt)
+            nodes.append(max(1, int(math.ceil(thickness / dx))))
+            mass += thickness * density * specificHeat
+        masses.append(mass)
+    return nodes, masses
+
+
+def outdoorTemperatures(epwPath):
+    if not epwPath or not os.path.exists(epwPath):
+        return [20.0] * 8760
+    with open(epwPath, newline="") as file:
+        rows = list(csv.reader(file))[8:]
+    return [float(row[6]) for row in rows if len(row) > 6]
+
+
+def main(argv=None):
+    argParser = argparse.ArgumentParser(description="Stand-in for the energyplus executable")
+    argParser.add_argument("-w", "--weather")
+    argParser.add_argument("-d", "--output-directory", default=".")
+    argParser.add_argument("--time-scale", type=float, default=1.0, help="multiplies the simulated run time")
+    argParser.add_argument("idf")
+    args = argParser.parse_args(argv)
+
+    start = time.perf_counter()
+    with open(args.idf) as file:
+        objects = idfObjects(file.read())
+    settings = settingsOf(objects)
+    condFD = settings.get("heatbalancesettings:conductionfinitedifference", [])
+    scheme = condFD[0] if len(condFD) > 0 and condFD[0] else "FullyImplicitFirstOrder"
+    constant = float(condFD[1]) if len(condFD) > 1 and condFD[1] else 3.0
+    relaxation = float(condFD[2]) if len(condFD) > 2 and condFD[2] else 1.0
+    criterion = float(condFD[3]) if len(condFD) > 3 and condFD[3] else 0.002
+    timestepsPerHour = int(float(settings.get("timestep", ["6"])[0]))
+
+    outdoor = outdoorTemperatures(args.weather)
+    nodes, masses = layerNodes(objects, timestepsPerHour, constant)
+    iterations = (2 + math.log10(1e-2 / criterion)) / relaxation * (1.3 if scheme.startswith("Crank") else 1.0)
+    work = sum(nodes) * timestepsPerHour * len(outdoor) * iterations
+    time.sleep((startupSeconds + work * secondsPerUnit) * args.time_scale)
+
+    os.makedirs(args.output_directory, exist_ok=True)
+    errPath = os.path.join(args.output_directory, "eplusout.err")
+    diverged = scheme.startswith("Crank") and relaxation >= 1.0 and constant >= 3.0
+    with open(errPath, "w") as file:
+        file.write("Program Version,EnergyPlus stand-in\n")
+        if diverged:
+            file.write("   ** Severe  ** CondFD: solution diverged, try a smaller relaxation factor\n")
+            file.write("   **  Fatal  ** Program terminates\n")
+            file.write("   ************* EnergyPlus Terminated--Fatal Error Detected. 0 Warning; 1 Severe Errors; "
+                       "Elapsed Time={:.2f}sec\n".format(time.perf_counter() - start))
+            return 1
+        warnings = int(len(outdoor) / 1000 * max(0.0, relaxation - 0.5) * (2 if scheme.startswith("Crank") else 1))
+        for i in range(warnings):
+            file.write("   ** Warning ** CondFD: inside face surface temperature not converged\n")
+        file.write("   ************* EnergyPlus Completed Successfully-- {} Warning; 0 Severe Errors; "
+                   "Elapsed Time={:.2f}sec\n".format(warnings, time.perf_counter() - start))
+
+    # zone temperature: a first order response to the outdoor temperature, time constant from the thermal mass
+    tau = 2.0 + sum(masses) / 1e5
+    zone = outdoor[0]
+    with open(os.path.join(args.output_directory, "eplusout.csv"), "w", newline="") as file:
+        fileOut = csv.writer(file)
+        fileOut.writerow(["Date/Time", "Environment:Site Outdoor Air Drybulb Temperature [C](Hourly)",
+                          "ZONE:Zone Mean Air Temperature [C](Hourly)"])
+        for hour, temperature in enumerate(outdoor):
+            zone += (temperature - zone) / tau
+            fileOut.writerow([hour + 1, temperature, round(zone, 3)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Surrogate model of simulation results, for previews without simulating
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+A Surrogate answers "what would the simulation give for these inputs" from the runs that were simulated:
+ep_surrogateFit.py fits it to a sweep (ep_condFDSweep.py results.jsonl) or a PCM screening table
+(ep_condFDSolver.py screen.tsv) and saves it as JSON, this module loads and queries it in plain Python.
+
+The inputs (e.g. a PCM's peak temperature and latent heat, the CondFD settings) are standardised, a
+polynomial regression gives every output and the residuals of the nearest training runs, weighted by inverse
+distance, correct it, so a query at a training run returns what that run gave. Every prediction says how far
+the query is from the nearest training run (in standard deviations of the inputs, and relative to the typical
+spacing of the runs) and which inputs lie outside the trained range.
+Runs in IronPython 2.7 and CPython.
+"""
+
+import bisect
+import json
+import math
+
+stickyKey = "honeybee_surrogates"
+
+
+class Surrogate(object):
+
+    def __init__(self, model):
+        self.model = model
+        self.inputs = model["inputs"]
+        self.outputs = model["outputs"]
+        self.categories = model.get("categories", {})
+        self.mean = model["mean"]
+        self.scale = model["scale"]
+        self.low = model["low"]
+        self.high = model["high"]
+        self.terms = [tuple(term) for term in model["terms"]]
+        self.coefficients = model["coefficients"]
+        self.spacing = model["spacing"]
+        self.neighbours = model.get("neighbours", 4)
+        self.points = model["points"]
+        self.residuals = model["residuals"]
+        self.tree = self.build(list(range(len(self.points))))
+
+    def build(self, indices, leafSize=8):
+        # k-d tree of the training points: a leaf is (None, indices), a branch (axis, split, below, above),
+        # split along the axis the points spread most on
+        if len(indices) <= leafSize:
+            return (None, indices)
+        spreads = [max(self.points[i][axis] for i in indices) - min(self.points[i][axis] for i in indices)
+                   for axis in range(len(self.inputs))]
+        axis = spreads.index(max(spreads))
+        if spreads[axis] == 0:
+            return (None, indices)
+        indices = sorted(indices, key=lambda i: self.points[i][axis])
+        middle = self.points[indices[len(indices) // 2]][axis]
+        below = [i for i in indices if self.points[i][axis] < middle]
+        if not below:
+            below = [i for i in indices if self.points[i][axis] <= middle]
+        above = indices[len(below):]
+        # halfway between the two halves, so a query on one side is as far from the other as it can be
+        split = (self.points[below[-1]][axis] + self.points[above[0]][axis]) / 2.0
+        return (axis, split, self.build(below, leafSize), self.build(above, leafSize))
+
+    def encode(self, values):
+        # values: {input: value} or a list in input order -> standardised coordinates
+        if isinstance(values, dict):
+            missing = [name for name in self.inputs if name not in values]
+            if missing:
+                raise ValueError("no value for " + ", ".join(missing))
+            values = [values[name] for name in self.inputs]
+        coordinates = []
+        for name, value, mean, scale in zip(self.inputs, values, self.mean, self.scale):
+            if name in self.categories:
+                if value not in self.categories[name]:
+                    raise ValueError("{} is not one of {}".format(value, ", ".join(self.categories[name])))
+                value = self.categories[name].index(value)
+            coordinates.append((float(value) - mean) / scale)
+        return coordinates
+
+    def nearest(self, coordinates):
+        # [(squared distance, index)] of the nearest training points, closest first
+        best = []
+        worst = float("inf")
+        points = self.points
+        neighbours = self.neighbours
+        # every node with the squared distance from the query to its cell and the per axis offsets of that
+        stack = [(0.0, (0.0,) * len(coordinates), self.tree)]
+        while stack:
+            gap, offsets, node = stack.pop()
+            if gap >= worst:
+                continue
+            if node[0] is None:
+                for index in node[1]:
+                    distance = 0.0
+                    for a, b in zip(coordinates, points[index]):
+                        distance += (a - b) * (a - b)
+                    if distance < worst:
+                        bisect.insort(best, (distance, index))
+                        if len(best) >= neighbours:
+                            del best[neighbours:]
+                            worst = best[-1][0]
+                continue
+            axis, split, below, above = node
+            offset = coordinates[axis] - split
+            farGap = gap - offsets[axis] * offsets[axis] + offset * offset
+            farOffsets = offsets[:axis] + (offset,) + offsets[axis + 1:]
+            # the side of the query is searched first, the other one only if it can hold closer points
+            if offset < 0:
+                stack.append((farGap, farOffsets, above))
+                stack.append((gap, offsets, below))
+            else:
+                stack.append((farGap, farOffsets, below))
+                stack.append((gap, offsets, above))
+        return best
+
+    def predict(self, values):
+        # {"outputs": {output: value}, "distance": to the nearest training run, "relativeDistance": that
+        # over the typical spacing of the runs, "outside": the inputs outside the trained range}
+        coordinates = self.encode(values)
+        features = []
+        for term in self.terms:
+            feature = 1.0
+            for i in term:
+                feature *= coordinates[i]
+            features.append(feature)
+        predicted = [sum(feature * coefficient for feature, coefficient in zip(features, column))
+                     for column in self.coefficients]
+
+        near = self.nearest(coordinates)
+        if near and near[0][0] == 0.0:
+            weights = [(1.0, near[0][1])]
+        else:
+            weights = [(1.0 / distance, index) for distance, index in near]
+        total = sum(weight for weight, index in weights)
+        for weight, index in weights:
+            for j, residual in enumerate(self.residuals[index]):
+                predicted[j] += weight / total * residual
+
+        distance = math.sqrt(near[0][0]) if near else float("inf")
+        outside = [name for name, coordinate, low, high in zip(self.inputs, coordinates, self.low, self.high)
+                   if coordinate < low - 1e-9 or coordinate > high + 1e-9]
+        return {"outputs": dict(zip(self.outputs, predicted)), "distance": distance,
+                "relativeDistance": distance / self.spacing if self.spacing else distance, "outside": outside}
+
+
+def loadSurrogate(path):
+    with open(path) as file:
+        return Surrogate(json.load(file))
+
+
+def stickySurrogate(sticky, path, version=None):
+    # one loaded surrogate per model file in sc.sticky, loaded again when version (e.g. the file's
+    # modification time) changes
+    if stickyKey not in sticky:
+        sticky[stickyKey] = {}
+    loaded = sticky[stickyKey]
+    if path not in loaded or loaded[path][0] != version:
+        loaded[path] = (version, loadSurrogate(path))
+    return loaded[path][1]
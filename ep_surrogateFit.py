@@ -0,0 +1,187 @@
+# Fits an ep_surrogate.py model to stored runs: the successful runs of ep_condFDSweep.py (results.jsonl, the
+# CondFD settings -> run seconds, warnings and the means of the eplusout.csv columns) or the rows of a table
+# such as the screen.tsv of ep_condFDSolver.py (PCM peak temperature, latent heat, melting range and the
+# CondFD settings -> peak gain and loss and their reductions). Several files are fitted together.
+#
+# The inputs are standardised and every output gets a least squares polynomial (quadratic when there are at
+# least twice as many runs as terms, linear otherwise) whose residuals at the training runs are saved with
+# them, for the inverse distance correction of ep_surrogate.Surrogate. The printed errors are leave-one-out
+# errors: of the polynomial, and of the surrogate predicting each run from the others.
+# usage: python ep_surrogateFit.py <results.jsonl | table.tsv>... [--inputs a,b] [--outputs c,d] [--degree 2]
+#                                  [--neighbours 4] [--out surrogate.json] [--query name=value ...]
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from ep_condFDSettings import settingNames
+from ep_surrogate import Surrogate
+
+screenInputs = ["peakTemperature", "latentHeat", "meltRange"]
+
+
+def readRuns(path):
+    # one {column: value} per run, values as read (strings from tables)
+    if path.lower().endswith(".jsonl"):
+        runs = []
+        with open(path) as file:
+            for line in file:
+                result = json.loads(line)
+                if result.get("status") != "ok":
+                    continue
+                run = dict(result["point"])
+                run.update(seconds=result.get("seconds"), warnings=result.get("warnings"))
+                run.update(result.get("means", {}))
+                runs.append(run)
+        return runs
+    delimiter = "\t" if path.lower().endswith((".tsv", ".txt")) else ","
+    with open(path, newline="") as file:
+        return list(csv.DictReader(file, delimiter=delimiter))
+
+
+def isNumber(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def defaultColumns(runs):
+    # (inputs, outputs): the PCM parameters and CondFD settings that vary, and every other numeric column
+    columns = [name for name in runs[0] if all(name in run for run in runs)]
+    inputs = [name for name in screenInputs + settingNames if name in columns and
+              len(set(str(run[name]) for run in runs)) > 1]
+    outputs = [name for name in columns if name not in screenInputs + settingNames and name != "candidate" and
+               all(isNumber(run[name]) for run in runs)]
+    return inputs, outputs
+
+
+def polynomialTerms(numInputs, degree, varying):
+    # the products of inputs that make up the polynomial, () is the constant
+    terms = [()]
+    for order in range(1, degree + 1):
+        terms.extend(term for term in itertools.combinations_with_replacement(range(numInputs), order)
+                     if all(varying[i] for i in term))
+    return terms
+
+
+def featureMatrix(coordinates, terms):
+    return np.column_stack([np.prod(coordinates[:, list(term)], axis=1) if term else
+                            np.ones(len(coordinates)) for term in terms])
+
+
+def nearestNeighbours(points, count, exclude=False):
+    # (squared distances, indices) of the count nearest points of every point, in chunks of rows
+    distances, indices = [], []
+    for start in range(0, len(points), 512):
+        block = ((points[start:start + 512, None, :] - points[None, :, :]) ** 2).sum(-1)
+        if exclude:
+            block[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        nearest = np.argsort(block, axis=1)[:, :count]
+        indices.append(nearest)
+        distances.append(np.take_along_axis(block, nearest, 1))
+    return np.concatenate(distances), np.concatenate(indices)
+
+
+def fit(runs, inputs, outputs, degree=None, neighbours=4):
+    # the model dict of ep_surrogate.Surrogate and the leave-one-out RMSE of every output,
+    # {output: (polynomial, surrogate)}
+    usable = [run for run in runs if all(run.get(name) not in (None, "") for name in inputs) and
+              all(isNumber(run.get(name)) for name in outputs)]
+    if len(usable) < 2:
+        raise ValueError("{} usable runs, at least 2 are needed".format(len(usable)))
+    categories = {}
+    for name in inputs:
+        if not all(isNumber(run[name]) for run in usable):
+            categories[name] = sorted(set(str(run[name]) for run in usable))
+    X = np.array([[categories[name].index(str(run[name])) if name in categories else float(run[name])
+                   for name in inputs] for run in usable])
+    Y = np.array([[float(run[name]) for name in outputs] for run in usable])
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    varying = scale > 0
+    scale[~varying] = 1.0
+    Z = (X - mean) / scale
+    if degree is None:
+        degree = 2 if len(usable) >= 2 * len(polynomialTerms(len(inputs), 2, varying)) else 1
+    terms = polynomialTerms(len(inputs), degree, varying)
+    F = featureMatrix(Z, terms)
+    pseudoInverse = np.linalg.pinv(F)
+    coefficients = pseudoInverse @ Y
+    residuals = Y - F @ coefficients
+
+    # leave-one-out: the polynomial through the hat matrix, the surrogate from the other runs' residuals
+    leverage = np.einsum("ij,ji->i", F, pseudoInverse)
+    polynomialErrors = residuals / np.maximum(1 - leverage, 1e-9)[:, None]
+    neighbours = min(neighbours, len(usable) - 1)
+    distances, indices = nearestNeighbours(Z, neighbours, exclude=True)
+    weights = 1 / np.maximum(distances, 1e-300)
+    weights /= weights.sum(axis=1, keepdims=True)
+    surrogateErrors = residuals - (weights[:, :, None] * residuals[indices]).sum(axis=1)
+    errors = dict((name, (float(np.sqrt(np.mean(polynomialErrors[:, j] ** 2))),
+                          float(np.sqrt(np.mean(surrogateErrors[:, j] ** 2))))) for j, name in enumerate(outputs))
+
+    model = {"inputs": inputs, "outputs": outputs, "categories": categories, "mean": mean.tolist(),
+             "scale": scale.tolist(), "low": Z.min(axis=0).tolist(), "high": Z.max(axis=0).tolist(),
+             "terms": [list(term) for term in terms], "coefficients": coefficients.T.tolist(),
+             "points": Z.tolist(), "residuals": residuals.tolist(), "neighbours": neighbours,
+             "spacing": float(np.median(np.sqrt(distances[:, 0]))), "runs": len(usable)}
+    return model, errors
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Fit a surrogate model to simulation results")
+    argParser.add_argument("runs", nargs="+", help="sweep results.jsonl or tables (.csv, .tsv)")
+    argParser.add_argument("--inputs", help="comma separated, the varying PCM parameters and CondFD settings "
+                                            "by default")
+    argParser.add_argument("--outputs", help="comma separated, every other numeric column by default")
+    argParser.add_argument("--degree", type=int, help="of the polynomial, 1 or 2 depending on the runs by default")
+    argParser.add_argument("--neighbours", type=int, default=4, help="runs whose residuals correct a prediction")
+    argParser.add_argument("--out", default="surrogate.json")
+    argParser.add_argument("--query", nargs="*", help="name=value of every input, predicted with the new model")
+    args = argParser.parse_args()
+
+    runs = []
+    for path in args.runs:
+        runs.extend(readRuns(path))
+    if not runs:
+        sys.exit("no runs in " + ", ".join(args.runs))
+    inputs, outputs = defaultColumns(runs)
+    inputs = args.inputs.split(",") if args.inputs else inputs
+    outputs = args.outputs.split(",") if args.outputs else outputs
+    if not inputs or not outputs:
+        sys.exit("no inputs or outputs, give --inputs and --outputs")
+
+    model, errors = fit(runs, inputs, outputs, args.degree, args.neighbours)
+    with open(args.out, "w") as file:
+        json.dump(model, file)
+    print("{} runs, inputs {}, {} terms -> {}".format(model["runs"], ", ".join(inputs), len(model["terms"]),
+                                                      args.out))
+    for name in outputs:
+        print("  {:<40} leave-one-out RMSE {:.4g} (polynomial {:.4g})".format(name, errors[name][1],
+                                                                              errors[name][0]))
+
+    if args.query is not None:
+        values = dict(item.split("=", 1) for item in args.query)
+        values = dict((name, value if name in model["categories"] else float(value))
+                      for name, value in values.items())
+        surrogate = Surrogate(model)
+        prediction = surrogate.predict(values)
+        count = 10000
+        start = time.perf_counter()
+        for i in range(count):
+            surrogate.predict(values)
+        microseconds = (time.perf_counter() - start) / count * 1e6
+        for name in outputs:
+            print("  {} = {:.4g}".format(name, prediction["outputs"][name]))
+        print("distance to the nearest run {:.3f} ({:.1f} x the typical spacing){}, {:.0f} us per query".format(
+            prediction["distance"], prediction["relativeDistance"],
+            ", outside the trained range of " + ", ".join(prediction["outside"]) if prediction["outside"] else "",
+            microseconds))
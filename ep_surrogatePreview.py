@@ -0,0 +1,107 @@
+# This component previews simulation results with a surrogate model fitted to earlier runs
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Use this component to preview what a simulation would give for a PCM (peak temperature, latent heat, melting range) and CondFD settings, without simulating.
+The preview comes from a surrogate model fitted to earlier runs with ep_surrogateFit.py (a sweep's results.jsonl or the screen.tsv of ep_condFDSolver.py), it takes microseconds, so sliders can drive it.
+-
+The further the inputs are from the runs the model was fitted to, the less the preview can be trusted: check distance, and simulate inputs that lie outside the trained range.
+-
+Provided by Honeybee 0.0.60
+
+    Args:
+        _surrogate:         Path of the surrogate model JSON written by ep_surrogateFit.py
+        _inputNames:        Names of the model's inputs, e.g. peakTemperature, latentHeat, meltRange
+        _inputValues:       One value per input name, e.g. 25, 120000, 1.5. CondFD schemes are given by name, e.g. FullyImplicitFirstOrder
+    Returns:
+        outputs:            The predicted outputs as "name: value"
+        values:             The predicted values, in the order of outputs
+        distance:           Distance to the nearest run the model was fitted to, in standard deviations of the inputs
+        relativeDistance:   distance over the typical distance between the runs; above 2 the preview is mostly extrapolated
+"""
+
+from __future__ import print_function
+
+ghenv.Component.Name = "Honeybee_EnergyPlus Surrogate Preview"
+ghenv.Component.NickName = 'EPSurrogatePreview'
+ghenv.Component.Message = 'VER 0.0.60\nDEC_26_2016'
+ghenv.Component.IconDisplayMode = ghenv.Component.IconDisplayMode.application
+ghenv.Component.Category = "User"
+ghenv.Component.SubCategory = "06 | Energy | Material | Construction"
+#compatibleHBVersion = VER 0.0.56\nFEB_01_2015
+#compatibleLBVersion = VER 0.0.59\nFEB_01_2015
+try: ghenv.Component.AdditionalHelpFromDocStrings = "0"
+except: pass
+
+import os
+import scriptcontext as sc
+import Grasshopper.Kernel as gh
+import ep_surrogate
+
+w = gh.GH_RuntimeMessageLevel.Warning
+
+def checkInputs():
+    if _surrogate == None or not os.path.exists(_surrogate):
+        msg = "Connect the path of a surrogate model (ep_surrogateFit.py) to _surrogate."
+        print(msg)
+        ghenv.Component.AddRuntimeMessage(w, msg)
+        return -1
+    if len(_inputNames) != len(_inputValues):
+        msg = "Give one value in _inputValues for each name in _inputNames."
+        ghenv.Component.AddRuntimeMessage(w, msg)
+        return -1
+
+def main(path, names, values):
+    # the model is loaded once per version of the file, every later solution only queries it
+    surrogate = ep_surrogate.stickySurrogate(sc.sticky, path, os.path.getmtime(path))
+    inputs = {}
+    for name, value in zip(names, values):
+        if name not in surrogate.categories:
+            try: value = float(value)
+            except ValueError:
+                ghenv.Component.AddRuntimeMessage(w, str(name) + " needs a number, not " + str(value))
+                return -1
+        inputs[name] = value
+    try:
+        prediction = surrogate.predict(inputs)
+    except ValueError as e:
+        ghenv.Component.AddRuntimeMessage(w, str(e))
+        return -1
+
+    if prediction["outside"]:
+        msg = "Outside the range of the runs the model was fitted to: " + ", ".join(prediction["outside"]) + \
+            ". Simulate these inputs instead of trusting the preview."
+        ghenv.Component.AddRuntimeMessage(w, msg)
+    elif prediction["relativeDistance"] > 2:
+        msg = "Far from the runs the model was fitted to (" + "%.1f" % prediction["relativeDistance"] + \
+            " x their typical distance), the preview is uncertain."
+        ghenv.Component.AddRuntimeMessage(w, msg)
+
+    outputs = [name + ": " + "%.4g" % prediction["outputs"][name] for name in surrogate.outputs]
+    values = [prediction["outputs"][name] for name in surrogate.outputs]
+    return outputs, values, prediction["distance"], prediction["relativeDistance"]
+
+if checkInputs() != -1:
+    result = main(_surrogate, _inputNames, _inputValues)
+    if result != -1:
+        outputs, values, distance, relativeDistance = result
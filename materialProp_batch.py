@@ -0,0 +1,139 @@
+# Generates MaterialProperty:PhaseChange and MaterialProperty:VariableThermalConductivity objects for many
+# materials at once, from a table with one row per temperature - value pair:
+#
+#   name,kind,coeff,temperature,value
+#   PCM_A,PhaseChange,0.0,-20,-20000
+#   PCM_A,PhaseChange,0.0,22,33400
+#   ...
+#
+# kind (PhaseChange or VariableThermalConductivity, default PhaseChange) and coeff (default 0.0, phase change
+# only) are optional columns, the pairs of a material are taken in table order. All curves are validated
+# together as padded arrays, see checkCurves. Files ending in .tsv or .txt are read as tab separated.
+# usage: python materialProp_batch.py <table.csv> <out.idf> [--skip-invalid]
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+import ep_idfWriter as idfWriter
+import materialProp_core as core
+
+kinds = {}
+for kind in (core.phaseChange, core.variableThermalConductivity):
+    kinds[kind.className.lower()] = kind
+    kinds[kind.className.split(":")[1].lower()] = kind
+
+
+def readTable(path):
+    # returns (curves, coeffs), one PropertyCurve and temperature coefficient per (name, kind) in the table
+    delimiter = "\t" if path.lower().endswith((".tsv", ".txt")) else ","
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file, delimiter=delimiter))
+    if rows:
+        missing = [column for column in ("name", "temperature", "value") if column not in rows[0]]
+        if missing:
+            raise ValueError("{} has no {} column".format(path, ", ".join(missing)))
+
+    curves, coeffs, index = [], [], {}
+    for line, row in enumerate(rows, 2):
+        kindName = (row.get("kind") or "PhaseChange").strip().lower()
+        if kindName not in kinds:
+            raise ValueError("{}:{}: unknown kind '{}'".format(path, line, row.get("kind")))
+        key = (row["name"].strip(), kinds[kindName])
+        if key not in index:
+            index[key] = len(curves)
+            curves.append(core.PropertyCurve(key[1], key[0], [], []))
+            coeffs.append(core.toFloat(row.get("coeff") or 0.0))
+        curve = curves[index[key]]
+        curve.temperatures.append(core.toFloat(row["temperature"]))
+        curve.values.append(core.toFloat(row["value"]))
+    return curves, coeffs
+
+
+def padded(lists, width):
+    # lists of floats (None for missing) -> (len(lists), width) array, NaN for missing and padding
+    table = np.full((len(lists), width), np.nan)
+    for i, values in enumerate(lists):
+        table[i, :len(values)] = [np.nan if value is None else value for value in values]
+    return table
+
+
+def checkCurves(curves):
+    # the messages of core.checkCurve plus the pair limit and, for phase change curves, the "no negative
+    # slopes" rule of the enthalpy function, for all curves in a few array operations.
+    # Returns one list of messages per curve
+    counts = np.array([len(curve) for curve in curves], dtype=np.int64)
+    width = int(counts.max()) if len(curves) else 0
+    temperatures = padded([curve.temperatures for curve in curves], width)
+    values = padded([curve.values for curve in curves], width)
+    limits = np.array([curve.kind.maxPairs for curve in curves], dtype=np.int64)
+    isPhaseChange = np.array([curve.kind is core.phaseChange for curve in curves], dtype=bool)
+
+    present = np.arange(width) < counts[:, None]
+    badTemperature = present & np.isnan(temperatures)
+    badValue = present & np.isnan(values)
+    belowZero = present & (temperatures < core.absoluteZero)
+    with np.errstate(invalid="ignore"):
+        stepT = np.diff(temperatures, axis=1)
+        stepV = np.diff(values, axis=1)
+    known = present[:, 1:] & ~np.isnan(stepT)
+    notIncreasing = known & (stepT <= 0)
+    # the slope is stepV / stepT, where the temperatures don't increase that is already reported above
+    negativeSlope = known & (stepT > 0) & ~np.isnan(stepV) & (stepV < 0) & isPhaseChange[:, None]
+
+    messages = [[] for curve in curves]
+    for i in np.flatnonzero(counts == 0):
+        messages[i].append("no temperature - value pairs")
+    for i in np.flatnonzero(counts > limits):
+        messages[i].append("{} pairs, EnergyPlus allows at most {} for {}".format(
+            counts[i], limits[i], curves[i].kind.className))
+    for i, j in zip(*np.nonzero(badTemperature)):
+        messages[i].append("temperature {} is not a number".format(j + 1))
+    for i, j in zip(*np.nonzero(badValue)):
+        messages[i].append("{} {} is not a number".format(curves[i].kind.valueName, j + 1))
+    for i, j in zip(*np.nonzero(belowZero)):
+        messages[i].append("temperature {} is below absolute zero".format(j + 1))
+    for i, j in zip(*np.nonzero(notIncreasing)):
+        messages[i].append("temperature {} ({}) is not higher than temperature {} ({})".format(
+            j + 2, temperatures[i, j + 1], j + 1, temperatures[i, j]))
+    for i, j in zip(*np.nonzero(negativeSlope)):
+        messages[i].append("enthalpy decreases between temperature {} and {}".format(j + 1, j + 2))
+    return messages
+
+
+def writeIdf(path, curves, coeffs):
+    # the objects are streamed to the file one at a time, separated by a blank line
+    with open(path, "w") as file:
+        return idfWriter.writeObjects(file, ((curve.kind.className, core.idfFields(curve, curve.name, coeff))
+                                             for curve, coeff in zip(curves, coeffs)))
+
+
+def main(argv=None):
+    argParser = argparse.ArgumentParser(description="Write the IDF objects of a table of material property curves")
+    argParser.add_argument("table")
+    argParser.add_argument("idf")
+    argParser.add_argument("--skip-invalid", action="store_true",
+                           help="write the valid curves instead of writing nothing when any curve is invalid")
+    args = argParser.parse_args(argv)
+
+    curves, coeffs = readTable(args.table)
+    messages = checkCurves(curves)
+    invalid = [i for i, curveMessages in enumerate(messages) if curveMessages]
+    for i in invalid:
+        for message in messages[i]:
+            print("{} ({}): {}".format(curves[i].name, curves[i].kind.className, message))
+    if invalid and not args.skip_invalid:
+        print("{} of {} curves are invalid, nothing written".format(len(invalid), len(curves)))
+        return 1
+
+    bad = set(invalid)
+    keep = [i for i in range(len(curves)) if i not in bad]
+    numWritten = writeIdf(args.idf, [curves[i] for i in keep], [coeffs[i] for i in keep])
+    print("{} objects -> {} ({} invalid skipped)".format(numWritten, args.idf, len(invalid)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# Shared logic of the MaterialPropertyPhaseChange and MaterialProperty_VariableThermalConductivity components
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2016, Michael Spencer Quinto <spencer.michael.q@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Grasshopper-free core of the tabular material property components: a PropertyCurve of temperature - value
+pairs, collecting the component inputs into one in a single pass, validating it and writing its IDF object.
+Runs in IronPython 2.7 (inside Grasshopper) and in CPython, so it can be imported and tested outside Rhino.
+"""
+
+import ep_idfWriter as idfWriter
+
+absoluteZero = -273.15
+
+
+class CurveKind(object):
+    # what differs between the tabular material property objects
+
+    def __init__(self, className, valueInput, valueName, valueUnits, maxPairs, firstPairInput, pairName):
+        self.className = className              # EnergyPlus object
+        self.valueInput = valueInput            # input name prefix of the values, e.g. _enthalpy
+        self.valueName = valueName              # field name in the IDF comments
+        self.valueUnits = valueUnits
+        self.maxPairs = maxPairs                # EnergyPlus limit
+        self.firstPairInput = firstPairInput    # index of the _temp1 input
+        self.pairName = pairName                # used in messages, e.g. temperature-enthalpy
+
+
+phaseChange = CurveKind("MaterialProperty:PhaseChange", "_enthalpy", "Enthalpy", "J/kg", 16, 2,
+                        "temperature-enthalpy")
+variableThermalConductivity = CurveKind("MaterialProperty:VariableThermalConductivity", "_thermalCond",
+                                        "Thermal Conductivity", "W/m-K", 10, 1, "temperature-thermCond")
+
+
+class PropertyCurve(object):
+    """
+    Tabular temperature - value function of a material.
+        name:           name of the EPMaterial the curve belongs to
+        temperatures:   list of floats (C)
+        values:         list of floats, enthalpy (J/kg) or thermal conductivity (W/m-K), one per temperature
+    """
+    __slots__ = ("kind", "name", "temperatures", "values")
+
+    def __init__(self, kind, name, temperatures, values):
+        self.kind = kind
+        self.name = name
+        self.temperatures = temperatures
+        self.values = values
+
+    def __len__(self):
+        return len(self.temperatures)
+
+    def pairs(self):
+        return zip(self.temperatures, self.values)
+
+
+def inputName(kind, inputIndex):
+    # name of a pair input, e.g. 2 -> _temp1 for phaseChange
+    pair = (inputIndex - kind.firstPairInput) // 2 + 1
+    if (inputIndex - kind.firstPairInput) % 2 == 0:
+        return "_temp" + str(pair)
+    return kind.valueInput + str(pair)
+
+
+def checkInputCount(kind, numInputs):
+    # returns (error, warning): too many pairs is an error, a temperature without its value a warning
+    error = warning = None
+    numPairInputs = numInputs - kind.firstPairInput
+    if numPairInputs > 2 * kind.maxPairs:
+        error = "The maximum number of " + kind.pairName + " pair values in EnergyPlus " + \
+                "is " + str(kind.maxPairs) + ", please limit the pairs to " + str(kind.maxPairs) + "."
+    if numPairInputs % 2 != 0:
+        warning = "Each Temperature value must have its corresponding " + kind.valueName + " value"
+    return error, warning
+
+
+def toFloat(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def collectInputs(kind, nickNames, scope, name=None):
+    # one pass over the component inputs: nickNames in input order, scope is where Grasshopper puts the
+    # input values (the component's globals). Unset or non-numeric inputs are None
+    temperatures, values = [], []
+    for inputIndex in range(kind.firstPairInput, len(nickNames)):
+        value = toFloat(scope.get(nickNames[inputIndex]))
+        if (inputIndex - kind.firstPairInput) % 2 == 0:
+            temperatures.append(value)
+        else:
+            values.append(value)
+    # a temperature without its value is left out, checkInputCount warns about it
+    temperatures = temperatures[:len(values)]
+    return PropertyCurve(kind, name, temperatures, values)
+
+
+def checkCurve(curve):
+    # messages for everything wrong with the curve, in one pass over the pairs
+    kind = curve.kind
+    messages = []
+    previous = None
+    for pair, temperature in enumerate(curve.temperatures):
+        if temperature is None:
+            messages.append("Provide a number for '_temp" + str(pair + 1) + "'")
+        if curve.values[pair] is None:
+            messages.append("Provide a number for '" + kind.valueInput + str(pair + 1) + "'")
+        if temperature is None:
+            continue
+        if temperature < absoluteZero:
+            messages.append("The values for temperature can't be lower than absolute zero " + \
+                            "(i.e. -273.15 degrees celcius)!")
+        if previous is not None and temperature < previous:
+            messages.append("The temperature for '_temp" + str(pair + 1) + "' can't be lower than then " + \
+                            "temperature input for '_temp" + str(pair) + "'")
+        previous = temperature
+    return messages
+
+
+def idfFields(curve, materialName, coeff=None):
+    # the (value, comment) fields of the curve's EnergyPlus object, coeff is the temperature coefficient of a
+    # phaseChange curve
+    kind = curve.kind
+    fields = [(materialName.upper(), "Name")]
+    if kind is phaseChange:
+        fields.append((coeff, "Temperature Coefficient for Thermal Conductivity {W/m-K2} "))
+    for pair in range(len(curve)):
+        fields.append((curve.temperatures[pair], "Temperature " + str(pair + 1) + " {C} "))
+        fields.append((curve.values[pair], kind.valueName + " " + str(pair + 1) + " {" + kind.valueUnits + "} "))
+    return fields
+
+
+def idfString(curve, materialName, coeff=None):
+    # the EnergyPlus object of the curve
+    return idfWriter.idfObject(curve.kind.className, idfFields(curve, materialName, coeff))
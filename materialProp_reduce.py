@@ -0,0 +1,162 @@
+# Reduces dense temperature - value curves (e.g. measured DSC enthalpy curves with thousands of points) to the
+# number of pairs EnergyPlus accepts: 16 for MaterialProperty:PhaseChange, 10 for
+# MaterialProperty:VariableThermalConductivity.
+#
+# The knots are chosen among the measured points by dynamic programming, minimising the summed squared error
+# of the piecewise linear curve through them at every measured point. As the knots lie on the data, a
+# monotone curve stays monotone and the heat stored between any two knots (the enthalpy difference, latent
+# heat included) is the measured one. To stay fast on dense curves the knots are searched among
+# `candidates` points spread evenly along the curve's length (which puts them where the curve bends or
+# rises steeply); the error of every candidate segment is still measured against all points in between,
+# from prefix sums. Many curves are solved together.
+# usage: python materialProp_reduce.py <dense.csv> <reduced.csv>   (tables as read by materialProp_batch.py)
+
+import collections
+import csv
+import sys
+
+import numpy as np
+
+import materialProp_core as core
+from materialProp_batch import readTable
+
+# temperatures and values of the reduced curve, with its errors at the measured points (in value units) and
+# the relative change of the total stored heat (only non-zero when a noisy curve was made monotone first)
+Reduction = collections.namedtuple("Reduction", ["temperatures", "values", "rmsError", "maxError", "heatError"])
+
+
+def prepare(temperatures, values):
+    # sorted, finite, one value per temperature (the mean of repeated temperatures)
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    keep = np.isfinite(temperatures) & np.isfinite(values)
+    if keep.all() and np.all(np.diff(temperatures) > 0):
+        return temperatures, values
+    temperatures, inverse = np.unique(temperatures[keep], return_inverse=True)
+    return temperatures, np.bincount(inverse, values[keep]) / np.bincount(inverse)
+
+
+def makeMonotone(values):
+    # a noisy curve replaced by the mean of its running maximum and its running minimum from the other end,
+    # which never decreases
+    if not np.any(np.diff(values) < 0):
+        return values
+    return (np.maximum.accumulate(values) + np.minimum.accumulate(values[::-1])[::-1]) / 2
+
+
+def candidatePoints(x, y, candidates):
+    # indexes of up to `candidates` points, evenly spaced along the length of the normalised curve
+    if len(x) <= candidates:
+        return np.arange(len(x))
+    length = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    picked = np.searchsorted(length, np.linspace(0.0, length[-1], candidates))
+    return np.unique(np.concatenate(([0], np.minimum(picked, len(x) - 1), [len(x) - 1])))
+
+
+def segmentCosts(x, y, points, width):
+    # (width, width) summed squared error of the chord from candidate a to candidate b over the measured
+    # points between them, inf where b <= a or past the candidates
+    sums = np.zeros((6, len(x) + 1))
+    np.cumsum([np.ones_like(x), x, y, x * x, x * y, y * y], axis=1, out=sums[:, 1:])
+    a, b = points[:, None], points[None, :]
+    n, sx, sy, sxx, sxy, syy = sums[:, b + 1] - sums[:, a]
+    xa, ya = x[a], y[a]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (y[b] - ya) / (x[b] - xa)
+        uu = sxx - 2 * xa * sx + n * xa * xa
+        rr = syy - 2 * ya * sy + n * ya * ya
+        ru = sxy - xa * sy - ya * sx + n * xa * ya
+        error = np.maximum(rr - 2 * slope * ru + slope * slope * uu, 0.0)
+    costs = np.full((width, width), np.inf)
+    size = len(points)
+    costs[:size, :size] = np.where(b > a, error, np.inf)
+    return costs
+
+
+def reduceCurves(curves, numPairs, candidates=64, monotone=False, chunk=256):
+    # curves: list of (temperatures, values). Returns a Reduction per curve with at most numPairs knots.
+    # The curves are solved `chunk` at a time
+    measured = [prepare(t, v) for t, v in curves]
+    prepared = [(x, makeMonotone(y)) if monotone else (x, y) for x, y in measured]
+    scaled, pointLists = [], []
+    for x, y in prepared:
+        # the error is minimised in normalised units, which leaves the optimal knots unchanged
+        xSpan = (x[-1] - x[0]) or 1.0
+        ySpan = (y.max() - y.min()) or 1.0
+        xs, ys = (x - x[0]) / xSpan, (y - y.min()) / ySpan
+        scaled.append((xs, ys))
+        pointLists.append(candidatePoints(xs, ys, candidates))
+
+    width = max(len(points) for points in pointLists)
+    reductions = []
+    for first in range(0, len(curves), chunk):
+        part = range(first, min(first + chunk, len(curves)))
+        # costs[c, b, a]: error of the segment ending at candidate b that starts at a, the minimum over a
+        # is then taken along the contiguous last axis
+        costs = np.stack([segmentCosts(scaled[c][0], scaled[c][1], pointLists[c], width).T for c in part])
+        previous = knotsBefore(costs, max(numPairs - 1, 1))
+        for i, c in enumerate(part):
+            reductions.append(toReduction(measured[c], prepared[c], pointLists[c], previous[:, i]))
+    return reductions
+
+
+def knotsBefore(costs, numSegments):
+    # previous[k, c, b]: the candidate before b on the least error path of curve c from its first candidate to
+    # b in k segments
+    best = np.full(costs.shape[:2], np.inf)
+    best[:, 0] = 0.0
+    previous = np.zeros((numSegments + 1,) + costs.shape[:2], dtype=np.int64)
+    for k in range(1, numSegments + 1):
+        total = best[:, None, :] + costs
+        previous[k] = np.argmin(total, axis=2)
+        best = np.take_along_axis(total, previous[k][:, :, None], axis=2)[:, :, 0]
+    return previous
+
+
+def toReduction(measured, prepared, points, previous):
+    # the Reduction of one curve from its knotsBefore table
+    x, y = prepared
+    measuredY = measured[1]
+    last = len(points) - 1
+    knots = [last]
+    for k in range(min(len(previous) - 1, last), 0, -1):
+        knots.append(previous[k, knots[-1]])
+    knots = points[knots[::-1]]
+    temperatures, values = x[knots], y[knots]
+    residual = np.interp(x, temperatures, values) - measuredY
+    rawHeat = measuredY[-1] - measuredY[0]
+    heatError = (values[-1] - values[0] - rawHeat) / rawHeat if rawHeat else 0.0
+    return Reduction(temperatures, values, float(np.sqrt(np.mean(residual * residual))),
+                     float(np.abs(residual).max()), float(heatError))
+
+
+def reduceCurve(curve, candidates=64):
+    # a materialProp_core.PropertyCurve with no more pairs than EnergyPlus accepts for its kind, and the Reduction.
+    # Enthalpy curves are made monotone first
+    reduction = reduceCurves([(curve.temperatures, curve.values)], curve.kind.maxPairs, candidates,
+                             monotone=curve.kind is core.phaseChange)[0]
+    reduced = core.PropertyCurve(curve.kind, curve.name, reduction.temperatures.tolist(), reduction.values.tolist())
+    return reduced, reduction
+
+
+if __name__ == "__main__":
+    curves, coeffs = readTable(sys.argv[1])
+    rows = []
+    for kind in (core.phaseChange, core.variableThermalConductivity):
+        ofKind = [i for i, curve in enumerate(curves) if curve.kind is kind]
+        if not ofKind:
+            continue
+        reductions = reduceCurves([(curves[i].temperatures, curves[i].values) for i in ofKind], kind.maxPairs,
+                                  monotone=kind is core.phaseChange)
+        for i, reduction in zip(ofKind, reductions):
+            print("{:<24} {:>6} -> {:>2} pairs  rms {:.4g}  max {:.4g}  heat {:+.2%}".format(
+                curves[i].name, len(curves[i]), len(reduction.values), reduction.rmsError, reduction.maxError,
+                reduction.heatError))
+            kindName = kind.className.split(":")[1]
+            rows += [[curves[i].name, kindName, coeffs[i], round(float(t), 6), round(float(v), 6)]
+                     for t, v in zip(reduction.temperatures, reduction.values)]
+
+    with open(sys.argv[2], "w", newline="") as file:
+        fileOut = csv.writer(file)
+        fileOut.writerow(["name", "kind", "coeff", "temperature", "value"])
+        fileOut.writerows(rows)
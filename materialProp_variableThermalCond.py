@@ -54,6 +54,8 @@ Provided by Honeybee 0.0.60
 
 """
 
+from __future__ import print_function
+
 ghenv.Component.Name = "Honeybee_EnergyPlus MaterialProperty_VariableThermalConductivity"
 ghenv.Component.NickName = 'EPVariableThermalConductivity'
 ghenv.Component.Message = 'VER 0.0.60\nDEC_26_2016'
@@ -67,98 +69,53 @@ except: pass
 
 import scriptcontext as sc
 import Grasshopper.Kernel as gh
-from math import ceil
+import materialProp_core as core
+import ep_materialIndex
+import ep_snippetCache
 
 w = gh.GH_RuntimeMessageLevel.Warning
+cache = ep_snippetCache.stickyCache(sc.sticky)
+materialIndex = ep_materialIndex.stickyIndex(sc.sticky)
+kind = core.variableThermalConductivity
 
 # set the correct names when adding input
 def setInputNames():
-    numInputs = ghenv.Component.Params.Input.Count
+    inputs = ghenv.Component.Params.Input
+    numInputs = inputs.Count
     
-    for input in range(numInputs):
-        if input == 0: 
-            inputName = '_name'
-            
-        #temp starts at 1 (odd), thermal cond starts at 2 (even)
-        elif (input%2 != 0 and input != 0):
-            inputStr = int(ceil(input / 2))
-            inputName = '_temp' + str(inputStr)
-            ghenv.Component.Params.Input[input].NickName = inputName
-            ghenv.Component.Params.Input[input].Name = inputName
-            
-        elif (input%2 == 0 and input != 0):
-            inputStr = int(ceil(input / 2))
-            inputName = '_thermalCond' + str(inputStr)
-            ghenv.Component.Params.Input[input].NickName = inputName
-            ghenv.Component.Params.Input[input].Name = inputName
-            
-        else: pass
+    for input in range(kind.firstPairInput, numInputs):
+        inputName = core.inputName(kind, input)
+        inputs[input].NickName = inputName
+        inputs[input].Name = inputName
         
-    if (numInputs+1) > 22:
-        err = "The maximum number of temperature-thermCond pair values in EnergyPlus" + \
-              "is 10, please limit the pairs to 10."
+    err, warning = core.checkInputCount(kind, numInputs)
+    if err:
         raise ValueError(err)
         return -1
     
     #check that there is an odd number of inputs 
     #(i.e. to make sure that each temp value has a corresponding Thermal Conductivity and V.V.
-    if (numInputs%2 == 0):
-        err = "Each Temperature value must have its corresponding Thermal Conductivity value"
-        ghenv.Component.AddRuntimeMessage(w, err)
+    if warning:
+        ghenv.Component.AddRuntimeMessage(w, warning)
         return -1
 
-def checkTemperature():
+def checkTemperature(curve):
     #check to see that the temperature does not go below absolute zero
     
     #Also check that the temperature value for the the next temperature input must not be
     #lower than the previous input
-    
-    for tempInput in range(ghenv.Component.Params.Input.Count):
-        #print tempInput
-        if tempInput == 0: pass #skip _name
-        
-        elif tempInput%2 == 0: pass #skip even-numberes (i.e. thermalCond) inputs from checking
-        
-        elif tempInput > 0 and tempInput%2 != 0: #check only temperature inputs
-            #print tempInput
-            layerName = ghenv.Component.Params.Input[tempInput].NickName
-            exec('tempValue = ' + layerName)
-            
-            #absZero
-            if tempValue < -273.15:
-                msg = "The values for temperature can't be lower than absolute zero (i.e. -273.15 degrees celcius)!"
-                ghenv.Component.AddRuntimeMessage(w, msg)
-                return -1
-                
-            #check that current temp input must not be lower than previous
-            if tempInput == 1:
-                # if the the input is _temp1, we can't compare it to the previous temperature, hence this code
-                # i.e. if input is temp1, the current tempvalue will be the same as the previous
-                layerName2 = ghenv.Component.Params.Input[tempInput].NickName
-                exec('tempValuePrev = ' + layerName2)
-            
-            else:
-                layerName2 = ghenv.Component.Params.Input[tempInput - 2].NickName
-                exec('tempValuePrev = ' + layerName2)
-            
-            if tempValue >= tempValuePrev: pass
-            
-            elif tempValue < tempValuePrev:
-                currentInput = ghenv.Component.Params.Input[tempInput].Name
-                prevInput = ghenv.Component.Params.Input[tempInput - 2].Name
-                #print currentInput, prevInput
-                msg = "The temperature for '" + str(currentInput) + "' can't be lower than then temperature input for '" + str(prevInput) + "'"
-                ghenv.Component.AddRuntimeMessage(w, msg)
-                return -1
-        else:
-            pass
+    messages = core.checkCurve(curve)
+    for msg in messages:
+        ghenv.Component.AddRuntimeMessage(w, msg)
+    if messages:
+        return -1
 
 def setDefaults():
     #Check if there is a _name input.
     checkData = True
     if _name == None:
         checkData = False
-        print "Connect an existing EPMaterial into _name."
+        print("Connect an existing EPMaterial into _name.")
         msg = "Connect an existing EPMaterial into _name."
         ghenv.Component.AddRuntimeMessage(w, msg)
         materialName = None
@@ -169,7 +126,7 @@ def setDefaults():
 def checkHBLB():
     # check if LB and HB are flying {1}
     if not sc.sticky.has_key('ladybug_release')and sc.sticky.has_key('honeybee_release'):
-        print "You should first let both Ladybug and Honeybee to fly..."
+        print("You should first let both Ladybug and Honeybee to fly...")
         ghenv.Component.AddRuntimeMessage(w, "You should first let both Ladybug and Honeybee to fly...")
         return -1
     # end check {1}
@@ -200,79 +157,52 @@ def checkHBLB():
         
     # end check {2}
     
-def main(name):
-    
+def addToLib(definition):
     hb_EPMaterialAUX = sc.sticky["honeybee_EPMaterialAUX"]()
+    added, materialName = hb_EPMaterialAUX.addEPConstructionToLib(definition, overwrite = True)
+    return materialName
     
-    materialNames = []
-    phasechangeStr = "MaterialProperty:VariableThermalConductivity,\n" + name.upper() +  ",    !- Name\n"
+def main(name, curve):
     
-    for inputCount in range(ghenv.Component.Params.Input.Count):
-        
-        ### {}{}zeroth input = the name of the EPMaterial, check if the Material exists
-        if inputCount == 0:
-            layerName = ghenv.Component.Params.Input[inputCount].NickName
-            exec('materialName = ' + layerName)
-            
-            if materialName != None and len(materialName.split("\n")) == 1:
-                materialName = materialName.upper()
-                
-            elif materialName != None:
-                added, materialName = hb_EPMaterialAUX.addEPConstructionToLib(materialName, overwrite = True)
-                materialName = materialName.upper()
-                
-            # double check that everything is fine
-            if materialName in sc.sticky ["honeybee_materialLib"].keys():
-                pass
-                
-            ######## does E+ allow window materials to be PCMs??? (PROBABLY NOT YET)???? #########
-            #elif materialName  in sc.sticky ["honeybee_windowMaterialLib"].keys():
-            #    pass
-            ########
-            
-            else:
-                msg = str(materialName) + " is not a valid material name/definition.\n" + \
-                    "Create the material first and try again."
-                ghenv.Component.AddRuntimeMessage(w, msg)
-                return
-        ### {}{}
-                
-        #Concatenante strings for temp values #temp is odd
-        # the above if -> '''if inputCount == 0:'''
-        elif (inputCount%2 != 0 and inputCount != 0 and inputCount != ghenv.Component.Params.Input.Count - 1):
-            layerName = ghenv.Component.Params.Input[inputCount].NickName
-            exec('tempValue = ' + layerName)
-            phasechangeStr += str(tempValue) + ",    !- Temperature " +  str(int(ceil(inputCount / 2))) + " {C} " + "\n"
-        
-        #thermalCond is even
-        #thermalCond, except the last thermalCond value
-        elif (inputCount%2 == 0 and inputCount != 0 and inputCount != ghenv.Component.Params.Input.Count - 1):
-            layerName = ghenv.Component.Params.Input[inputCount].NickName
-            exec('thermCondValue = ' + layerName)
-            phasechangeStr += str(thermCondValue) + ",    !- Thermal Conductivity " +  str(int(ceil(inputCount / 2))) + " {W/m-K} " + "\n"
+    # unchanged inputs and material library give the previous output, without adding the material again
+    materialLib = sc.sticky["honeybee_materialLib"]
+    key = cache.key(kind.className, name, curve.temperatures, curve.values, id(materialLib))
+    cached = cache.get(key, lambda output: output[0] in materialLib)
+    if cached is not None:
+        return cached[1]
+    
+    # check if the Material exists, a full material definition is added to the library first (once, the index
+    # remembers the definitions it added)
+    materialName = materialIndex.resolve(name, materialLib, addToLib)
+    
+    # double check that everything is fine
+    if materialName != None:
+        pass
         
-        # last thermCond value
-        elif (inputCount == ghenv.Component.Params.Input.Count - 1):
-            
-            layerName = ghenv.Component.Params.Input[inputCount].NickName
-            exec('thermCondLastValue = ' + layerName)
-            phasechangeStr += str(thermCondLastValue) + ";    !- Thermal Conductivity " +  str(int(ceil(inputCount / 2))) + " {W/m-K} "
+    ######## does E+ allow window materials to be PCMs??? (PROBABLY NOT YET)???? #########
+    #elif materialName  in sc.sticky ["honeybee_windowMaterialLib"].keys():
+    #    pass
+    ########
+    
+    else:
+        msg = str(name) + " is not a valid material name/definition.\n" + \
+            "Create the material first and try again."
+        ghenv.Component.AddRuntimeMessage(w, msg)
+        return
         
-        # should not happen
-        else:
-            pass
-            #print "wtf"
-            
-    return phasechangeStr
+    return cache.put(key, (materialName, core.idfString(curve, materialName)))[1]
     
 checkData, _name = setDefaults()
 checkHBLB = checkHBLB()
-checkTemperature = checkTemperature()
 setInputNames = setInputNames()
+# read every input once, instead of once per check
+curve = core.collectInputs(kind, [input.NickName for input in ghenv.Component.Params.Input], globals(), _name)
+checkTemperature = checkTemperature(curve)
 
-print checkData, checkHBLB, checkTemperature, setInputNames
+print(checkData, checkHBLB, checkTemperature, setInputNames)
 # check function returns before running main
 if checkData == True and checkHBLB != -1 and checkTemperature != -1 and setInputNames != -1:
-    EPMaterialWithVariableTC = main(_name)
+    EPMaterialWithVariableTC = main(_name, curve)
+    print(cache.summary())
     
 # Note, this component is based on the "Honeybee_EnergyPlus MaterialPropertyPhaseChange", I might have made some mistakes based on that component.
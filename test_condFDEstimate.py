@@ -0,0 +1,58 @@
+# Tests of the CondFD node, run time and memory estimator and its calibration to a sweep.
+# usage: python -m pytest -q test_condFDEstimate.py
+
+import json
+
+import pytest
+
+import ep_condFDEstimate as estimator
+from conftest import baseIdf
+from ep_condFDSweep import runSweep
+from ep_resultStore import ResultStore
+
+points = [{"discretizationConst_": 1.0}, {"discretizationConst_": 2.0}, {"discretizationConst_": 3.0},
+          {"relaxationFactor_": 0.5}]
+
+
+def testNodesFollowTheDiscretization():
+    layerLists, settings, timestepsPerHour, surfaces = estimator.fromIdf(baseIdf)
+    assert timestepsPerHour == 1
+    coarse = estimator.estimate(layerLists, dict(settings, discretizationConst_=3.0), timestepsPerHour)
+    fine = estimator.estimate(layerLists, dict(settings, discretizationConst_=1.0), timestepsPerHour)
+    # dx = sqrt(C * alpha * dt) with dt 3600 s: 0.087 m for the 0.1 m of concrete, 0.101 m for the 0.05 m of
+    # insulation
+    assert coarse.nodes == [[2, 1]]
+    assert fine.totalNodes > coarse.totalNodes
+    assert fine.seconds > coarse.seconds
+
+
+def testCalibrateUsesRunsServedByTheStore(tmp_path, sweepInputs, standin):
+    idfPath, epwPath = sweepInputs
+    store = ResultStore(str(tmp_path / "store"))
+    runSweep(idfPath, epwPath, points, str(tmp_path / "first"), standin, workers=2, store=store)
+    results = runSweep(idfPath, epwPath, points, str(tmp_path / "second"), standin, workers=2, store=store)
+    assert all(result.get("cached") for result in results)
+
+    samples = estimator.sweepSamples(str(tmp_path / "second" / "results.jsonl"))
+    assert len(samples) == len(points)
+    with open(str(tmp_path / "first" / "results.jsonl")) as file:
+        assert [seconds for steps, updates, seconds in samples] == \
+            [json.loads(line)["seconds"] for line in file]
+    model = estimator.calibrate(samples)
+    assert all(model[name] >= 0 for name in ("startup", "perNodeStep", "perNodeIteration"))
+
+
+def testCalibrateNeedsThreeRuns():
+    with pytest.raises(ValueError):
+        estimator.calibrate([(1e6, 2e6, 1.0), (2e6, 4e6, 2.0)])
+    with pytest.raises(ValueError):
+        estimator.calibrate([])
+
+
+def testCalibrateRecoversTheCoefficients():
+    truth = {"startup": 0.5, "perNodeStep": 1e-7, "perNodeIteration": 3e-8}
+    samples = [(steps, updates, truth["startup"] + truth["perNodeStep"] * steps + truth["perNodeIteration"] * updates)
+               for steps, updates in [(1e6, 2e6), (4e6, 5e6), (2e6, 9e6), (8e6, 1e7)]]
+    model = estimator.calibrate(samples)
+    for name, value in truth.items():
+        assert model[name] == pytest.approx(value, rel=1e-6)
@@ -0,0 +1,61 @@
+# Tests of the 1-D CondFD screening solver on small synthetic walls and weather.
+# usage: python -m pytest -q test_condFDSolver.py
+
+import numpy as np
+
+from ep_condFDEstimate import Layer
+from ep_condFDSolver import insideFilm, metrics, outsideFilm, simulate
+
+concrete = Layer("CONCRETE", 0.1, 1.4, 2300.0, 880.0)
+insulation = Layer("INSULATION", 0.05, 0.04, 30.0, 1400.0)
+gypsum = Layer("GYPSUM", 0.013, 0.16, 800.0, 1090.0)
+linearWall = [concrete, insulation, gypsum]
+
+
+def pcmLayer():
+    # 60 kJ/kg of latent heat between 22 and 25 C on top of 900 J/kg-K
+    temperatures = [-20.0, 20.0, 22.0, 23.0, 24.0, 25.0, 27.0, 60.0]
+    enthalpies = [0.0]
+    for low, high in zip(temperatures, temperatures[1:]):
+        enthalpies.append(enthalpies[-1] + 900.0 * (high - low) + (20000.0 if 22 <= low < 25 else 0.0))
+    return Layer("PCM", 0.02, 0.2, 850.0, 900.0, (temperatures, enthalpies))
+
+
+def weather(days=20):
+    hours = np.arange(24 * days)
+    outdoor = 25 + 8 * np.sin(2 * np.pi * (hours - 9) / 24)
+    solar = 0.6 * np.clip(600 * np.sin(2 * np.pi * (hours - 6) / 24), 0, None)
+    return outdoor, solar
+
+
+def testSteadyStateFluxIsTemperatureDifferenceOverResistance():
+    hours = 24 * 20
+    result = simulate([linearWall], np.full(hours, 35.0), np.zeros(hours), zone=21.0)
+    resistance = 1 / outsideFilm + sum(layer.thickness / layer.conductivity for layer in linearWall) + 1 / insideFilm
+    assert abs(result.insideFlux[0, -1] - (35.0 - 21.0) / resistance) < 1e-3
+
+
+def testRelaxationDoesNotChangeALinearWall():
+    outdoor, solar = weather()
+    full = simulate([linearWall], outdoor, solar, relaxation=1.0)
+    relaxed = simulate([linearWall], outdoor, solar, relaxation=0.25)
+    assert np.allclose(full.insideFlux, relaxed.insideFlux, atol=insideFilm * 0.002)
+    assert np.allclose(full.insideSurface, relaxed.insideSurface, atol=0.002)
+
+
+def testRelaxationOnlyChangesTheIterationsOfAPcmWall():
+    outdoor, solar = weather()
+    wall = [concrete, pcmLayer(), insulation, gypsum]
+    full = simulate([wall], outdoor, solar, relaxation=1.0)
+    relaxed = simulate([wall], outdoor, solar, relaxation=0.25)
+    assert full.unconverged == relaxed.unconverged == 0
+    assert relaxed.iterations.mean() > full.iterations.mean() > 1
+    assert np.abs(full.insideFlux - relaxed.insideFlux).max() < 0.05
+
+
+def testPcmCutsThePeakGain():
+    outdoor, solar = weather()
+    result = simulate([linearWall, [concrete, pcmLayer(), insulation, gypsum]], outdoor, solar)
+    values = metrics(result)
+    assert values["gainReduction"][0] == 0.0
+    assert 0 < values["gainReduction"][1] < 1
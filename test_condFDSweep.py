@@ -0,0 +1,78 @@
+# Tests of the CondFD settings sweep, run with the stand-in simulator.
+# usage: python -m pytest -q test_condFDSweep.py
+
+import csv
+import json
+import os
+
+from ep_condFDSweep import gridPoints, runSweep, samplePoints, sampleRanges, variantIdf
+from ep_resultStore import ResultStore
+
+points = [
+    {"differenceScheme_": "FullyImplicitFirstOrder", "discretizationConst_": 3.0, "relaxationFactor_": 0.5},
+    # the stand-in's divergence: Crank-Nicholson, no relaxation and a coarse grid
+    {"differenceScheme_": "CrankNicholsonSecondOrder", "discretizationConst_": 3.0, "relaxationFactor_": 1.0},
+    # rejected by the component, never simulated
+    {"relaxationFactor_": 2.0},
+]
+
+
+def testPoints():
+    grid = gridPoints()
+    assert len(grid) == 2 * 3 * 3 * 3
+    assert grid[0] == {"differenceScheme_": "FullyImplicitFirstOrder", "discretizationConst_": 1.0,
+                       "relaxationFactor_": 0.25, "insideFaceSurfTempConv_": 0.0001}
+    sample = samplePoints(20, seed=1)
+    assert sample == samplePoints(20, seed=1)
+    for point in sample:
+        assert 0.01 <= point["relaxationFactor_"] <= 1.0
+        assert 1e-7 <= point["insideFaceSurfTempConv_"] <= 0.01
+        assert point["differenceScheme_"] in sampleRanges["differenceScheme_"]
+
+
+def testVariantIdfReplacesTheHeatBalanceObjects():
+    base = "Version,8.5;\n\nHeatBalanceAlgorithm,\n  ConductionTransferFunction;  !- Algorithm\n\nTimestep,1;\n"
+    text = variantIdf(base, "HeatBalanceAlgorithm,ConductionFiniteDifference;\n")
+    assert "ConductionTransferFunction" not in text
+    assert text.startswith("Version,8.5;") and "Timestep,1;" in text
+    assert text.endswith("HeatBalanceAlgorithm,ConductionFiniteDifference;\n")
+
+
+def testSweepStatuses(tmp_path, sweepInputs, standin):
+    idfPath, epwPath = sweepInputs
+    outDir = str(tmp_path / "sweep")
+    results = runSweep(idfPath, epwPath, points, outDir, standin, workers=2)
+    assert [result["status"] for result in results] == ["ok", "failed", "invalid"]
+    assert "diverged" in open(os.path.join(results[1]["runDir"], "eplusout.err")).read()
+    assert results[1]["severe"] == 1
+    assert "runDir" not in results[2] and any("relaxationFactor_" in message for message in results[2]["messages"])
+
+    with open(os.path.join(results[0]["runDir"], "in.idf")) as file:
+        idfText = file.read()
+    assert "ConductionFiniteDifference" in idfText and "ConductionTransferFunction" not in idfText
+    assert "CONCRETE" in idfText
+
+    with open(os.path.join(outDir, "results.jsonl")) as file:
+        assert [json.loads(line)["status"] for line in file] == ["ok", "failed", "invalid"]
+    with open(os.path.join(outDir, "summary.tsv"), newline="") as file:
+        rows = list(csv.DictReader(file, delimiter="\t"))
+    assert [row["status"] for row in rows] == ["ok", "failed", "invalid"]
+    assert rows[0]["cached"] == "0" and rows[2]["seconds"] == ""
+
+
+def testRerunComesFromTheStore(tmp_path, sweepInputs, standin):
+    idfPath, epwPath = sweepInputs
+    store = ResultStore(str(tmp_path / "store"))
+    first = runSweep(idfPath, epwPath, points, str(tmp_path / "first"), standin, workers=2, store=store)
+    assert store.counts["misses"] == 2 and store.counts["stores"] == 2
+    assert not any(result.get("cached") for result in first)
+
+    second = runSweep(idfPath, epwPath, points, str(tmp_path / "second"), standin, workers=2,
+                      store=ResultStore(str(tmp_path / "store")))
+    assert [result["status"] for result in second] == ["ok", "failed", "invalid"]
+    assert [bool(result.get("cached")) for result in second] == [True, True, False]
+    assert second[0]["means"] == first[0]["means"] and second[0]["seconds"] == first[0]["seconds"]
+    # the stored outputs are copied into the new run directory
+    assert os.path.exists(os.path.join(second[0]["runDir"], "eplusout.csv"))
+    stats = ResultStore(str(tmp_path / "store")).stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
@@ -0,0 +1,58 @@
+# Tests of the duplicate remover and its batch mode.
+# usage: python -m pytest -q test_dupDeleter.py
+
+import glob
+import os
+
+import pytest
+
+from wUnderground_dup_deleter import batchClean, dropDuplicates
+
+
+def testDropDuplicatesKeepsTheLastOfEachRun():
+    rows = [["00:00", "a"], ["00:30", "b"], ["00:30", "c"], ["00:30", "d"], ["01:00", "e"], ["00:30", "f"]]
+    assert list(dropDuplicates(rows)) == [["00:00", "a"], ["00:30", "d"], ["01:00", "e"], ["00:30", "f"]]
+
+
+def testDropDuplicatesEmpty():
+    assert list(dropDuplicates(iter([]))) == []
+
+
+def writeInput(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write("".join("\t".join(row) + "\n" for row in rows))
+
+
+rows = [["00:00", "a"], ["00:00", "b"], ["00:30", "c"]]
+
+
+def testBatchCleanMirrorsTheInputLayout(tmp_path):
+    for year in ("2013", "2014"):
+        writeInput(str(tmp_path / "RPLL" / year / "try.txt"), rows)
+    outDir = str(tmp_path / "cleaned")
+    summary = batchClean(glob.glob(str(tmp_path / "RPLL" / "*" / "try.txt")), outDir, workers=1)
+    assert [(os.path.relpath(outPath, outDir), numIn, dups) for inPath, outPath, numIn, dups, seconds in summary] == \
+        [(os.path.join("2013", "try.txt"), 3, 1), (os.path.join("2014", "try.txt"), 3, 1)]
+    with open(os.path.join(outDir, "2013", "try.txt")) as file:
+        assert file.read() == "00:00\tb\n00:30\tc\n"
+
+
+def testBatchCleanRefusesToWriteOverItsInput(tmp_path):
+    path = str(tmp_path / "try.txt")
+    writeInput(path, rows)
+    with pytest.raises(ValueError):
+        batchClean([path], str(tmp_path), workers=1)
+    with open(path) as file:
+        assert len(file.read().splitlines()) == 3
+
+
+def testBatchCleanSkipsTheOutputsOfAnEarlierRun(tmp_path):
+    # the out dir inside the input tree: a rerun with a recursive glob must not clean the last run's outputs
+    writeInput(str(tmp_path / "RPLL" / "2013" / "try.txt"), rows)
+    outDir = str(tmp_path / "RPLL" / "cleaned")
+    pattern = str(tmp_path / "RPLL" / "**" / "try.txt")
+    first = batchClean(glob.glob(pattern, recursive=True), outDir, workers=1)
+    second = batchClean(glob.glob(pattern, recursive=True), outDir, workers=1)
+    assert [outPath for inPath, outPath, numIn, dups, seconds in first] == \
+        [outPath for inPath, outPath, numIn, dups, seconds in second] == [os.path.join(outDir, "try.txt")]
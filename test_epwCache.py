@@ -0,0 +1,75 @@
+# Tests of the EPW sidecar cache: built once, trusted while the EPW is unchanged, rebuilt when it changes.
+# usage: python -m pytest -q test_epwCache.py
+
+import os
+
+import pytest
+
+import ep_epwCache
+from ep_epwCache import loadEpw, sidecarPath
+
+
+def writeEpw(path, dryBulb):
+    with open(path, "w") as file:
+        file.write("LOCATION,Manila,MetroManila,PH,Custom,,14.5,121.0,8.0,21\n" + "HEADER\n" * 7)
+        for hour in range(24):
+            file.write("2013,1,1,{},60,?,{:.1f},,,101300\n".format(hour + 1, dryBulb + hour))
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    # the paths the cache hashed
+    hashed = []
+    fileHash = ep_epwCache.fileHash
+
+    def countingHash(path):
+        hashed.append(path)
+        return fileHash(path)
+    monkeypatch.setattr(ep_epwCache, "fileHash", countingHash)
+    return hashed
+
+
+def testColumnsAndMissingValues(tmp_path):
+    path = str(tmp_path / "weather.epw")
+    writeEpw(path, 20.0)
+    epw = loadEpw(path)
+    assert len(epw) == 24 and os.path.exists(sidecarPath(path))
+    assert list(epw.field("DryBulb", 1, 3)) == [20.0, 21.0, 22.0]
+    assert epw["Hour"][-1] == 24 and epw["AtmosPressure"][0] == 101300
+    # empty fields read as EnergyPlus' missing value
+    assert epw["DewPoint"][0] == pytest.approx(99.9) and epw["RelHum"][0] == 999
+    assert epw.location["City"] == "Manila"
+
+
+def testUnchangedEpwIsNotHashedAgain(tmp_path, hashes):
+    path = str(tmp_path / "weather.epw")
+    writeEpw(path, 20.0)
+    loadEpw(path)
+    del hashes[:]
+    loadEpw(path)
+    assert hashes == []
+
+
+def testTouchedEpwIsHashedOnce(tmp_path, hashes):
+    path = str(tmp_path / "weather.epw")
+    writeEpw(path, 20.0)
+    loadEpw(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    del hashes[:]
+    assert loadEpw(path)["DryBulb"][0] == 20.0
+    assert hashes == [path]
+    # the new mtime is recorded: the next load trusts it
+    loadEpw(path)
+    assert hashes == [path]
+
+
+def testChangedEpwRebuildsTheSidecar(tmp_path):
+    path = str(tmp_path / "weather.epw")
+    writeEpw(path, 20.0)
+    assert loadEpw(path)["DryBulb"][0] == 20.0
+    stat = os.stat(path)
+    # the same size, a new mtime and new content: the hash decides
+    writeEpw(path, 30.0)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert loadEpw(path)["DryBulb"][0] == 30.0
@@ -0,0 +1,51 @@
+# Tests of the headless runner of the Grasshopper components.
+# usage: python -m pytest -q test_headless.py
+
+import os
+
+import ep_headless as headless
+
+here = os.path.dirname(os.path.abspath(__file__))
+phaseChange = os.path.join(here, "materialProp_phaseChange.py")
+library = {"GYPSUM": {0: "Material", 1: "GYPSUM"}}
+gypsum = {"_name": "GYPSUM", "coeff_": 0, "_temp1": -20, "_enthalpy1": -20000, "_temp2": 22, "_enthalpy2": 33400}
+
+
+def testSignatureAndInputs():
+    code, inputs, outputs = headless.loadComponent(phaseChange)
+    assert inputs[:4] == ["_name", "coeff_", "_temp1", "_enthalpy1"] and outputs == ["EPMaterialWithPCM"]
+    assert headless.loadComponent(phaseChange)[0] is code
+    # the unnumbered inputs are always there, the pair inputs only when given
+    assert headless.inputNickNames(inputs, {"_temp1": 1, "_enthalpy1": 2, "extra": 3}) == \
+        ["_name", "coeff_", "_temp1", "_enthalpy1", "extra"]
+
+
+def testRunsInOrderWithMessages():
+    inputSets = [gypsum, dict(gypsum, _name="NOPE"), dict(gypsum, _temp2=-30)]
+    results = headless.runMany(phaseChange, inputSets, workers=0, library=library)
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["outputs"]["EPMaterialWithPCM"].startswith("MaterialProperty:PhaseChange,\nGYPSUM,")
+    assert results[0]["messages"] == [] and results[0]["error"] is None
+    assert "not a valid material" in results[1]["messages"][0][1]
+    assert "'_temp2' can't be lower" in results[2]["messages"][0][1]
+    assert all(result["outputs"]["EPMaterialWithPCM"] is None for result in results[1:])
+
+
+def testStickyLastsForTheWorkersRuns():
+    # the second identical solution comes from the snippet cache in the worker's sticky
+    results = headless.runMany(phaseChange, [gypsum, gypsum], workers=0, library=library)
+    assert "1 hits" in results[1]["printed"]
+    assert results[1]["outputs"] == results[0]["outputs"]
+
+
+def testPoolGivesTheSameResults():
+    inputSets = [dict(gypsum, _enthalpy2=33400 + i) for i in range(6)]
+    inProcess = headless.runMany(phaseChange, inputSets, workers=0, library=library)
+    pooled = headless.runMany(phaseChange, inputSets, workers=2, library=library)
+    assert [result["outputs"] for result in pooled] == [result["outputs"] for result in inProcess]
+
+
+def testReadLibrary(tmp_path):
+    path = tmp_path / "materials.idf"
+    path.write_text("Material,\n  Gypsum,  !- Name\n  Smooth,\n  0.0127;\n\nConstruction,Wall,Gypsum;\n")
+    assert headless.readLibrary(str(path)) == {"GYPSUM": {0: "Material", 1: "Gypsum", 2: "Smooth", 3: "0.0127"}}
@@ -0,0 +1,26 @@
+# Tests of the IDF object writer and reader.
+# usage: python -m pytest -q test_idfWriter.py
+
+import io
+
+import ep_idfWriter as idfWriter
+
+
+def testIdfObjectWithoutCommentsIsOneLine():
+    assert idfWriter.idfObject("HeatBalanceAlgorithm", ["ConductionFiniteDifference", None, 200]) == \
+        "HeatBalanceAlgorithm,ConductionFiniteDifference,,200;"
+
+
+def testWriteObjectsRoundTrips():
+    file = io.StringIO()
+    count = idfWriter.writeObjects(file, [("Version", [("8.5", "Version Identifier")]),
+                                          ("Timestep", [6])])
+    assert count == 2
+    assert file.getvalue() == "Version,\n8.5;    !- Version Identifier\n\nTimestep,6;\n"
+    assert idfWriter.idfObjects(file.getvalue()) == [["Version", "8.5"], ["Timestep", "6"]]
+
+
+def testWriteObjectsEmpty():
+    file = io.StringIO()
+    assert idfWriter.writeObjects(file, iter([])) == 0
+    assert file.getvalue() == ""
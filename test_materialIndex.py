@@ -0,0 +1,73 @@
+# Tests of the index of the materials the components resolve by name or by definition.
+# usage: python -m pytest -q test_materialIndex.py
+
+from ep_materialIndex import MaterialIndex, parseDefinition, stickyIndex
+
+gypsum = """Material,
+  Gypsum,                  !- Name
+  Smooth,                  !- Roughness
+  0.0127,                  !- Thickness {m}
+  0.16,                    !- Conductivity {W/m-K}
+  800,                     !- Density {kg/m3}
+  1090;                    !- Specific Heat {J/kg-K}
+"""
+
+
+class Library(dict):
+    # Honeybee's material library and addEPConstructionToLib, counting the definitions it parses
+
+    def __init__(self):
+        dict.__init__(self)
+        self.added = 0
+
+    def addToLib(self, definition):
+        self.added += 1
+        fields = parseDefinition(definition)
+        self[fields[1].upper()] = fields
+        return fields[1].upper()
+
+
+def testParseDefinition():
+    assert parseDefinition(gypsum) == ["Material", "Gypsum", "Smooth", "0.0127", "0.16", "800", "1090"]
+
+
+def testDefinitionsAreAddedOnce():
+    index, library = MaterialIndex(), Library()
+    assert index.resolve(gypsum, library, library.addToLib) == "GYPSUM"
+    # the same definition, reformatted, is found by its hash
+    assert index.resolve(gypsum.replace("\n", "\r\n"), library, library.addToLib) == "GYPSUM"
+    assert library.added == 1
+    assert index.lookup("gypsum")[3] == "0.0127"
+    # names resolve against the library
+    assert index.resolve("gypsum", library, library.addToLib) == "GYPSUM"
+    assert index.resolve("CONCRETE", library, library.addToLib) is None
+    assert index.resolve(None, library, library.addToLib) is None
+
+
+def testChangedDefinitionReplacesTheOldOne():
+    index, library = MaterialIndex(), Library()
+    index.resolve(gypsum, library, library.addToLib)
+    thicker = gypsum.replace("0.0127", "0.0159")
+    assert index.resolve(thicker, library, library.addToLib) == "GYPSUM"
+    assert index.lookup("GYPSUM")[3] == "0.0159"
+    assert len(index) == 1 and len(index.byDefinition) == 1
+    # going back to the first definition parses it again
+    index.resolve(gypsum, library, library.addToLib)
+    assert library.added == 3
+
+
+def testNewLibraryStartsOver():
+    index, library = MaterialIndex(), Library()
+    index.resolve(gypsum, library, library.addToLib)
+    newLibrary = Library()
+    assert index.resolve(gypsum, newLibrary, newLibrary.addToLib) == "GYPSUM"
+    assert newLibrary.added == 1
+    # a material removed from the library is added again
+    del newLibrary["GYPSUM"]
+    assert index.resolve(gypsum, newLibrary, newLibrary.addToLib) == "GYPSUM"
+    assert newLibrary.added == 2
+
+
+def testStickyIndexIsShared():
+    sticky = {}
+    assert stickyIndex(sticky) is stickyIndex(sticky)
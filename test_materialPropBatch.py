@@ -0,0 +1,62 @@
+# Tests of the batch material property generator: reading the table and validating all curves at once.
+# usage: python -m pytest -q test_materialPropBatch.py
+
+import materialProp_batch as batch
+import materialProp_core as core
+
+
+def curve(kind, temperatures, values, name="pcm"):
+    return core.PropertyCurve(kind, name, temperatures, values)
+
+
+def testValidCurves():
+    curves = [curve(core.phaseChange, [-20.0, 22.0, 24.0], [10000.0, 40000.0, 180000.0]),
+              curve(core.variableThermalConductivity, [0.0, 30.0], [0.2, 0.15])]
+    assert batch.checkCurves(curves) == [[], []]
+    assert batch.checkCurves([]) == []
+
+
+def testMissingValues():
+    messages = batch.checkCurves([curve(core.phaseChange, [None, 20.0, 22.0], [1.0, None, 3.0])])[0]
+    assert messages == ["temperature 1 is not a number", "Enthalpy 2 is not a number"]
+
+
+def testTemperaturesMustIncrease():
+    messages = batch.checkCurves([curve(core.phaseChange, [-300.0, 20.0, 20.0, 10.0], [1.0, 2.0, 3.0, 4.0])])[0]
+    assert messages == ["temperature 1 is below absolute zero",
+                        "temperature 3 (20.0) is not higher than temperature 2 (20.0)",
+                        "temperature 4 (10.0) is not higher than temperature 3 (20.0)"]
+
+
+def testNegativeSlopesOnlyWhereTheTemperatureRises():
+    # 20 -> 10 is reported as a temperature problem, not as a decreasing enthalpy, although the enthalpy rises
+    # over it; 22 -> 24 is a real negative slope
+    messages = batch.checkCurves([curve(core.phaseChange, [20.0, 10.0, 22.0, 24.0], [1.0, 2.0, 5.0, 4.0])])[0]
+    assert messages == ["temperature 2 (10.0) is not higher than temperature 1 (20.0)",
+                        "enthalpy decreases between temperature 3 and 4"]
+    # a conductivity can fall with the temperature
+    assert batch.checkCurves([curve(core.variableThermalConductivity, [20.0, 22.0], [2.0, 1.0])]) == [[]]
+
+
+def testPairLimitsAndEmptyCurves():
+    temperatures = [float(t) for t in range(11)]
+    curves = [curve(core.variableThermalConductivity, temperatures, [1.0] * 11),
+              curve(core.phaseChange, temperatures, temperatures),
+              curve(core.phaseChange, [], [])]
+    messages = batch.checkCurves(curves)
+    assert messages[0] == ["11 pairs, EnergyPlus allows at most 10 for MaterialProperty:VariableThermalConductivity"]
+    assert messages[1] == []
+    assert messages[2] == ["no temperature - value pairs"]
+
+
+def testReadTable(tmp_path):
+    path = tmp_path / "curves.csv"
+    path.write_text("name,kind,coeff,temperature,value\n"
+                    "PCM_A,PhaseChange,0.5,-20,-20000\n"
+                    "INS,VariableThermalConductivity,,0,0.04\n"
+                    "PCM_A,,,22,33400\n")
+    curves, coeffs = batch.readTable(str(path))
+    assert [(c.name, c.kind) for c in curves] == [("PCM_A", core.phaseChange),
+                                                  ("INS", core.variableThermalConductivity)]
+    assert curves[0].temperatures == [-20.0, 22.0] and curves[0].values == [-20000.0, 33400.0]
+    assert coeffs == [0.5, 0.0]
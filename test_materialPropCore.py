@@ -0,0 +1,40 @@
+# Tests of the Grasshopper-free property curve core of the material components.
+# usage: python -m pytest -q test_materialPropCore.py
+
+import ep_idfWriter as idfWriter
+import materialProp_core as core
+
+
+def phaseChangeCurve(temperatures, values):
+    return core.PropertyCurve(core.phaseChange, "wall pcm", temperatures, values)
+
+
+# materialProp_core
+
+def testCheckCurveAcceptsIncreasingTemperatures():
+    assert core.checkCurve(phaseChangeCurve([-20.0, 22.0, 24.0], [10000.0, 40000.0, 180000.0])) == []
+
+
+def testCheckCurveReportsEveryProblem():
+    messages = core.checkCurve(phaseChangeCurve([None, -300.0, 20.0, 10.0], [1.0, 2.0, None, 4.0]))
+    assert "Provide a number for '_temp1'" in messages
+    assert "Provide a number for '_enthalpy3'" in messages
+    assert any("absolute zero" in message for message in messages)
+    assert any("'_temp4' can't be lower" in message for message in messages)
+    assert len(messages) == 4
+
+
+def testIdfStringPhaseChange():
+    text = core.idfString(phaseChangeCurve([20.0, 22.0], [1000.0, 2000.0]), "wall pcm", 0.0)
+    lines = text.split("\n")
+    assert lines[0] == "MaterialProperty:PhaseChange,"
+    assert lines[1].startswith("WALL PCM,")
+    assert lines[2].startswith("0.0,") and "Temperature Coefficient" in lines[2]
+    assert lines[-1].startswith("2000.0;") and "Enthalpy 2 {J/kg}" in lines[-1]
+    assert len(lines) == 7
+
+
+def testIdfStringConductivityHasNoCoefficient():
+    curve = core.PropertyCurve(core.variableThermalConductivity, "gypsum", [20.0], [0.16])
+    assert idfWriter.idfObjects(core.idfString(curve, "gypsum")) == \
+        [["MaterialProperty:VariableThermalConductivity", "GYPSUM", "20.0", "0.16"]]
@@ -0,0 +1,65 @@
+# Tests of the reduction of dense property curves to the EnergyPlus pair limits.
+# usage: python -m pytest -q test_materialPropReduce.py
+
+import numpy as np
+
+import materialProp_core as core
+from materialProp_reduce import reduceCurve, reduceCurves
+
+
+def dscCurve(points=2000, meltingPoint=24.0, noise=0.0, seed=0):
+    # enthalpy (J/kg) of a PCM from -20 to 60 C: 2000 J/kg-K sensible heat and 180 kJ/kg of latent heat
+    # released over a few degrees around the melting point
+    temperatures = np.linspace(-20.0, 60.0, points)
+    enthalpy = 2000.0 * temperatures + 180000.0 / (1 + np.exp(-(temperatures - meltingPoint) / 0.8))
+    enthalpy += np.random.default_rng(seed).normal(0.0, noise, points)
+    return temperatures, enthalpy
+
+
+def testReducedCurvesAreMonotoneAndKeepTheEnds():
+    curves = [dscCurve(meltingPoint=point) for point in (18.0, 24.0, 30.0)]
+    for (temperatures, enthalpy), reduction in zip(curves, reduceCurves(curves, 16)):
+        assert len(reduction.temperatures) <= 16
+        assert np.all(np.diff(reduction.temperatures) > 0)
+        assert np.all(np.diff(reduction.values) >= 0)
+        assert (reduction.temperatures[0], reduction.temperatures[-1]) == (temperatures[0], temperatures[-1])
+        assert (reduction.values[0], reduction.values[-1]) == (enthalpy[0], enthalpy[-1])
+        assert reduction.heatError == 0.0
+        # within 1% of the latent heat everywhere
+        assert reduction.maxError < 1800.0
+
+
+def testBetterThanEvenlySpacedKnots():
+    temperatures, enthalpy = dscCurve()
+    reduction = reduceCurves([(temperatures, enthalpy)], 16)[0]
+    even = np.linspace(0, len(temperatures) - 1, 16).astype(int)
+    evenError = np.abs(np.interp(temperatures, temperatures[even], enthalpy[even]) - enthalpy).max()
+    assert reduction.maxError < evenError / 2
+
+
+def testNoisyEnthalpyIsMadeMonotone():
+    temperatures, enthalpy = dscCurve(noise=500.0)
+    assert np.any(np.diff(enthalpy) < 0)
+    reduction = reduceCurves([(temperatures, enthalpy)], 16, monotone=True)[0]
+    assert len(reduction.temperatures) <= 16
+    assert np.all(np.diff(reduction.values) >= 0)
+    assert abs(reduction.heatError) < 0.01
+
+
+def testShortCurvesAreKept():
+    reduction = reduceCurves([([20.0, 10.0, 30.0], [2.0, 1.0, 3.0])], 16)[0]
+    assert list(reduction.temperatures) == [10.0, 20.0, 30.0]
+    assert list(reduction.values) == [1.0, 2.0, 3.0]
+    assert reduction.maxError == 0.0
+
+
+def testReduceCurveUsesTheLimitOfItsKind():
+    temperatures, enthalpy = dscCurve(points=500)
+    conductivity = core.PropertyCurve(core.variableThermalConductivity, "pcm", list(temperatures),
+                                      list(0.2 + 0.1 / (1 + np.exp(-(temperatures - 24.0)))))
+    reduced, reduction = reduceCurve(conductivity)
+    assert len(reduced) <= 10 and reduced.kind is core.variableThermalConductivity
+    assert core.checkCurve(reduced) == []
+    reduced, reduction = reduceCurve(core.PropertyCurve(core.phaseChange, "pcm", list(temperatures), list(enthalpy)))
+    assert len(reduced) <= 16
+    assert core.checkCurve(reduced) == []
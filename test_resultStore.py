@@ -0,0 +1,66 @@
+# Tests of the simulation result store: the canonical IDF behind its keys, hits and least recently used eviction.
+# usage: python -m pytest -q test_resultStore.py
+
+import os
+
+from ep_resultStore import ResultStore, canonicalIdf
+
+
+def testCanonicalIdfIgnoresFormattingCaseAndOrder():
+    a = "Timestep,4;\nMaterial,\n  Concrete,  !- Name\n  Rough,\n  0.10;\n"
+    b = "! the same objects\nMATERIAL,CONCRETE,ROUGH,0.1;\n\ntimestep,\n4.0;   !- per hour\n"
+    assert canonicalIdf(a) == canonicalIdf(b)
+    assert canonicalIdf(a) != canonicalIdf(a.replace("0.10", "0.2"))
+
+
+def testCanonicalIdfKeepsTheCaseOfPaths():
+    schedule = "Schedule:File,occ,Fraction,{},2,1;\n"
+    assert canonicalIdf(schedule.format("Occupancy.csv")) != canonicalIdf(schedule.format("occupancy.csv"))
+    assert canonicalIdf(schedule.format("data/Occ")) != canonicalIdf(schedule.format("data/occ"))
+    # outside the file classes a field with a file extension keeps its case too
+    assert "Wall.v2" in canonicalIdf("Construction,Wall.v2,Concrete;\n")
+
+
+def runDirWith(tmp_path, name, size):
+    runDir = tmp_path / name
+    runDir.mkdir()
+    (runDir / "eplusout.csv").write_bytes(b"x" * size)
+    (runDir / "in.idf").write_text("Timestep,1;\n")
+    return str(runDir)
+
+
+def testGetReturnsTheStoredRun(tmp_path):
+    epwPath = tmp_path / "weather.epw"
+    epwPath.write_text("LOCATION\n")
+    store = ResultStore(str(tmp_path / "store"))
+    key = store.key("Timestep,1;", str(epwPath), "energyplus")
+    assert key == store.key("TIMESTEP,1.0;  ! one", str(epwPath), "energyplus")
+    assert key != store.key("Timestep,1;", str(epwPath), "other simulator")
+    assert store.get(key) is None
+
+    store.put(key, {"returnCode": 0, "seconds": 1.5}, runDirWith(tmp_path, "run", 10))
+    copyDir = str(tmp_path / "copy")
+    assert store.get(key, copyDir) == {"returnCode": 0, "seconds": 1.5}
+    # the IDF is not stored, the outputs are
+    assert os.listdir(copyDir) == ["eplusout.csv"]
+    store.save()
+    assert ResultStore(str(tmp_path / "store")).stats()["hits"] == 1
+    # a new EPW is a new key
+    epwPath.write_text("LOCATION,changed\n")
+    assert store.key("Timestep,1;", str(epwPath), "energyplus") != key
+
+
+def testLeastRecentlyUsedEntriesAreEvicted(tmp_path):
+    store = ResultStore(str(tmp_path / "store"), maxBytes=250)
+    keys = ["{:02x}".format(i) * 20 for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        store.put(key, {"returnCode": 0}, runDirWith(tmp_path, "run{}".format(i), 100))
+        metaPath = os.path.join(store.entryPath(key), "meta.json")
+        os.utime(metaPath, (1000 + i, 1000 + i))
+    # using the oldest entry makes the other one the least recently used
+    assert store.get(keys[0]) is not None
+    store.put(keys[2], {"returnCode": 0}, runDirWith(tmp_path, "run2", 100))
+    assert store.get(keys[1]) is None
+    assert store.get(keys[0]) is not None and store.get(keys[2]) is not None
+    stats = store.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 200, 1)
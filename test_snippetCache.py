@@ -0,0 +1,38 @@
+# Tests of the cache of component outputs kept across Grasshopper solutions.
+# usage: python -m pytest -q test_snippetCache.py
+
+from ep_snippetCache import SnippetCache, stickyCache
+
+
+def testEquivalentInputsShareAKey():
+    cache = SnippetCache()
+    assert cache.key("PCM", 1, [20, 22.0]) == cache.key(" PCM\r\n", 1.0, (20.0, 22))
+    assert cache.key("PCM", 1) != cache.key("PCM", 2)
+    assert cache.key(None, True) != cache.key(None, 1)
+
+
+def testHitsMissesAndValidity():
+    cache = SnippetCache()
+    key = cache.key("PCM", 1)
+    assert cache.get(key) is None
+    cache.put(key, "MaterialProperty:PhaseChange,PCM;")
+    assert cache.get(key) == "MaterialProperty:PhaseChange,PCM;"
+    # an output rejected by isValid is a miss, and is dropped
+    assert cache.get(key, lambda output: False) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.summary() == "snippet cache: 1 hits, 2 misses, 0/256 entries"
+
+
+def testLeastRecentlyUsedEntriesGo():
+    cache = SnippetCache(maxEntries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert list(cache.entries) == ["a", "c"]
+
+
+def testStickyCacheIsShared():
+    sticky = {}
+    assert stickyCache(sticky) is stickyCache(sticky)
@@ -0,0 +1,92 @@
+# Tests of the surrogate model: fitting it to runs and querying it.
+# usage: python -m pytest -q test_surrogate.py
+
+import json
+import random
+
+import pytest
+
+from ep_surrogate import Surrogate, loadSurrogate, stickySurrogate
+from ep_surrogateFit import defaultColumns, fit, readRuns
+
+
+def gain(peakTemperature, latentHeat, scheme):
+    # a made up peak gain, quadratic in the PCM parameters
+    return 40 - 0.02 * (peakTemperature - 26) ** 2 - latentHeat / 1e4 + (3 if scheme == "Crank" else 0)
+
+
+def screenRuns(count=60, seed=0):
+    rng = random.Random(seed)
+    runs = []
+    for i in range(count):
+        run = {"peakTemperature": rng.uniform(20, 32), "latentHeat": rng.uniform(1e5, 2e5),
+               "differenceScheme_": rng.choice(["Crank", "Implicit"])}
+        run["peakGain"] = gain(run["peakTemperature"], run["latentHeat"], run["differenceScheme_"])
+        runs.append(run)
+    return runs
+
+
+inputs = ["peakTemperature", "latentHeat", "differenceScheme_"]
+
+
+def testQuadraticIsRecovered():
+    model, errors = fit(screenRuns(), inputs, ["peakGain"])
+    assert model["categories"] == {"differenceScheme_": ["Crank", "Implicit"]}
+    assert errors["peakGain"][0] < 1e-9
+    prediction = Surrogate(model).predict({"peakTemperature": 25.0, "latentHeat": 150000.0,
+                                           "differenceScheme_": "Crank"})
+    assert prediction["outputs"]["peakGain"] == pytest.approx(gain(25.0, 150000.0, "Crank"))
+    assert prediction["outside"] == []
+
+
+def testTrainingRunsArePredictedExactly():
+    runs = screenRuns()
+    for run in runs:
+        run["peakGain"] += random.Random(run["latentHeat"]).uniform(-1, 1)
+    surrogate = Surrogate(fit(runs, inputs, ["peakGain"], degree=1)[0])
+    for run in runs[:10]:
+        prediction = surrogate.predict(run)
+        assert prediction["outputs"]["peakGain"] == pytest.approx(run["peakGain"])
+        assert prediction["distance"] == 0.0
+
+
+def testNearestMatchesABruteForceSearch():
+    surrogate = Surrogate(fit(screenRuns(200), inputs, ["peakGain"], neighbours=5)[0])
+    rng = random.Random(1)
+    for i in range(50):
+        coordinates = [rng.uniform(-2.5, 2.5) for name in inputs]
+        brute = sorted((sum((a - b) ** 2 for a, b in zip(coordinates, point)), index)
+                       for index, point in enumerate(surrogate.points))[:5]
+        assert [index for distance, index in surrogate.nearest(coordinates)] == [index for distance, index in brute]
+
+
+def testQueriesOutsideTheRuns():
+    surrogate = Surrogate(fit(screenRuns(), inputs, ["peakGain"])[0])
+    prediction = surrogate.predict([40.0, 150000.0, "Implicit"])
+    assert prediction["outside"] == ["peakTemperature"]
+    assert prediction["relativeDistance"] > 1
+    with pytest.raises(ValueError):
+        surrogate.predict({"peakTemperature": 25.0, "latentHeat": 150000.0, "differenceScheme_": "Explicit"})
+    with pytest.raises(ValueError):
+        surrogate.predict({"peakTemperature": 25.0})
+
+
+def testSweepResultsAndSavedModels(tmp_path):
+    resultsPath = str(tmp_path / "results.jsonl")
+    with open(resultsPath, "w") as file:
+        for i in range(4):
+            file.write(json.dumps({"point": {"relaxationFactor_": 0.25 * (i + 1)}, "status": "ok", "seconds": 1.0 + i,
+                                   "warnings": i, "means": {"Zone Mean Air Temperature": 25.0}}) + "\n")
+        file.write(json.dumps({"point": {"relaxationFactor_": 2.0}, "status": "invalid", "messages": []}) + "\n")
+    runs = readRuns(resultsPath)
+    assert len(runs) == 4
+    assert defaultColumns(runs) == (["relaxationFactor_"], ["seconds", "warnings", "Zone Mean Air Temperature"])
+
+    modelPath = str(tmp_path / "surrogate.json")
+    with open(modelPath, "w") as file:
+        json.dump(fit(runs, ["relaxationFactor_"], ["seconds"])[0], file)
+    assert loadSurrogate(modelPath).predict({"relaxationFactor_": 0.5})["outputs"]["seconds"] == pytest.approx(2.0)
+    sticky = {}
+    first = stickySurrogate(sticky, modelPath, version=1)
+    assert stickySurrogate(sticky, modelPath, version=1) is first
+    assert stickySurrogate(sticky, modelPath, version=2) is not first
@@ -0,0 +1,71 @@
+# Tests of the .def namelist parser and the compiled column plan, on the repo's wunderGroundToEPW_def.def.
+# usage: python -m pytest -q test_wundergroundDefPlan.py
+
+import os
+
+import numpy as np
+import pytest
+
+from wunderground_defPlan import ColumnPlan, loadPlan, parseNamelist
+
+defPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wunderGroundToEPW_def.def")
+
+
+def testPlanOfTheRepoDef():
+    plan = loadPlan(defPath)
+    assert plan.fields == ["DryBulb", "DewPoint", "RelHum", "AtmosPressure", "Visibility", "WindSpd", "WindDir",
+                           "Year", "Month", "Day", "Hour"]
+    assert list(plan.indexes) == [1, 2, 3, 4, 5, 7, 12, 15, 16, 17, 18]
+    scales = dict(zip(plan.fields, plan.scales))
+    assert scales["AtmosPressure"] == 100.0
+    assert scales["WindSpd"] == pytest.approx(0.277)
+    assert scales["DryBulb"] == 1.0
+    assert not plan.offsets.any()
+    assert plan.delimiter == ","
+    assert plan.maxRecords == 8760
+    assert plan.location["City"] == "Manila" and plan.location["InTime"] == 8 and plan.location["InLat"] == 14.52
+
+
+def testLoadPlanIsCachedPerFileVersion():
+    assert loadPlan(defPath) is loadPlan(defPath)
+
+
+def testProject():
+    plan = loadPlan(defPath)
+    row = ["00:30", "26.0", "21.0", "74", "1012", "10.0", "NNE", "7.2", "-", "", "", "Clear", "20",
+           "2013-01-04 16:30:00", "30", "2013", "1", "5", "0"]
+    columns = plan.project([row, row[:4] + [""] + row[5:]])
+    assert columns["AtmosPressure"][0] == 101200.0
+    assert np.isnan(columns["AtmosPressure"][1])
+    assert columns["WindSpd"][0] == pytest.approx(7.2 * 0.277)
+    assert (columns["Day"] == 5).all() and (columns["Hour"] == 0).all()
+
+
+def testNamelistValues():
+    groups = parseNamelist("""
+&wthdata           ! a comment
+DataElements=DryBulb,Year,
+  Month,Day,Hour
+DelimiterChar=','
+NumInHour=1
+/
+""")
+    assert groups["wthdata"] == {"DataElements": ["DryBulb", "Year", "Month", "Day", "Hour"],
+                                 "DelimiterChar": ",", "NumInHour": 1}
+
+
+def testInvalidDefsListEveryProblem():
+    groups = parseNamelist("""
+&wthdata
+DataElements=DryBulb,Windspd,Humidity
+DataUnits='C','furlong/fortnight','%'
+DataConversionFactors=1,1
+NumInHour=2
+/
+""")
+    with pytest.raises(ValueError) as raised:
+        ColumnPlan(groups)
+    message = str(raised.value)
+    for problem in ("2 DataConversionFactors for 3 DataElements", "NumInHour=1", "unknown unit 'furlong/fortnight'",
+                    "unknown DataElement 'Humidity'", "no Year column"):
+        assert problem in message
@@ -0,0 +1,85 @@
+# Tests of the EPW writer: cleaned observations -> hourly grid -> gap filling -> EPW, read back through the
+# EPW sidecar cache.
+# usage: python -m pytest -q test_wundergroundEpwWriter.py
+
+import csv
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+import wunderground_gapfill as gapfill
+import wunderground_parser as parser
+from ep_epwCache import loadEpw
+from wunderground_defPlan import loadPlan
+from wunderground_epwWriter import columnsFromHourly, hourlyFromObservations, writeEpw
+from wunderground_standin import dailyCsv
+
+defPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wunderGroundToEPW_def.def")
+
+
+def yearOfObservations(year=2013):
+    # half hourly stand-in observations without 06:00-09:00 of Jan 2 and all of Mar 3
+    observations = []
+    day = datetime.date(year, 1, 1)
+    while day.year == year:
+        observations.extend(parser.parseLines(dailyCsv("RPLL", day).splitlines(True), day))
+        day += datetime.timedelta(days=1)
+    return [obs for obs in observations if not (
+        obs.time.date() == datetime.date(year, 1, 2) and 6 <= obs.time.hour < 9 or
+        obs.time.date() == datetime.date(year, 3, 3))]
+
+
+@pytest.fixture(scope="module")
+def hourlyYear():
+    return hourlyFromObservations(yearOfObservations())
+
+
+def testHourlyFromObservationsFlagsTheFilledHours(hourlyYear):
+    hourly, flags = hourlyYear
+    assert len(hourly["time"]) == 8760
+    temperature = flags["temperature"]
+    assert list(temperature[24 + 6:24 + 9]) == [gapfill.linear] * 3
+    march3 = (datetime.date(2013, 3, 3) - datetime.date(2013, 1, 1)).days * 24
+    assert (temperature[march3:march3 + 24] == gapfill.diurnal).all()
+    assert (temperature != gapfill.observed).sum() == 27
+    assert not np.isnan(hourly["temperature"]).any()
+    # the stand-in reports no gusts at all
+    assert (flags["gustSpeed"] == gapfill.unfilled).all()
+
+
+def testWriteEpwRoundTripsThroughTheSidecar(tmp_path, hourlyYear):
+    hourly, flags = hourlyYear
+    plan = loadPlan(defPath)
+    path = str(tmp_path / "RPLL.epw")
+    assert writeEpw(path, plan, columnsFromHourly(plan, hourly)) == 8760
+
+    epw = loadEpw(path)
+    assert len(epw) == 8760
+    assert list(epw["Hour"][:25]) == list(range(1, 25)) + [1]
+    assert (epw["Month"][-1], epw["Day"][-1], epw["Hour"][-1]) == (12, 31, 24)
+    assert np.allclose(epw["DryBulb"], np.round(hourly["temperature"], 1), atol=0.051)
+    assert "DATA PERIODS,1,1,Data,Tuesday,1/1,12/31" in epw.epwLines
+    # pressure hPa -> Pa
+    assert np.allclose(epw["AtmosPressure"], np.round(hourly["pressure"] * 100), atol=0.5)
+
+
+def testWriteEpwRejectsHalfHourlyRows():
+    plan = loadPlan(defPath)
+    halfHours = np.arange(2 * 8760)
+    columns = {"Year": np.full(len(halfHours), 2013.0), "Month": np.ones(len(halfHours)),
+               "Day": np.ones(len(halfHours)), "Hour": (halfHours // 2 % 24).astype(np.float64)}
+    with pytest.raises(ValueError):
+        writeEpw(os.devnull, plan, columns)
+
+
+def testWriteFlags(tmp_path, hourlyYear):
+    hourly, flags = hourlyYear
+    path = str(tmp_path / "RPLL.flags.csv")
+    gapfill.writeFlags(path, hourly, flags)
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0][:5] == ["Year", "Month", "Day", "Hour", "temperatureFlag"]
+    assert len(rows) == 8761
+    assert rows[24 + 7 + 1][:5] == ["2013", "1", "2", "8", str(gapfill.linear)]
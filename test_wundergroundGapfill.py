@@ -0,0 +1,71 @@
+# Tests of the gap filling of the hourly grid and its quality flags.
+# usage: python -m pytest -q test_wundergroundGapfill.py
+
+import numpy as np
+
+from wunderground_gapfill import (diurnal, fillCircularColumn, fillColumn, fillGaps, linear, nearest, observed,
+                                  unfilled)
+
+
+def dailyCycle(days=30):
+    hours = np.arange(24 * days)
+    return 27 + 4 * np.sin(2 * np.pi * hours / 24)
+
+
+def testShortGapsAreInterpolated():
+    values = np.arange(48, dtype=np.float64)
+    values[10:13] = np.nan
+    filled, flags = fillColumn(values, maxLinearGap=6)
+    assert np.array_equal(filled, np.arange(48))
+    assert list(flags[9:14]) == [observed, linear, linear, linear, observed]
+    assert (flags[:10] == observed).all() and (flags[13:] == observed).all()
+
+
+def testLongGapsFollowTheNeighbouringDays():
+    truth = dailyCycle()
+    values = truth.copy()
+    values[24 * 10 + 3:24 * 10 + 15] = np.nan
+    filled, flags = fillColumn(values, maxLinearGap=6)
+    assert (flags[24 * 10 + 3:24 * 10 + 15] == diurnal).all()
+    assert np.abs(filled - truth).max() < 1e-9
+
+
+def testGapsAtTheEndsHaveOneSide():
+    truth = dailyCycle()
+    values = truth.copy()
+    values[:3] = np.nan
+    filled, flags = fillColumn(values, maxLinearGap=6)
+    # too short for the profile to matter but open on one side: not linear
+    assert (flags[:3] == diurnal).all()
+    assert np.abs(filled[:3] - truth[:3]).max() < 1e-9
+
+
+def testNearestWhenNoDayHasTheHour():
+    values = np.full(24, np.nan)
+    values[0], values[23] = 10.0, 20.0
+    filled, flags = fillColumn(values, maxLinearGap=6)
+    assert (flags[1:23] == nearest).all()
+    assert np.allclose(filled[1:23], np.interp(np.arange(1, 23), [0, 23], [10.0, 20.0]))
+
+
+def testColumnsWithoutObservations():
+    filled, flags = fillColumn(np.full(48, np.nan))
+    assert np.isnan(filled).all() and (flags == unfilled).all()
+    filled, flags = fillColumn(np.ones(48))
+    assert (filled == 1).all() and (flags == observed).all()
+
+
+def testWindDirectionsAreFilledThroughNorth():
+    degrees = np.array([350.0, np.nan, np.nan, 10.0])
+    filled, flags = fillCircularColumn(degrees)
+    assert list(flags) == [observed, linear, linear, observed]
+    assert all(min(value, 360 - value) < 10 for value in filled[1:3])
+
+
+def testFillGapsKeepsTheTime():
+    hourly = {"time": np.arange(48) * 3600, "temperature": np.where(np.arange(48) == 5, np.nan, 20.0),
+              "windDirDegrees": np.full(48, 90.0)}
+    filled, flags = fillGaps(hourly)
+    assert filled["time"] is hourly["time"]
+    assert set(flags) == {"temperature", "windDirDegrees"}
+    assert flags["temperature"][5] == linear and filled["temperature"][5] == 20.0
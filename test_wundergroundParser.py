@@ -0,0 +1,30 @@
+# Tests of the DailyHistory parser.
+# usage: python -m pytest -q test_wundergroundParser.py
+
+import datetime
+
+import wunderground_parser as parser
+from wunderground_standin import dailyCsv
+
+day = datetime.date(2013, 1, 5)
+
+
+def testParseLines():
+    lines = [b"\n", b"TimePHT,TemperatureC,...<br />\n",
+             b"12:30 AM,26.0,21.0,74,1012,10.0,NNE,Calm,-,N/A,,Clear,20,2013-01-04 16:30:00<br />\n",
+             b"1:00 PM,-9999,21.0,N/A,1011,10.0,East,7.4,-,0.5,Rain,Rain,90,2013-01-05 05:00:00<br />\n",
+             b"2:00 PM,31.0,cut off\n"]
+    observations = list(parser.parseLines(lines, day))
+    assert len(observations) == 2
+    first, second = observations
+    assert first.time == datetime.datetime(2013, 1, 5, 0, 30)
+    assert first.windSpeed == 0.0 and first.humidity == 74 and first.gustSpeed is None
+    assert first.dateUtc == datetime.datetime(2013, 1, 4, 16, 30)
+    assert second.time == datetime.datetime(2013, 1, 5, 13, 0)
+    assert second.temperature is None and second.humidity is None and second.precipitation == 0.5
+
+
+def testParseLinesRowsRoundTrip():
+    observations = list(parser.parseLines(dailyCsv("RPLL", day).splitlines(True), day))
+    assert len(observations) == 48
+    assert [parser.fromRow(parser.toRow(obs)) for obs in observations] == observations
@@ -0,0 +1,51 @@
+# Tests of the resampling of irregular observations onto the hourly grid.
+# usage: python -m pytest -q test_wundergroundResample.py
+
+import datetime
+
+import numpy as np
+
+from wunderground_archive import missingInt, toSeconds
+from wunderground_resample import hourGrid, resampleHourly
+
+
+def seconds(*args):
+    return toSeconds(datetime.datetime(*args))
+
+
+def testGridHasAnHourForEveryHourOfTheYear():
+    assert len(hourGrid(2013)) == 8760
+    assert len(hourGrid(2016)) == 8784
+    assert hourGrid(2016)[0] == seconds(2016, 1, 1)
+    hourly = resampleHourly([seconds(2016, 12, 31, 23, 30)], {"temperature": [30.0]}, 2016)
+    assert len(hourly["temperature"]) == 8784
+    assert hourly["temperature"][-1] == 30.0
+
+
+def testAggregations():
+    times = [seconds(2013, 1, 1, 0, 5), seconds(2013, 1, 1, 0, 40), seconds(2013, 1, 1, 1, 50),
+             seconds(2013, 1, 1, 1, 20)]
+    columns = {
+        "temperature": np.array([20.0, 22.0, 30.0, np.nan]),
+        "precipitation": np.array([0.5, 1.0, np.nan, 2.0]),
+        "gustSpeed": np.array([10.0, 30.0, 20.0, 5.0]),
+        "pressure": np.array([1010.0, 1012.0, 1013.0, 1011.0]),
+        "windDirDegrees": np.array([350, 10, missingInt, 90], dtype=np.int16),
+    }
+    hourly = resampleHourly(times, columns, 2013)
+    assert hourly["temperature"][0] == 21.0 and hourly["temperature"][1] == 30.0
+    assert list(hourly["precipitation"][:2]) == [1.5, 2.0]
+    assert list(hourly["gustSpeed"][:2]) == [30.0, 20.0]
+    # the reading closest to the top of its hour: 00:05, and 01:20 rather than 01:50
+    assert list(hourly["pressure"][:2]) == [1010.0, 1011.0]
+    # 350 and 10 average to north, not south; the missing direction is left out
+    assert hourly["windDirDegrees"][0] == 0.0
+    assert hourly["windDirDegrees"][1] == 90.0
+    assert np.isnan(hourly["temperature"][2:]).all()
+
+
+def testObservationsOutsideTheYearAreIgnored():
+    times = [seconds(2012, 12, 31, 23, 30), seconds(2013, 1, 1, 0, 30), seconds(2014, 1, 1, 0, 30)]
+    hourly = resampleHourly(times, {"temperature": np.array([1.0, 2.0, 3.0])}, 2013)
+    assert hourly["temperature"][0] == 2.0
+    assert np.isnan(hourly["temperature"][1:]).all()
@@ -0,0 +1,73 @@
+# Tests of the day scheduler against the local stand-in server with injected failures.
+# usage: python -m pytest -q test_wundergroundScheduler.py
+
+import datetime
+import tempfile
+
+import pytest
+
+import wunderground_importer as importer
+from wunderground_cache import DayCache
+from wunderground_scheduler import AdaptiveLimit, Scheduler
+from wunderground_standin import StandinServer
+
+day = datetime.date(2013, 1, 5)
+
+
+def testAdaptiveLimit():
+    limit = AdaptiveLimit(start=4, maximum=8)
+    started = limit.acquire()
+    limit.release(started, None)
+    assert limit.limit == 4
+    started = limit.acquire()
+    limit.release(started, True)
+    assert limit.limit == 4.25
+    started = limit.acquire()
+    limit.release(started, False)
+    assert limit.limit == 2.125
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(seed=3).start()
+    yield server
+    server.stop()
+
+
+def fetchAll(server, days, maxAttempts=6):
+    cache = DayCache(tempfile.mkdtemp())
+    with importer.DayFetcher(server.url, maxWorkers=4, timeout=5) as fetcher:
+        scheduler = Scheduler(fetcher, maxAttempts=maxAttempts, baseDelay=0.001, maxDelay=0.01, seed=3)
+        observations = list(importer.observations(scheduler, cache, "RPLL", days))
+    return scheduler, cache, observations
+
+
+def testSchedulerRetriesServerFailures(server):
+    server.failureRate = 0.3
+    days = [day + datetime.timedelta(days=i) for i in range(20)]
+    scheduler, cache, observations = fetchAll(server, days)
+    assert server.failed > 0
+    assert all(status.ok for status in scheduler.statuses)
+    assert len(observations) == 20 * 48
+    assert cache.missing("RPLL", days) == []
+
+
+def testSchedulerRetriesTruncatedBodies(server):
+    server.truncateRate = 0.3
+    days = [day + datetime.timedelta(days=i) for i in range(20)]
+    scheduler, cache, observations = fetchAll(server, days)
+    assert server.truncated > 0
+    assert all(status.ok for status in scheduler.statuses)
+    assert len(observations) == 20 * 48
+
+
+def testSchedulerReportsDaysThatKeepFailing(server):
+    # every body is cut off: the day fails on its own instead of aborting the run, and nothing is cached
+    server.truncateRate = 1.0
+    scheduler, cache, observations = fetchAll(server, [day], maxAttempts=2)
+    status, = scheduler.statuses
+    assert not status.ok and status.attempts == 2 and "IncompleteRead" in status.error
+    assert observations == []
+    assert cache.missing("RPLL", [day]) == [day]
+    # broken bodies say nothing about the server's load
+    assert scheduler.limit.limit == 4
@@ -1,32 +1,137 @@
 # Deletes duplicated values in sequence
+# of consecutive rows with the same time (first column) only the last one is kept
+# usage: python wUnderground_dup_deleter.py [in.txt] [out.txt]
+#        python wUnderground_dup_deleter.py --batch "RPLL/*/try_DELETEEQUAL.txt" [--manifest files.txt] [--out-dir cleaned]
+#
+# in batch mode the files are cleaned in a process pool, each output goes to the same relative path
+# under --out-dir and a summary of every file is written to <out-dir>/summary.tsv
 
+import argparse
 import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-with open("try_DELETEEQUAL.txt", "r") as fileIn, open("try_DELETE_out.txt", "w") as fileOut:
 
-    fileIn = csv.reader(fileIn, delimiter = "\t")
-    #fileOut = csv.writer(fileOut)
-    allTimes = []
-    all = []
+def dropDuplicates(rows, key=lambda row: row[0]):
+    # compares every row to the one before it, so only two rows are ever held in memory
+    previous = None
+    for row in rows:
+        if previous is not None and key(row) != key(previous):
+            yield previous
+        previous = row
+    if previous is not None:
+        yield previous
 
-    for line in fileIn:
-        allTimes.append(line[0])
-        all.append(line)
 
-    ctr = 0
-    numOfDups = 0
+def deleteDuplicates(inPath, outPath):
+    # streams inPath to outPath, returns (rows in, rows out). The output is written next to outPath and renamed
+    # at the end, so outPath may be inPath and an interrupted run leaves no half written file
+    numIn = numOut = 0
 
-    for time in allTimes:
+    def rowsIn(fileIn):
+        nonlocal numIn
+        for line in csv.reader(fileIn, delimiter="\t"):
+            if line:
+                numIn += 1
+                yield line
 
-        if ctr == 11651:
-            ctr -= 1
+    tmp = outPath + ".tmp{}".format(os.getpid())
+    with open(inPath, "r", newline="") as fileIn, open(tmp, "w", newline="") as fileOut:
+        fileOut = csv.writer(fileOut, delimiter="\t")
+        for row in dropDuplicates(rowsIn(fileIn)):
+            fileOut.writerow(row)
+            numOut += 1
+    os.replace(tmp, outPath)
+    return numIn, numOut
 
-        elif time != allTimes[ctr + 1]:
-            #numOfDups += 1
-            #print(time)
-            fileOut.write(str(all[ctr]) + "\n")
 
-        ctr += 1
+def readManifest(path):
+    # one input path per line, relative to the manifest, blank lines and # comments are skipped
+    root = os.path.dirname(os.path.abspath(path))
+    with open(path) as file:
+        lines = [line.strip() for line in file]
+    return [os.path.join(root, line) for line in lines if line and not line.startswith("#")]
 
-    #print(allTimes.__len__())
-    print(numOfDups)
+
+def isInside(path, directory):
+    return os.path.commonpath([path, directory]) == directory
+
+
+def batchInputs(inPaths, outDir):
+    # the absolute, sorted inputs without the outputs of an earlier run: when outDir is inside the inputs' tree
+    # a recursive glob finds them too, and they would move the common directory the layout is mirrored from
+    inPaths = sorted(set(os.path.realpath(path) for path in inPaths))
+    outDir = os.path.realpath(outDir)
+    if inPaths:
+        root = os.path.commonpath([os.path.dirname(path) for path in inPaths])
+        if outDir != root and isInside(outDir, root):
+            inPaths = [path for path in inPaths if not isInside(path, outDir)]
+    return inPaths
+
+
+def batchOutputs(inPaths, outDir):
+    # inPaths are absolute. Mirror the inputs' layout below their common directory, so the same inputs always land in the same place
+    root = os.path.commonpath([os.path.dirname(path) for path in inPaths])
+    outPaths = [os.path.join(outDir, os.path.relpath(path, root)) for path in inPaths]
+    for inPath, outPath in zip(inPaths, outPaths):
+        if os.path.realpath(outPath) == inPath or os.path.exists(outPath) and os.path.samefile(inPath, outPath):
+            raise ValueError("{} would be written over its input, choose another --out-dir".format(outPath))
+    return outPaths
+
+
+def cleanFile(paths):
+    inPath, outPath = paths
+    os.makedirs(os.path.dirname(os.path.abspath(outPath)), exist_ok=True)
+    start = time.perf_counter()
+    numIn, numOut = deleteDuplicates(inPath, outPath)
+    return inPath, outPath, numIn, numIn - numOut, time.perf_counter() - start
+
+
+def batchClean(inPaths, outDir, workers=None):
+    # returns one (in, out, rows in, duplicates dropped, seconds) per file, in the order of inPaths
+    inPaths = batchInputs(inPaths, outDir)
+    if not inPaths:
+        return []
+    jobs = list(zip(inPaths, batchOutputs(inPaths, outDir)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summary = list(pool.map(cleanFile, jobs))
+
+    with open(os.path.join(outDir, "summary.tsv"), "w", newline="") as file:
+        fileOut = csv.writer(file, delimiter="\t")
+        fileOut.writerow(["input", "output", "rowsIn", "duplicatesDropped", "seconds"])
+        for inPath, outPath, numIn, numOfDups, elapsed in summary:
+            fileOut.writerow([inPath, outPath, numIn, numOfDups, "{:.3f}".format(elapsed)])
+    return summary
+
+
+if __name__ == "__main__":
+    if "--batch" not in sys.argv and "--manifest" not in sys.argv:
+        inPath = sys.argv[1] if len(sys.argv) > 1 else "try_DELETEEQUAL.txt"
+        outPath = sys.argv[2] if len(sys.argv) > 2 else "try_DELETE_out.txt"
+
+        numIn, numOut = deleteDuplicates(inPath, outPath)
+        numOfDups = numIn - numOut
+        print(numOfDups)
+        sys.exit()
+
+    argParser = argparse.ArgumentParser(description="Delete consecutive duplicated rows from many files")
+    argParser.add_argument("--batch", nargs="*", default=[], help="glob patterns of the files to clean")
+    argParser.add_argument("--manifest", action="append", default=[], help="file listing the files to clean")
+    argParser.add_argument("--out-dir", default="cleaned")
+    argParser.add_argument("--workers", type=int, default=None, help="processes, all cores by default")
+    args = argParser.parse_args()
+
+    inPaths = [path for pattern in args.batch for path in glob.glob(pattern, recursive=True)]
+    inPaths += [path for manifest in args.manifest for path in readManifest(manifest)]
+
+    start = time.perf_counter()
+    try:
+        summary = batchClean(inPaths, args.out_dir, args.workers)
+    except ValueError as e:
+        sys.exit(str(e))
+    for inPath, outPath, numIn, numOfDups, elapsed in summary:
+        print("{:>9} rows {:>7} dups {:>7.2f} s  {}".format(numIn, numOfDups, elapsed, outPath))
+    print("{} files in {:.2f} s".format(len(summary), time.perf_counter() - start))
@@ -0,0 +1,170 @@
+# Columnar archive of cleaned observations: every field is a fixed width typed column in one file,
+# opened with memory mapping, time is a sorted index column searched with binary search.
+#
+# file layout: magic, uint32 header length, JSON header, then each column aligned to 8 bytes
+# usage: python wunderground_archive.py <station> <cleaned.tsv> <out.wuarc>
+
+import csv
+import datetime
+import json
+import struct
+import sys
+
+import numpy as np
+
+import wunderground_parser as parser
+
+magic = b"WUARC1\n"
+epoch = datetime.datetime(1970, 1, 1)
+
+# name, dtype, Observation field it is filled from (None for the columns built separately)
+columns = [
+    ("time", "<i8", None),              # local standard time, seconds since 1970-01-01
+    ("station", "<i2", None),           # index into header["stations"]
+    ("temperature", "<f4", "temperature"),
+    ("dewPoint", "<f4", "dewPoint"),
+    ("humidity", "<i2", "humidity"),
+    ("pressure", "<f4", "pressure"),
+    ("visibility", "<f4", "visibility"),
+    ("windSpeed", "<f4", "windSpeed"),
+    ("gustSpeed", "<f4", "gustSpeed"),
+    ("precipitation", "<f4", "precipitation"),
+    ("windDirDegrees", "<i2", "windDirDegrees"),
+    ("conditions", "<i2", None),        # index into header["conditions"]
+]
+
+# missing readings are NaN in float columns and this in integer columns
+missingInt = -1
+
+
+def toSeconds(time):
+    return int((time - epoch).total_seconds())
+
+
+def writeArchive(path, observations, station):
+    # observations is one or more (station, observations) pairs when station is None
+    sources = [(station, observations)] if station is not None else observations
+
+    stations, conditions, conditionCodes = [], [], {}
+    values = dict((name, []) for name, dtype, field in columns)
+    utcOffset = None
+
+    for station, stationObservations in sources:
+        stations.append(station)
+        stationCode = len(stations) - 1
+        for obs in stationObservations:
+            if utcOffset is None:
+                utcOffset = toSeconds(obs.time) - toSeconds(obs.dateUtc)
+            if obs.conditions not in conditionCodes:
+                conditionCodes[obs.conditions] = len(conditions)
+                conditions.append(obs.conditions)
+            values["time"].append(toSeconds(obs.time))
+            values["station"].append(stationCode)
+            values["conditions"].append(conditionCodes[obs.conditions])
+            for name, dtype, field in columns:
+                if field is None:
+                    continue
+                value = getattr(obs, field)
+                if value is None:
+                    value = np.nan if dtype[1] == "f" else missingInt
+                values[name].append(value)
+
+    order = np.argsort(np.array(values["time"], dtype="<i8"), kind="stable")
+    header = {"stations": stations, "conditions": conditions, "utcOffset": utcOffset or 0}
+    arrays = [(name, np.array(values[name], dtype=dtype)[order]) for name, dtype, field in columns]
+    writeColumnFile(path, magic, header, arrays)
+
+
+def writeColumnFile(path, magic, header, arrays):
+    # magic, uint32 header length, JSON header, then every (name, array) as an 8-byte aligned block.
+    # header gets "rows" and "columns" (name, dtype, offset) added
+    header = dict(header, rows=len(arrays[0][1]) if arrays else 0, columns=[])
+    offset = 0
+    for name, array in arrays:
+        header["columns"].append({"name": name, "dtype": array.dtype.str, "offset": offset})
+        offset += array.nbytes + (-array.nbytes % 8)
+
+    headerBytes = json.dumps(header).encode("utf-8")
+    start = len(magic) + 4 + len(headerBytes)
+    headerBytes += b" " * (-start % 8)
+
+    with open(path, "wb") as file:
+        file.write(magic)
+        file.write(struct.pack("<I", len(headerBytes)))
+        file.write(headerBytes)
+        for name, array in arrays:
+            file.write(array.tobytes())
+            file.write(b"\0" * (-array.nbytes % 8))
+
+
+def readHeader(path, magic):
+    # (header, offset of the first column), or (None, None) when path is not a file of this kind
+    with open(path, "rb") as file:
+        if file.read(len(magic)) != magic:
+            return None, None
+        headerLength = struct.unpack("<I", file.read(4))[0]
+        return json.loads(file.read(headerLength).decode("utf-8")), len(magic) + 4 + headerLength
+
+
+def mapColumns(path, header, start):
+    # {name: read-only array} views on one memory map of path, nothing is read until it is used
+    memoryMap = np.memmap(path, dtype=np.uint8, mode="r")
+    return dict((column["name"], np.ndarray(header["rows"], dtype=column["dtype"], buffer=memoryMap,
+                                            offset=start + column["offset"]))
+                for column in header["columns"])
+
+
+class Archive:
+    # Opening only reads the header, columns are views on the memory map and are paged in on access
+
+    def __init__(self, path):
+        self.header, start = readHeader(path, magic)
+        if self.header is None:
+            raise ValueError(path + " is not a weather archive")
+
+        self.path = path
+        self.stations = self.header["stations"]
+        self.conditions = self.header["conditions"]
+        self.rows = self.header["rows"]
+        self.columns = mapColumns(path, self.header, start)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def span(self, start, end):
+        # the row slice with start <= time < end, start and end are datetimes or seconds
+        if isinstance(start, datetime.datetime):
+            start = toSeconds(start)
+        if isinstance(end, datetime.datetime):
+            end = toSeconds(end)
+        time = self.columns["time"]
+        return slice(int(np.searchsorted(time, start, "left")), int(np.searchsorted(time, end, "left")))
+
+    def between(self, start, end, names=None, station=None):
+        # {name: column} for start <= time < end, optionally for a single station
+        rows = self.span(start, end)
+        selected = dict((name, self.columns[name][rows]) for name in (names or self.columns))
+        if station is not None:
+            keep = self.columns["station"][rows] == self.stations.index(station)
+            selected = dict((name, column[keep]) for name, column in selected.items())
+        return selected
+
+    def times(self, rows=slice(None)):
+        return self.columns["time"][rows].astype("datetime64[s]")
+
+
+def readCleaned(path):
+    with open(path, "r", newline="") as fileIn:
+        for row in csv.reader(fileIn, delimiter="\t"):
+            if row:
+                yield parser.fromRow(row)
+
+
+if __name__ == "__main__":
+    station, inPath, outPath = sys.argv[1:4]
+    writeArchive(outPath, readCleaned(inPath), station)
+    archive = Archive(outPath)
+    print("{} rows, {} to {}".format(len(archive), archive.times()[0], archive.times()[-1]))
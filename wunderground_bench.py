@@ -0,0 +1,122 @@
+# Benchmarks the fetch -> dedup -> EPW pipeline against the local stand-in server
+# usage: python wunderground_bench.py [--years 2013 2014] [--latency 0.02] [--rows 48] [--dups 0.05] ...
+#
+# every stage is timed on its own and reports days/s and rows/s, so a regression shows up here before
+# it shows up in a production backfill. --trace-memory adds the peak Python memory of every stage
+# (tracemalloc slows the stages down, so the timings of a traced run are not comparable)
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+try:
+    import resource
+except ImportError:
+    # not on Windows
+    resource = None
+
+import wunderground_importer as importer
+import wunderground_parser as parser
+from wUnderground_dup_deleter import deleteDuplicates
+from wunderground_archive import readCleaned
+from wunderground_cache import DayCache
+from wunderground_defPlan import loadPlan
+from wunderground_epwWriter import columnsFromHourly, hourlyFromObservations, writeEpw
+from wunderground_scheduler import Scheduler
+from wunderground_standin import StandinServer
+
+defPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wunderGroundToEPW_def.def")
+
+
+def sequentialFetch(url, station, days):
+    # the original importer: one urlopen (and one new connection) per day, one after another
+    for day in days:
+        yield day, urllib.request.urlopen(url + importer.dayPath(station, day)).read()
+
+
+def fetchStage(url, station, days, workDir, maxWorkers):
+    # download, parse and cache every day, writing the cleaning stage input
+    cache = DayCache(os.path.join(workDir, "cache"))
+    rows = 0
+    with open(os.path.join(workDir, "try_DELETEEQUAL.txt"), "w", newline="") as file, \
+            importer.DayFetcher(url, maxWorkers) as fetcher:
+        fileOut = csv.writer(file, delimiter="\t")
+        for obs in importer.observations(Scheduler(fetcher), cache, station, days):
+            fileOut.writerow(parser.toRow(obs))
+            rows += 1
+    return rows
+
+
+def dedupStage(workDir):
+    return deleteDuplicates(os.path.join(workDir, "try_DELETEEQUAL.txt"), os.path.join(workDir, "try_DELETE_out.txt"))[1]
+
+
+def epwStage(workDir, years):
+    # what wunderground_epwWriter.py does with the cleaned rows: resample, gap fill and write one EPW per year
+    plan = loadPlan(defPath)
+    observations = list(readCleaned(os.path.join(workDir, "try_DELETE_out.txt")))
+    rows = 0
+    for year in years:
+        hourly, flags = hourlyFromObservations(observations, year)
+        rows += writeEpw(os.path.join(workDir, "{}.epw".format(year)), plan, columnsFromHourly(plan, hourly))
+    return rows
+
+
+def maxResidentMB():
+    # ru_maxrss is in kB on Linux, in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2.0 ** 20 if sys.platform == "darwin" else maxrss / 2.0 ** 10
+
+
+def timeStage(name, numDays, stage, *args):
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    rows = stage(*args)
+    elapsed = time.perf_counter() - start
+    peak = "{:>8.1f} MB peak".format(tracemalloc.get_traced_memory()[1] / 1e6) if tracemalloc.is_tracing() else ""
+    print("{:<12} {:>8.2f} s {:>10.1f} days/s {:>10.0f} rows/s {:>9} rows {}".format(
+        name, elapsed, numDays / elapsed, rows / elapsed, rows, peak))
+    return elapsed
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Benchmark the wunderground ingest pipeline")
+    argParser.add_argument("--station", default=importer.station)
+    argParser.add_argument("--years", type=int, nargs="+", default=[importer.year])
+    argParser.add_argument("--latency", type=float, default=0.02, help="seconds the server takes per day")
+    argParser.add_argument("--rows", type=int, default=48, help="observations per day")
+    argParser.add_argument("--dups", type=float, default=0.05, help="chance an observation is repeated")
+    argParser.add_argument("--workers", type=int, default=importer.maxWorkers)
+    argParser.add_argument("--sequential", action="store_true", help="also time the original one-by-one fetch")
+    argParser.add_argument("--trace-memory", action="store_true", help="report the peak memory of every stage")
+    args = argParser.parse_args()
+
+    days = [day for year in args.years for day in importer.dayDates(year)]
+    server = StandinServer(latency=args.latency, rowsPerDay=args.rows, duplicateRate=args.dups).start()
+    workDir = tempfile.mkdtemp(prefix="wunderground_bench_")
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        print("{} days of {}, {} rows/day, {:.0%} duplicates, {} s latency, {} workers".format(
+            len(days), args.station, args.rows, args.dups, args.latency, args.workers))
+        if args.sequential:
+            timeStage("sequential", len(days), lambda: sum(body.count(b"<br />") - 1 for day, body in
+                                                           sequentialFetch(server.url, args.station, days)))
+
+        total = timeStage("fetch", len(days), fetchStage, server.url, args.station, days, workDir, args.workers)
+        total += timeStage("dedup", len(days), dedupStage, workDir)
+        total += timeStage("epw", len(days), epwStage, workDir, args.years)
+        print("{:<12} {:>8.2f} s {:>10.1f} days/s".format("pipeline", total, len(days) / total))
+        if resource is not None:
+            print("max resident {:.1f} MB".format(maxResidentMB()))
+    finally:
+        tracemalloc.stop()
+        server.stop()
+        shutil.rmtree(workDir)
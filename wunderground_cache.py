@@ -0,0 +1,56 @@
+# On-disk cache of DailyHistory responses, one gzip file per station and day
+# layout: <root>/<station>/<year>/<month>-<day>.csv.gz
+
+import datetime
+import gzip
+import os
+import time
+
+cacheRoot = "wunderground_cache"
+
+
+class DayCache:
+    # A day fetched before it was over (plus settleDays for late reports) is partial and expires
+    # after partialMaxAge seconds. Complete days never expire unless maxAge is given.
+
+    def __init__(self, root=cacheRoot, maxAge=None, partialMaxAge=3600, settleDays=1):
+        self.root = root
+        self.maxAge = maxAge
+        self.partialMaxAge = partialMaxAge
+        self.settleDays = settleDays
+
+    def path(self, station, day):
+        return os.path.join(self.root, station, str(day.year), "{:02d}-{:02d}.csv.gz".format(day.month, day.day))
+
+    def isFresh(self, station, day, now=None):
+        try:
+            fetched = os.path.getmtime(self.path(station, day))
+        except OSError:
+            return False
+
+        age = (now or time.time()) - fetched
+        if self.maxAge is not None and age > self.maxAge:
+            return False
+        settled = day + datetime.timedelta(days=self.settleDays + 1)
+        if datetime.date.fromtimestamp(fetched) < settled and age > self.partialMaxAge:
+            return False
+        return True
+
+    def missing(self, station, days):
+        # the days that have to be (re)fetched, in the order given
+        now = time.time()
+        return [day for day in days if not self.isFresh(station, day, now)]
+
+    def open(self, station, day):
+        # decompresses while it is read, iterating gives the raw lines
+        return gzip.open(self.path(station, day), "rb")
+
+    def put(self, station, day, body):
+        path = self.path(station, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write next to the target and rename, so an interrupted run never leaves a truncated day behind
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as file:
+            file.write(body)
+        os.replace(tmp, path)
+
@@ -0,0 +1,158 @@
+# Parses weather converter .def files (Fortran namelists such as wunderGroundToEPW_def.def) once into a
+# validated column plan: for every used input column its index, the EPW field it fills and the scale and
+# offset that convert it, as arrays. Projecting a delimited file is then a gather and one multiply-add
+# per column, with no per-row name lookups.
+
+import csv
+import os
+import re
+
+import numpy as np
+
+# DataElements names (lower case, without spaces) -> EPW field
+elementFields = {
+    "drybulb": "DryBulb", "dewpoint": "DewPoint", "relhum": "RelHum", "atmospressure": "AtmosPressure",
+    "visibility": "Visibility", "windspd": "WindSpd", "winddir": "WindDir",
+    "year": "Year", "month": "Month", "day": "Day", "hour": "Hour",
+}
+
+# EPW field -> {DataUnits after the conversion factor: (scale, offset) to the EPW unit}
+fieldUnits = {
+    "DryBulb": {"C": (1.0, 0.0), "F": (5.0 / 9, -32 * 5.0 / 9), "K": (1.0, -273.15)},
+    "DewPoint": {"C": (1.0, 0.0), "F": (5.0 / 9, -32 * 5.0 / 9), "K": (1.0, -273.15)},
+    "RelHum": {"%": (1.0, 0.0)},
+    "AtmosPressure": {"Pa": (1.0, 0.0), "kPa": (1000.0, 0.0), "hPa": (100.0, 0.0), "mbar": (100.0, 0.0)},
+    "Visibility": {"km": (1.0, 0.0), "m": (0.001, 0.0), "mi": (1.609344, 0.0)},
+    "WindSpd": {"m/s": (1.0, 0.0), "km/h": (1 / 3.6, 0.0), "kn": (0.514444, 0.0), "mph": (0.44704, 0.0)},
+    "WindDir": {"deg": (1.0, 0.0)},
+    "Year": {"x": (1.0, 0.0)}, "Month": {"x": (1.0, 0.0)}, "Day": {"x": (1.0, 0.0)}, "Hour": {"x": (1.0, 0.0)},
+}
+
+requiredFields = ["Year", "Month", "Day", "Hour"]
+
+
+def parseValue(value):
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def parseNamelist(text):
+    # {group: {key: value or list of values}}. Groups run from &name to a line with only "/",
+    # "!" starts a comment, a value list may continue on the next lines
+    text = re.sub(r"!.*", "", text)
+    groups = {}
+    for name, body in re.findall(r"&(\w+)(.*?)^\s*/", text, re.S | re.M):
+        group = groups.setdefault(name.lower(), {})
+        # every "key=" starts a new entry, everything up to the next one is its value
+        parts = re.split(r"(?:^|[\s,])(\w+)\s*=", body)
+        for key, value in zip(parts[1::2], parts[2::2]):
+            # split on the commas outside quotes, DelimiterChar=',' is a single value
+            values = [parseValue(v) for v in re.findall(r"'[^']*'|\"[^\"]*\"|[^,\n]+", value) if v.strip()]
+            group[key] = values if len(values) != 1 else values[0]
+    return groups
+
+
+def asList(value):
+    return value if isinstance(value, list) else [value]
+
+
+class ColumnPlan:
+    # everything needed to turn one delimited weather file into EPW columns
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.location = settings.get("location", {})
+        self.misc = settings.get("miscdata", {})
+        wthdata = settings.get("wthdata", {})
+        control = settings.get("datacontrol", {})
+
+        problems = []
+        elements = asList(wthdata.get("DataElements", []))
+        units = asList(wthdata.get("DataUnits", []))
+        factors = asList(wthdata.get("DataConversionFactors", [1] * len(elements)))
+        if not elements:
+            problems.append("&wthdata has no DataElements")
+        if len(units) != len(elements):
+            problems.append("{} DataUnits for {} DataElements".format(len(units), len(elements)))
+        if len(factors) != len(elements):
+            problems.append("{} DataConversionFactors for {} DataElements".format(len(factors), len(elements)))
+        if wthdata.get("NumInHour", 1) != 1:
+            problems.append("only NumInHour=1 is supported, not {}".format(wthdata.get("NumInHour")))
+        if str(wthdata.get("InFormat", "DELIMITED")).upper() != "DELIMITED":
+            problems.append("only InFormat='DELIMITED' is supported")
+
+        indexes, fields, scales, offsets = [], [], [], []
+        for i, element in enumerate(elements):
+            name = str(element).lower().replace(" ", "")
+            if name == "ignore":
+                continue
+            field = elementFields.get(name)
+            if field is None:
+                problems.append("unknown DataElement '{}' (column {})".format(element, i + 1))
+                continue
+            if field in fields:
+                problems.append("'{}' is mapped twice".format(element))
+                continue
+            unit = str(units[i]) if i < len(units) else "x"
+            if unit not in fieldUnits[field]:
+                problems.append("unknown unit '{}' for {}, expected one of {}".format(
+                    unit, element, ", ".join(sorted(fieldUnits[field]))))
+                continue
+            unitScale, unitOffset = fieldUnits[field][unit]
+            factor = float(factors[i]) if i < len(factors) else 1.0
+            indexes.append(i)
+            fields.append(field)
+            scales.append(factor * unitScale)
+            offsets.append(unitOffset)
+
+        for field in requiredFields:
+            if field not in fields:
+                problems.append("DataElements has no {} column".format(field))
+        if problems:
+            raise ValueError("invalid .def file:\n  " + "\n  ".join(problems))
+
+        self.fields = fields
+        self.indexes = np.array(indexes, dtype=np.intp)
+        self.scales = np.array(scales, dtype=np.float64)
+        self.offsets = np.array(offsets, dtype=np.float64)
+        self.elements = elements
+        self.delimiter = str(wthdata.get("DelimiterChar", ","))
+        self.skip = int(control.get("NumRecordsToSkip", 0))
+        self.maxRecords = control.get("MaxNumRecordsToRead", None)
+
+    def project(self, rows):
+        # rows: lists of strings -> {EPW field: float64 column}, empty cells are NaN
+        rows = rows[self.skip:self.skip + self.maxRecords if self.maxRecords else None]
+        width = int(self.indexes.max()) + 1
+        table = np.array([row[:width] + [""] * (width - len(row)) for row in rows], dtype=object)
+        raw = table[:, self.indexes] if len(rows) else np.empty((0, len(self.indexes)), dtype=object)
+        raw[(raw == "") | (raw == "nan")] = "nan"
+        values = raw.astype(np.float64) * self.scales + self.offsets
+        return dict((field, values[:, i]) for i, field in enumerate(self.fields))
+
+    def read(self, path):
+        with open(path, newline="") as file:
+            rows = [row for row in csv.reader(file, delimiter=self.delimiter) if row]
+        return self.project(rows)
+
+
+planCache = {}
+
+
+def loadPlan(path):
+    # parsed and validated once per file version, later calls reuse the compiled plan
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in planCache:
+        with open(path) as file:
+            planCache[key] = ColumnPlan(parseNamelist(file.read()))
+    return planCache[key]
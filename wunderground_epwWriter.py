@@ -0,0 +1,154 @@
+# Writes EPW weather files straight from the delimited hourly data described by wunderGroundToEPW_def.def,
+# instead of going through the weather converter.
+#
+# &location fills the LOCATION header, the column plan of wunderground_defPlan.py says which input column
+# is which EPW field and how to convert it. Solar and sky fields are not in the input and are written
+# as missing. The cleaned, tab separated observations of wUnderground_dup_deleter.py are half hourly with
+# special reports in between, they are resampled onto the hour grid (wunderground_resample.py) and gap
+# filled (wunderground_gapfill.py) first, an EPW file has exactly one record per hour of the year. The
+# quality flags of the gap filling (observed, linear, diurnal, nearest, unfilled) go to <name>.flags.csv next
+# to the EPW, so filled hours can be told apart from observed ones.
+# usage: python wunderground_epwWriter.py <file.def> <cleaned.tsv> [<cleaned.tsv> ...]
+#        (writes <cleaned>.epw and <cleaned>.flags.csv)
+
+import calendar
+import datetime
+import os
+import sys
+
+import numpy as np
+
+from ep_epwCache import epwFields
+from wunderground_archive import readCleaned, toSeconds
+from wunderground_defPlan import loadPlan
+from wunderground_gapfill import fillGaps, observed, writeFlags
+from wunderground_parser import Observation
+from wunderground_resample import defaultAggregations, resampleHourly
+
+# how many decimals each written field gets
+decimals = {"DryBulb": 1, "DewPoint": 1, "WindSpd": 1, "Visibility": 1}
+
+
+def columnsFromHourly(plan, hourly):
+    # the columns plan.read gives for a delimited file, taken from a resampled (and gap filled) hourly
+    # grid instead. The first DataElements are the wunderground columns in Observation order,
+    # see wunderground_parser.toRow
+    stamps = hourly["time"].astype("datetime64[s]")
+    dates = {
+        "Year": stamps.astype("datetime64[Y]").astype(int) + 1970,
+        "Month": stamps.astype("datetime64[M]").astype(int) % 12 + 1,
+        "Day": (stamps.astype("datetime64[D]") - stamps.astype("datetime64[M]")).astype(int) + 1,
+        "Hour": (stamps.astype("datetime64[h]") - stamps.astype("datetime64[D]")).astype(int),
+    }
+
+    columns = {}
+    for index, field, scale, offset in zip(plan.indexes, plan.fields, plan.scales, plan.offsets):
+        if field in dates:
+            columns[field] = dates[field].astype(np.float64)
+        elif index < len(Observation._fields) and Observation._fields[index] in hourly:
+            columns[field] = hourly[Observation._fields[index]] * scale + offset
+    return columns
+
+
+def hourlyFromCleaned(path, year=None):
+    # the cleaned rows of one station resampled onto the hour grid of year (by default the year most of
+    # them fall in) and gap filled: ({field: array} for columnsFromHourly, {field: flags})
+    observations = list(readCleaned(path))
+    if not observations:
+        raise ValueError("no observations in " + path)
+    return hourlyFromObservations(observations, year)
+
+
+def hourlyFromObservations(observations, year=None):
+    # the same for observations that are already parsed, e.g. read once for several years
+    if year is None:
+        years = [obs.time.year for obs in observations]
+        year = max(set(years), key=years.count)
+    times = [toSeconds(obs.time) for obs in observations]
+    columns = dict((name, np.array([np.nan if getattr(obs, name) is None else getattr(obs, name)
+                                    for obs in observations], dtype=np.float64))
+                   for name in defaultAggregations)
+    return fillGaps(resampleHourly(times, columns, year))
+
+
+def checkHours(year, month, day, hour):
+    # an EPW file is one record for every hour of one year, in order; hour is the hour ending 1-24
+    stamps = np.array(["{:04d}-{:02d}-{:02d}".format(y, m, d) for y, m, d in zip(year, month, day)],
+                      dtype="datetime64[h]") + (hour - 1)
+    expected = 8784 if calendar.isleap(int(year[0])) else 8760
+    if len(stamps) != expected:
+        raise ValueError("{} records, an EPW file of {} needs {}, resample the observations to hours "
+                         "first (wunderground_resample.py)".format(len(stamps), year[0], expected))
+    first = np.datetime64("{:04d}-01-01T00".format(int(year[0])))
+    steps = np.diff(stamps).astype(int)
+    if stamps[0] != first or (steps != 1).any():
+        at = 0 if stamps[0] != first else int(np.flatnonzero(steps != 1)[0]) + 1
+        raise ValueError("record {} ({}) breaks the consecutive hours from {}".format(at + 1, stamps[at], first))
+
+
+def writeEpw(path, plan, columns):
+    location = plan.location
+    misc = plan.misc
+    year = columns["Year"].astype(int)
+    month = columns["Month"].astype(int)
+    day = columns["Day"].astype(int)
+    hour = columns["Hour"].astype(int)
+    if hour.min() == 0:
+        # local clock hours 0-23, EPW hours are the hour ending 1-24
+        hour = hour + 1
+    checkHours(year, month, day, hour)
+    numRows = len(year)
+
+    first = datetime.date(year[0], month[0], day[0])
+    last = datetime.date(year[-1], month[-1], day[-1])
+    leap = "Yes" if calendar.isleap(int(year[0])) else "No"
+
+    # build every field as a column of strings, then join the rows once
+    text = []
+    for name, missing in epwFields:
+        if name in ("Year", "Month", "Day"):
+            text.append({"Year": year, "Month": month, "Day": day}[name].astype(str))
+        elif name == "Hour":
+            text.append(hour.astype(str))
+        elif name == "Minute":
+            text.append(np.full(numRows, "60"))
+        elif name == "DataSource":
+            text.append(np.full(numRows, "?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9?9?9"))
+        elif name in columns:
+            values = columns[name]
+            if name == "WindDir":
+                values = np.mod(values, 360)
+            places = decimals.get(name, 0)
+            formatted = np.char.mod("%.{}f".format(places), np.round(values, places))
+            text.append(np.where(np.isnan(values), str(missing), formatted))
+        else:
+            text.append(np.full(numRows, str(missing)))
+
+    with open(path, "w", newline="") as file:
+        file.write("LOCATION,{},{},{},{},{},{},{},{:.1f},{}\n".format(
+            location.get("City", ""), location.get("StateProv", ""), location.get("Country", ""),
+            "Custom", location.get("InWMO", ""), location.get("InLat", 0), location.get("InLong", 0),
+            float(location.get("InTime", 0)), location.get("InElev", 0)))
+        file.write("DESIGN CONDITIONS,0\n")
+        file.write("TYPICAL/EXTREME PERIODS,0\n")
+        file.write("GROUND TEMPERATURES,0\n")
+        file.write("HOLIDAYS/DAYLIGHT SAVINGS,{},0,0,0\n".format(leap))
+        file.write("COMMENTS 1,{}\n".format(misc.get("Comments1", "")))
+        file.write("COMMENTS 2,{}\n".format(misc.get("Comments2", "")))
+        file.write("DATA PERIODS,1,1,Data,{},{}/{},{}/{}\n".format(
+            calendar.day_name[first.weekday()], first.month, first.day, last.month, last.day))
+        file.write("\n".join(",".join(row) for row in zip(*[column.tolist() for column in text])))
+        file.write("\n")
+    return numRows
+
+
+if __name__ == "__main__":
+    plan = loadPlan(sys.argv[1])
+    for inPath in sys.argv[2:]:
+        outPath = os.path.splitext(inPath)[0] + ".epw"
+        hourly, flags = hourlyFromCleaned(inPath)
+        numRows = writeEpw(outPath, plan, columnsFromHourly(plan, hourly))
+        flagsPath = os.path.splitext(inPath)[0] + ".flags.csv"
+        writeFlags(flagsPath, hourly, flags)
+        filled = ", ".join("{} {}".format(name, int((values != observed).sum())) for name, values in flags.items())
+        print("{} hours -> {}, filled hours: {} -> {}".format(numRows, outPath, filled, flagsPath))
@@ -0,0 +1,142 @@
+# Fills the hours without observations left by wunderground_resample.py, whole columns at a time.
+#
+# short gaps (up to maxLinearGap hours) are linearly interpolated. Longer gaps follow the diurnal profile
+# of the neighbouring days (the mean of the same hour on the days around it), shifted so it joins the
+# observed values at both ends of the gap. Every value gets a quality flag, see below.
+# usage: python wunderground_gapfill.py <hourly.csv> <out.csv>
+
+import csv
+import datetime
+import sys
+
+import numpy as np
+
+# quality flags
+observed = 0
+linear = 1
+diurnal = 2
+nearest = 3         # no neighbouring day had the hour, or the gap touches the start or end of the year
+unfilled = 9        # the column has no observations at all
+
+# fields that are angles and are filled through their sine and cosine
+circularFields = {"windDirDegrees"}
+
+
+def gapLengths(missing):
+    # the length of the run of missing hours every hour belongs to (0 for observed hours)
+    edges = np.diff(np.concatenate(([0], missing.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    lengths = np.zeros(len(missing), dtype=np.int64)
+    runs = np.zeros(len(missing) + 1, dtype=np.int64)
+    runs[starts] += ends - starts
+    runs[ends] -= ends - starts
+    lengths[missing] = np.cumsum(runs)[:-1][missing]
+    return lengths, starts, ends
+
+
+def diurnalProfile(values, days=7):
+    # mean of the same hour on up to `days` days before and after, ignoring missing hours
+    n = len(values)
+    shifted = np.full((2 * days, n), np.nan)
+    # a series shorter than the window (e.g. a partial year) only has the days it has
+    for k in range(1, min(days, (n - 1) // 24) + 1):
+        shifted[2 * k - 2, 24 * k:] = values[:n - 24 * k]
+        shifted[2 * k - 1, :n - 24 * k] = values[24 * k:]
+    counts = np.sum(~np.isnan(shifted), axis=0)
+    sums = np.nansum(shifted, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def fillColumn(values, maxLinearGap=6, days=7):
+    # returns (filled values, flags)
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    flags = np.where(missing, unfilled, observed).astype(np.int8)
+    if not missing.any() or missing.all():
+        return values.copy(), flags
+
+    hours = np.arange(len(values))
+    known = ~missing
+    lengths, starts, ends = gapLengths(missing)
+
+    # gaps that run into the start or end of the year have only one side to interpolate from
+    open_ = np.zeros(len(values), dtype=bool)
+    if starts[0] == 0:
+        open_[:ends[0]] = True
+    if ends[-1] == len(values):
+        open_[starts[-1]:] = True
+
+    filled = values.copy()
+    interpolated = np.interp(hours, hours[known], values[known])
+
+    short = missing & (lengths <= maxLinearGap) & ~open_
+    filled[short] = interpolated[short]
+    flags[short] = linear
+
+    long_ = missing & ~short
+    profile = diurnalProfile(values, days)
+    # the profile is shifted by the interpolated difference between observation and profile at the gap ends
+    residualKnown = known & ~np.isnan(profile)
+    if residualKnown.any():
+        residual = np.interp(hours, hours[residualKnown], (values - profile)[residualKnown])
+        useProfile = long_ & ~np.isnan(profile)
+        filled[useProfile] = profile[useProfile] + np.where(open_[useProfile], 0.0, residual[useProfile])
+        flags[useProfile] = diurnal
+        long_ &= ~useProfile
+
+    filled[long_] = interpolated[long_]
+    flags[long_] = nearest
+    return filled, flags
+
+
+def fillCircularColumn(degrees, maxLinearGap=6, days=7):
+    radians = np.deg2rad(np.asarray(degrees, dtype=np.float64))
+    sines, flags = fillColumn(np.sin(radians), maxLinearGap, days)
+    cosines, flags = fillColumn(np.cos(radians), maxLinearGap, days)
+    filled = np.round(np.rad2deg(np.arctan2(sines, cosines)), 6) % 360.0
+    return np.where(np.isnan(sines), np.nan, filled), flags
+
+
+def fillGaps(hourly, maxLinearGap=6, days=7):
+    # hourly: {field: array} as returned by resampleHourly. Returns ({field: filled}, {field: flags})
+    filled, flags = {}, {}
+    for name, values in hourly.items():
+        if name == "time":
+            filled[name] = values
+            continue
+        fill = fillCircularColumn if name in circularFields else fillColumn
+        filled[name], flags[name] = fill(values, maxLinearGap, days)
+    return filled, flags
+
+
+def writeFlags(path, hourly, flags):
+    # the flag of every filled field and hour, after Year, Month, Day and Hour (ending 1-24) like writeHourly
+    fields = [name for name in hourly if name in flags]
+    stamps = hourly["time"].astype("datetime64[s]").astype(datetime.datetime)
+    with open(path, "w", newline="") as file:
+        fileOut = csv.writer(file)
+        fileOut.writerow(["Year", "Month", "Day", "Hour"] + [name + "Flag" for name in fields])
+        for i, stamp in enumerate(stamps):
+            fileOut.writerow([stamp.year, stamp.month, stamp.day, stamp.hour + 1] +
+                             [int(flags[name][i]) for name in fields])
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], newline="") as file:
+        rows = list(csv.reader(file))
+    header, rows = rows[0], rows[1:]
+    fields = header[4:]
+    hourly = dict((name, np.array([float(row[4 + i]) if row[4 + i] else np.nan for row in rows]))
+                  for i, name in enumerate(fields))
+    filled, flags = fillGaps(hourly)
+
+    with open(sys.argv[2], "w", newline="") as file:
+        fileOut = csv.writer(file)
+        fileOut.writerow(header[:4] + fields + [name + "Flag" for name in fields])
+        for i, row in enumerate(rows):
+            fileOut.writerow(row[:4] + ["" if np.isnan(filled[name][i]) else round(float(filled[name][i]), 2)
+                                        for name in fields] + [int(flags[name][i]) for name in fields])
+    for name in fields:
+        print("{:<16} {}".format(name, np.bincount(flags[name], minlength=10)[[observed, linear, diurnal, nearest,
+                                                                                 unfilled]]))
@@ -1,34 +1,190 @@
-import urllib.request
+# Downloads the daily observation history (DailyHistory.html?format=1) of a station from wunderground
 
-x, y = 13, 32
+import csv
+import datetime
+import http.client
+import sys
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
-with open("pythonfromwebVER2.txt", "w") as file:
-    #zz = file.readlines()
-    #print(zz)
-    for i in range(x):
-        for j in range(y):
-            if i == 0 or j ==0:
-                continue
+import wunderground_parser as parser
+from wunderground_cache import DayCache
 
-            elif i == 2 and (j == 29 or j == 30 or j == 31): #Feb28
-                continue
+baseUrl = "https://www.wunderground.com"
+station, year = "RPLL", 2013
+maxWorkers = 8
 
-            elif i == 4 and (j == 31): #Apr30 (Apr = 4)
-                continue
 
-            elif i == 6 and (j == 31): #Jun30 (Jun = 6)
+def dayDates(year):
+    # every day of the year in calendar order, leap days included
+    day = datetime.date(year, 1, 1)
+    while day.year == year:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def dayPath(station, day):
+    return "/history/airport/{}/{}/{}/{}/DailyHistory.html?format=1".format(station, day.year, day.month, day.day)
+
+
+class FetchError(Exception):
+    def __init__(self, message, status=None, retryAfter=None):
+        Exception.__init__(self, message)
+        self.status = status
+        self.retryAfter = retryAfter
+
+
+class DayFetcher:
+    # Fetches DailyHistory pages with a bounded pool of threads.
+    # Every thread keeps its own keep-alive connection, so consecutive days
+    # are requested over the same socket instead of a new one per day.
+
+    def __init__(self, baseUrl=baseUrl, maxWorkers=maxWorkers, timeout=30):
+        parts = urllib.parse.urlsplit(baseUrl)
+        self.scheme = parts.scheme
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.maxWorkers = maxWorkers
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.scheme == "https":
+                conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+    def fetch(self, path, reader=None):
+        # reader(response) consumes the body while it downloads and its result is returned,
+        # by default the whole body is read into bytes
+        path = self.prefix + path
+        retried, redirects = False, 0
+        while True:
+            conn = self._connection()
+            try:
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                response = conn.getresponse()
+                if response.status == 200 and reader is None:
+                    return response.read()
+                if response.status == 200:
+                    result = reader(response)
+                    # iterating lines never marks the response as done, the final read frees the connection
+                    response.read()
+                    return result
+                response.read()
+            except (http.client.HTTPException, OSError):
+                # a keep-alive socket the server has already closed fails on first use, so retry once on a fresh one
+                self._reset()
+                if retried:
+                    raise
+                retried = True
                 continue
 
-            elif i == 9 and (j == 31): #Sep30 (Sep = 9)
+            if response.status in (301, 302, 303, 307, 308) and redirects < 5:
+                redirects += 1
+                location = urllib.parse.urlsplit(response.getheader("Location", ""))
+                if location.netloc and location.netloc != self.host:
+                    raise FetchError("redirected off host: {} -> {}".format(path, location.geturl()))
+                path = location.path + ("?" + location.query if location.query else "")
                 continue
 
-            elif i == 11 and (j == 31): #Nov30 (Nov = 11)
+            retryAfter = response.getheader("Retry-After")
+            raise FetchError("{} {} for {}".format(response.status, response.reason, path), response.status,
+                             float(retryAfter) if retryAfter and retryAfter.isdigit() else None)
+
+    def fetchDays(self, station, days, reader=None):
+        # yields (day, result) in the same order as days, while up to maxWorkers requests are in flight.
+        # reader(day, response) is run on the worker thread, see fetch
+        days = list(days)
+
+        def fetchDay(day):
+            return self.fetch(dayPath(station, day), reader and (lambda response: reader(day, response)))
+
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as pool:
+            for day, result in zip(days, pool.map(fetchDay, days)):
+                yield day, result
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parseAndKeep(day, response):
+    # parses the response as it streams in and keeps the raw bytes for the cache
+    raw = []
+
+    def lines():
+        for line in response:
+            raw.append(line)
+            yield line
+
+    observations = list(parser.parseLines(lines(), day))
+    body = b"".join(raw)
+    # iterating stops quietly at EOF, a body cut off by the server must not be parsed and cached as the whole day
+    length = response.getheader("Content-Length")
+    if length and length.isdigit() and len(body) < int(length):
+        raise http.client.IncompleteRead(body, int(length) - len(body))
+    return body, observations
+
+
+def observations(fetcher, cache, station, days):
+    # yields typed observations in calendar order. Cached days are parsed straight out of the cache,
+    # the rest are downloaded (and cached) concurrently and parsed while they download.
+    # fetcher is a DayFetcher or a Scheduler, days the scheduler gave up on are skipped and not cached
+    days = list(days)
+    missing = cache.missing(station, days)
+    fetched = fetcher.fetchDays(station, missing, parseAndKeep)
+    missing = set(missing)
+
+    for day in days:
+        if day in missing:
+            _, result = next(fetched)
+            if result is None:
                 continue
+            body, dayObservations = result
+            cache.put(station, day, body)
+        else:
+            with cache.open(station, day) as file:
+                dayObservations = list(parser.parseLines(file, day))
+        for obs in dayObservations:
+            yield obs
 
-            else:
-                site = "https://www.wunderground.com/history/airport/RPLL/2013/{}/{}/DailyHistory.html?format=1".format(i, j)
 
-            data = urllib.request.urlopen(site)
+if __name__ == "__main__":
+    # usage: python wunderground_importer.py [station] [year ...]
+    # days already in the cache are not downloaded again, the output is rebuilt from the cache
+    station = sys.argv[1] if len(sys.argv) > 1 else station
+    years = [int(y) for y in sys.argv[2:]] or [year]
+
+    from wunderground_scheduler import Scheduler
 
-            for l in data.readlines():
-               file.writelines(str(l) + "\n")
+    cache = DayCache()
+    with open("try_DELETEEQUAL.txt", "w", newline="") as file, DayFetcher() as fetcher:
+        scheduler = Scheduler(fetcher)
+        fileOut = csv.writer(file, delimiter="\t")
+        for y in years:
+            for obs in observations(scheduler, cache, station, dayDates(y)):
+                fileOut.writerow(parser.toRow(obs))
+            print("{}: {}".format(y, scheduler.summary()))
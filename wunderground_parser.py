@@ -0,0 +1,118 @@
+# Parses DailyHistory.html?format=1 responses line by line into typed observations
+
+import collections
+import datetime
+
+Observation = collections.namedtuple("Observation", [
+    "time",             # local datetime of the report
+    "temperature",      # C
+    "dewPoint",         # C
+    "humidity",         # %
+    "pressure",         # sea level pressure, hPa
+    "visibility",       # km
+    "windDirection",    # compass text, e.g. "NNE", "Calm", "Variable"
+    "windSpeed",        # km/h
+    "gustSpeed",        # km/h
+    "precipitation",    # mm
+    "events",
+    "conditions",
+    "windDirDegrees",   # deg
+    "dateUtc",          # UTC datetime of the report
+])
+
+# values wunderground uses for "no reading"
+missingValues = {"", "-", "N/A", "-9999", "-9999.0", "-9999.00"}
+
+
+def toFloat(value):
+    return None if value in missingValues else float(value)
+
+
+def toInt(value):
+    return None if value in missingValues else int(float(value))
+
+
+def toWindSpeed(value):
+    return 0.0 if value == "Calm" else toFloat(value)
+
+
+def toLocalTime(day, value):
+    # "12:30 AM" -> datetime on day, without going through strptime for every row
+    clock, half = value.split(" ")
+    hour, minute = clock.split(":")
+    hour = int(hour) % 12 + (12 if half == "PM" else 0)
+    return datetime.datetime(day.year, day.month, day.day, hour, int(minute))
+
+
+def toUtc(value):
+    # "2013-01-01 16:00:00"
+    date, clock = value.split(" ")
+    y, m, d = date.split("-")
+    hh, mm, ss = clock.split(":")
+    return datetime.datetime(int(y), int(m), int(d), int(hh), int(mm), int(ss))
+
+
+def parseLines(lines, day):
+    # lines may be bytes (straight off the socket or the cache) or str.
+    # Blank lines, the header row and rows that don't have every column are skipped.
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        line = line.strip()
+        if line.endswith("<br />"):
+            line = line[:-6]
+        if not line or line.startswith("Time"):
+            continue
+
+        fields = line.split(",")
+        if len(fields) != len(Observation._fields):
+            continue
+
+        yield Observation(
+            toLocalTime(day, fields[0]),
+            toFloat(fields[1]),
+            toFloat(fields[2]),
+            toInt(fields[3]),
+            toFloat(fields[4]),
+            toFloat(fields[5]),
+            fields[6],
+            toWindSpeed(fields[7]),
+            toFloat(fields[8]),
+            toFloat(fields[9]),
+            fields[10],
+            fields[11],
+            toInt(fields[12]),
+            toUtc(fields[13]),
+        )
+
+
+def toRow(obs):
+    # the delimited layout the cleaning stage and wunderGroundToEPW_def.def expect:
+    # the 14 wunderground columns, the minute (ignored by the converter), then Year, Month, Day, Hour
+    values = list(obs)
+    values[0] = obs.time.strftime("%H:%M")
+    values[13] = obs.dateUtc.strftime("%Y-%m-%d %H:%M:%S")
+    values += [obs.time.minute, obs.time.year, obs.time.month, obs.time.day, obs.time.hour]
+    return ["" if value is None else str(value) for value in values]
+
+
+def fromRow(row):
+    # inverse of toRow
+    year, month, day = int(row[15]), int(row[16]), int(row[17])
+    hour, minute = row[0].split(":")
+    return Observation(
+        datetime.datetime(year, month, day, int(hour), int(minute)),
+        toFloat(row[1]),
+        toFloat(row[2]),
+        toInt(row[3]),
+        toFloat(row[4]),
+        toFloat(row[5]),
+        row[6],
+        toWindSpeed(row[7]),
+        toFloat(row[8]),
+        toFloat(row[9]),
+        row[10],
+        row[11],
+        toInt(row[12]),
+        toUtc(row[13]),
+    )
@@ -0,0 +1,135 @@
+# Resamples irregular (half hourly and special report) observations onto the 8760 (8784) hour grid
+# of wunderGroundToEPW_def.def, NumInHour=1, in one vectorized pass per field.
+#
+# hour slot k covers [k, k + 1) hours after Jan 1 00:00 local standard time, i.e. EPW hour (k % 24) + 1.
+# Slots without any observation are NaN, see wunderground_gapfill.py
+# usage: python wunderground_resample.py <archive.wuarc> <year> <out.csv> [station]
+
+import csv
+import datetime
+import sys
+
+import numpy as np
+
+from wunderground_archive import Archive, missingInt, toSeconds
+
+# field -> how the observations that fall in one hour are combined
+defaultAggregations = {
+    "temperature": "mean",
+    "dewPoint": "mean",
+    "humidity": "mean",
+    "pressure": "nearest",
+    "visibility": "mean",
+    "windSpeed": "mean",
+    "gustSpeed": "max",
+    "precipitation": "sum",
+    "windDirDegrees": "circularMean",
+}
+
+
+def hourGrid(year):
+    # seconds of the start of every hour of the year
+    start = toSeconds(datetime.datetime(year, 1, 1))
+    end = toSeconds(datetime.datetime(year + 1, 1, 1))
+    return np.arange(start, end, 3600, dtype=np.int64)
+
+
+def binMean(slots, values, numSlots):
+    counts = np.bincount(slots, minlength=numSlots)
+    sums = np.bincount(slots, weights=values, minlength=numSlots)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def binSum(slots, values, numSlots):
+    counts = np.bincount(slots, minlength=numSlots)
+    return np.where(counts > 0, np.bincount(slots, weights=values, minlength=numSlots), np.nan)
+
+
+def binMax(slots, values, numSlots):
+    result = np.full(numSlots, -np.inf)
+    np.maximum.at(result, slots, values)
+    result[np.isneginf(result)] = np.nan
+    return result
+
+
+def binCircularMean(slots, degrees, numSlots):
+    # mean direction of the unit vectors, so 350 and 10 average to 0 rather than 180
+    radians = np.deg2rad(degrees)
+    counts = np.bincount(slots, minlength=numSlots)
+    sines = np.bincount(slots, weights=np.sin(radians), minlength=numSlots)
+    cosines = np.bincount(slots, weights=np.cos(radians), minlength=numSlots)
+    # rounding first keeps a tiny negative angle from coming out as 360
+    mean = np.round(np.rad2deg(np.arctan2(sines, cosines)), 6) % 360.0
+    return np.where(counts > 0, mean, np.nan)
+
+
+def binNearest(slots, values, numSlots, times, grid):
+    # the observation closest to the top of its hour
+    distance = np.abs(times - grid[slots])
+    order = np.lexsort((distance, slots))
+    firstSlots, first = np.unique(slots[order], return_index=True)
+    result = np.full(numSlots, np.nan)
+    result[firstSlots] = values[order[first]]
+    return result
+
+
+def resampleHourly(times, columns, year, aggregations=defaultAggregations):
+    # times: seconds since 1970 (local standard time), columns: {field: array}, missing readings are NaN
+    # (or missingInt in integer columns). Returns {field: float64 array} of exactly one value per hour
+    grid = hourGrid(year)
+    numSlots = len(grid)
+    times = np.asarray(times, dtype=np.int64)
+    slots = (times - grid[0]) // 3600
+    inYear = (slots >= 0) & (slots < numSlots)
+
+    hourly = {"time": grid}
+    for name, how in aggregations.items():
+        if name not in columns:
+            continue
+        values = np.asarray(columns[name])
+        if values.dtype.kind in "iu":
+            values = np.where(values == missingInt, np.nan, values)
+        values = values.astype(np.float64)
+        valid = inYear & ~np.isnan(values)
+        s, v = slots[valid], values[valid]
+
+        if how == "mean":
+            hourly[name] = binMean(s, v, numSlots)
+        elif how == "sum":
+            hourly[name] = binSum(s, v, numSlots)
+        elif how == "max":
+            hourly[name] = binMax(s, v, numSlots)
+        elif how == "circularMean":
+            hourly[name] = binCircularMean(s, v, numSlots)
+        elif how == "nearest":
+            hourly[name] = binNearest(s, v, numSlots, times[valid], grid)
+        else:
+            raise ValueError("unknown aggregation '{}' for '{}'".format(how, name))
+    return hourly
+
+
+def resampleArchive(archive, year, station=None, aggregations=defaultAggregations):
+    start, end = datetime.datetime(year, 1, 1), datetime.datetime(year + 1, 1, 1)
+    selected = archive.between(start, end, ["time"] + list(aggregations), station)
+    return resampleHourly(selected.pop("time"), selected, year, aggregations)
+
+
+def writeHourly(path, hourly):
+    fields = [name for name in hourly if name != "time"]
+    stamps = hourly["time"].astype("datetime64[s]").astype(datetime.datetime)
+    with open(path, "w", newline="") as file:
+        fileOut = csv.writer(file)
+        fileOut.writerow(["Year", "Month", "Day", "Hour"] + fields)
+        for i, stamp in enumerate(stamps):
+            fileOut.writerow([stamp.year, stamp.month, stamp.day, stamp.hour + 1] +
+                             ["" if np.isnan(hourly[name][i]) else round(float(hourly[name][i]), 2)
+                              for name in fields])
+
+
+if __name__ == "__main__":
+    archive = Archive(sys.argv[1])
+    year = int(sys.argv[2])
+    hourly = resampleArchive(archive, year, sys.argv[4] if len(sys.argv) > 4 else None)
+    writeHourly(sys.argv[3], hourly)
+    print("{} hours, {} without observations".format(len(hourly["time"]), int(np.isnan(hourly["temperature"]).sum())))
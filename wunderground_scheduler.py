@@ -0,0 +1,142 @@
+# Rate limit aware scheduling of day requests: the number of requests in flight grows while the server
+# answers normally and is halved on 429/5xx responses or timeouts, failed days are retried with jittered
+# exponential backoff, and every day gets a status instead of one failure aborting the run.
+# usage: python wunderground_scheduler.py   (runs against the stand-in server with injected faults)
+
+import collections
+import http.client
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import wunderground_importer as importer
+
+DayStatus = collections.namedtuple("DayStatus", ["day", "ok", "attempts", "error", "elapsed"])
+
+# answers that mean "slow down" rather than "this day is broken"
+throttleStatuses = {429, 500, 502, 503, 504}
+
+
+class AdaptiveLimit:
+    # additive increase / multiplicative decrease of the allowed requests in flight
+
+    def __init__(self, start=4, minimum=1, maximum=16):
+        self.limit = float(start)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inFlight = 0
+        self.pausedUntil = 0.0
+        self.lastDecrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        # returns the start time of the request, to be handed back to release
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self.pausedUntil - now
+                if wait <= 0 and self.inFlight < int(self.limit):
+                    self.inFlight += 1
+                    return now
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, started, healthy, pause=None):
+        # healthy: True for a normal answer, False for "slow down", None for a failure that says nothing
+        # about the server's load (a 404, a broken body), which leaves the limit as it is
+        with self._cond:
+            self.inFlight -= 1
+            if healthy:
+                # one more slot for every full window of healthy responses
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif healthy is not None and started > self.lastDecrease:
+                # requests sent before the last decrease were sent at the old limit, don't count them again
+                self.limit = max(self.minimum, self.limit / 2)
+                self.lastDecrease = time.monotonic()
+            if pause:
+                self.pausedUntil = max(self.pausedUntil, time.monotonic() + pause)
+            self._cond.notify_all()
+
+
+def isThrottle(error):
+    if isinstance(error, importer.FetchError):
+        return error.status in throttleStatuses
+    return isinstance(error, (socket.timeout, TimeoutError, ConnectionError))
+
+
+class Scheduler:
+    # Wraps a DayFetcher and has the same fetchDays interface, failed days yield None as their result.
+    # statuses collects a DayStatus for every day of the last fetchDays call.
+
+    def __init__(self, fetcher, limit=None, maxAttempts=5, baseDelay=0.5, maxDelay=30.0, seed=None):
+        self.fetcher = fetcher
+        self.limit = limit or AdaptiveLimit(maximum=fetcher.maxWorkers)
+        self.maxAttempts = maxAttempts
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.statuses = []
+        self._random = random.Random(seed)
+
+    def backoff(self, attempt):
+        # "full jitter": anywhere between 0 and the exponential cap, so retries of many days spread out
+        return self._random.uniform(0, min(self.maxDelay, self.baseDelay * 2 ** attempt))
+
+    def fetchDay(self, station, day, reader=None):
+        start = time.monotonic()
+        error = None
+        for attempt in range(self.maxAttempts):
+            started = self.limit.acquire()
+            try:
+                result = self.fetcher.fetch(importer.dayPath(station, day),
+                                            reader and (lambda response: reader(day, response)))
+            except (importer.FetchError, OSError, http.client.HTTPException, ValueError) as e:
+                # HTTPException (e.g. IncompleteRead, BadStatusLine) is not an OSError, ValueError comes from
+                # the reader; both only fail this attempt
+                error = e
+                throttled = isThrottle(e)
+                self.limit.release(started, False if throttled else None, getattr(e, "retryAfter", None))
+                if not throttled and getattr(e, "status", None) == 404:
+                    break
+                time.sleep(self.backoff(attempt))
+                continue
+            self.limit.release(started, True)
+            return result, DayStatus(day, True, attempt + 1, None, time.monotonic() - start)
+
+        return None, DayStatus(day, False, attempt + 1, str(error), time.monotonic() - start)
+
+    def fetchDays(self, station, days, reader=None):
+        # yields (day, result) in calendar order, result is None for days that failed every attempt
+        days = list(days)
+        self.statuses = []
+        with ThreadPoolExecutor(max_workers=self.limit.maximum) as pool:
+            futures = [pool.submit(self.fetchDay, station, day, reader) for day in days]
+            for day, future in zip(days, futures):
+                result, status = future.result()
+                self.statuses.append(status)
+                yield day, result
+
+    def summary(self):
+        failed = [status for status in self.statuses if not status.ok]
+        retried = sum(1 for status in self.statuses if status.attempts > 1)
+        return "{} days, {} retried, {} failed{}".format(
+            len(self.statuses), retried, len(failed),
+            "".join("\n  {} after {} attempts: {}".format(s.day, s.attempts, s.error) for s in failed))
+
+
+if __name__ == "__main__":
+    from wunderground_standin import StandinServer
+
+    server = StandinServer(latency=0.02, maxConcurrent=6, failureRate=0.02, retryAfter=0,
+                            seed=1).start()
+    try:
+        with importer.DayFetcher(server.url, maxWorkers=16, timeout=5) as fetcher:
+            scheduler = Scheduler(fetcher, baseDelay=0.05, seed=1)
+            start = time.perf_counter()
+            fetched = sum(1 for day, body in scheduler.fetchDays(importer.station, importer.dayDates(2013)) if body)
+            elapsed = time.perf_counter() - start
+        print("{} days in {:.2f} s, final limit {:.1f}, {} requests, {} throttled, {} failed by the server".format(
+            fetched, elapsed, scheduler.limit.limit, server.requests, server.throttled, server.failed))
+        print(scheduler.summary())
+    finally:
+        server.stop()
@@ -0,0 +1,138 @@
+# Local stand-in for the wunderground DailyHistory.html?format=1 pages, serves synthetic daily CSV
+# it can also play a throttling server: 429 when too many requests are in flight, random 503 failures,
+# and random bodies cut off after their headers promised more (truncateRate)
+# usage: python wunderground_standin.py [port] [latencySeconds] [maxConcurrent] [failureRate]
+
+import datetime
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+header = "TimePHT,TemperatureC,Dew PointC,Humidity,Sea Level PressurehPa,VisibilityKm,Wind Direction," + \
+         "Wind SpeedKm/h,Gust SpeedKm/h,Precipitationmm,Events,Conditions,WindDirDegrees,DateUTC"
+compass = ["North", "NNE", "NE", "ENE", "East", "ESE", "SE", "SSE",
+           "South", "SSW", "SW", "WSW", "West", "WNW", "NW", "NNW"]
+dayPattern = re.compile(r"/history/airport/(\w+)/(\d+)/(\d+)/(\d+)/DailyHistory\.html")
+
+
+def dailyCsv(station, day, rowsPerDay=48, duplicateRate=0.0, utcOffset=8):
+    # METAR-like observations spread evenly over the day, seeded by station and date so every request
+    # for a day is identical. duplicateRate is the chance a report is repeated with the same timestamp
+    rnd = random.Random("{}{}".format(station, day.isoformat()))
+    lines = ["", header + "<br />"]
+    for slot in range(rowsPerDay):
+        local = datetime.datetime(day.year, day.month, day.day) + datetime.timedelta(minutes=slot * 1440 // rowsPerDay)
+        utc = local - datetime.timedelta(hours=utcOffset)
+        temp = 27 + 4 * math.sin((slot / float(rowsPerDay) - 0.375) * 2 * math.pi) + rnd.uniform(-0.5, 0.5)
+        dew = temp - rnd.uniform(2, 6)
+        humidity = int(100 * math.exp(17.625 * dew / (243.04 + dew) - 17.625 * temp / (243.04 + temp)))
+        windDeg = rnd.randrange(0, 360, 10)
+        line = "{},{:.1f},{:.1f},{},{},10.0,{},{:.1f},-,N/A,,Partly Cloudy,{},{}<br />".format(
+            local.strftime("%I:%M %p").lstrip("0"), temp, dew, humidity, rnd.randint(1008, 1014),
+            compass[int((windDeg + 11.25) / 22.5) % 16], rnd.uniform(0, 20), windDeg,
+            utc.strftime("%Y-%m-%d %H:%M:%S"))
+        lines.append(line)
+        while rnd.random() < duplicateRate:
+            lines.append(line)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        match = dayPattern.match(self.path)
+        if not match:
+            self.send_error(404)
+            return
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.inFlight += 1
+            throttle = server.maxConcurrent and server.inFlight > server.maxConcurrent
+            fail = not throttle and server.random.random() < server.failureRate
+            truncate = not throttle and not fail and server.random.random() < server.truncateRate
+            if throttle:
+                server.throttled += 1
+            elif fail:
+                server.failed += 1
+            elif truncate:
+                server.truncated += 1
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            if throttle:
+                retryAfter = [("Retry-After", str(server.retryAfter))] if server.retryAfter else []
+                self.sendBody(429, b"Too Many Requests\n", retryAfter)
+            elif fail:
+                self.sendBody(503, b"Service Unavailable\n")
+            else:
+                station, y, m, d = match.groups()
+                self.sendBody(200, dailyCsv(station, datetime.date(int(y), int(m), int(d)),
+                                            server.rowsPerDay, server.duplicateRate), truncate=truncate)
+        finally:
+            with server.lock:
+                server.inFlight -= 1
+
+    def sendBody(self, status, body, headers=(), truncate=False):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if truncate:
+            # half the promised body, then the connection is closed
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, maxConcurrent=0, failureRate=0.0, retryAfter=1, seed=None,
+                 rowsPerDay=48, duplicateRate=0.0, truncateRate=0.0):
+        ThreadingHTTPServer.__init__(self, ("127.0.0.1", port), StandinHandler)
+        self.latency = latency
+        self.maxConcurrent = maxConcurrent
+        self.failureRate = failureRate
+        self.retryAfter = retryAfter
+        self.rowsPerDay = rowsPerDay
+        self.duplicateRate = duplicateRate
+        self.truncateRate = truncateRate
+        self.random = random.Random(seed)
+        self.requests = self.throttled = self.failed = self.truncated = self.inFlight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    maxConcurrent = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    failureRate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    server = StandinServer(port, latency, maxConcurrent, failureRate)
+    print("serving synthetic DailyHistory on " + server.url)
+    server.serve_forever()